@@ -14,20 +14,172 @@
 
 # High Level Analyzer
 # For more information and documentation, please go to https://support.saleae.com/extensions/high-level-analyzer-extensions
+import atexit
+import copy
+import weakref
+from functools import partial
 from enum import Enum, auto
 from dataclasses import dataclass
+from collections import namedtuple
 from saleae.analyzers import HighLevelAnalyzer, AnalyzerFrame, StringSetting, NumberSetting, ChoicesSetting
 from saleae.data import GraphTime
 import lib_ubm_commands as ubm
 import lib_ubm_fru as fru
 import lib_ubm_fwupdate as fwupdate
+from lib_ubm_counters import AccessCounters
+from lib_ubm_controller import ControllerState, DecodeContext, ParseControllerAddresses, IsControllerAddress
+from lib_ubm_controller import ADDRESS_TABLE_SIZE, FRU_ADDRESS
+from lib_ubm_dfc import FormatSlot
+from lib_ubm_fwsession import RenderFirmwareUpdateSession, IsImageMatch, CheckReferenceImage, UnavailableImageComparison
+from lib_ubm_metrics import BusMetrics, METRICS_FRU_KEY, RenderBusMetrics
+from lib_ubm_output import BufferedTerminalSink, GetVerbosity, VERBOSITY_OFF, VERBOSITY_SUMMARY, VERBOSITY_FULL
+from lib_ubm_cache import CachedDecode, DecodeCache
+from lib_ubm_export import NumpyTransactionExporter, DESCRIPTOR_BYTES, NO_DESCRIPTOR
+from lib_ubm_store import TransactionStore, NO_VALUE
+from lib_ubm_render import FormatLine, DiffRecords, RenderChanges
+from lib_ubm_profile import StageProfiler, RenderProfile
+from lib_ubm_filter import ParseCommandFilter
 
-FRU_ADDRESS = 0x57
+# UBM FRU transactions start with the 16-bit offset written to the FRU
+FRU_OFFSET_BYTES = 2
+
+# Commands that update the command context. They are always accumulated, so the context stays up to date when the
+# command filter skips them; only the first byte of other skipped transactions is kept, for the access counts.
+CONTEXT_COMMANDS = frozenset((ubm.GET_FEATURES, ubm.GET_DFC_INDEX, ubm.PROGRAM_MODE_DATA_TRANSFER))
+
+# Analyzers with a terminal sink or export file, closed by one exit hook. Logic 2 creates a new analyzer on every
+# settings change or rerun, so they are held weakly and an analyzer that is collected closes its own output.
+OPEN_ANALYZERS = weakref.WeakSet()
+
+def CloseOpenAnalyzers():
+    for analyzer in list(OPEN_ANALYZERS):
+        analyzer.CloseOutput()
+
+atexit.register(CloseOpenAnalyzers)
+
+# Profiled decode stages: (stage name, Hla method). The first one is the total the others are part of.
+PROFILED_STAGES = (
+    ("Decode", "decode"),
+    ("I2C state machine", "I2CFrameStateMachine"),
+    ("Operation lookup", "GetCommandEntry"),
+    ("Access counting", "GetUBMOperationAccessCount"),
+    ("Decode cache", "DecodeParsedData"),
+    ("Checksum", "VerifyChecksum"),
+    ("DFC state", "TrackDFCState"),
+    ("Transaction recording", "RecordTransaction"),
+    ("Change detection", "GetReadChanges"),
+    ("Formatting", "RenderParsedData"),
+    ("Formatting", "RenderSummary"),
+    ("Firmware update tracking", "TrackFirmwareUpdate"),
+    ("Context update", "UpdateContext"),
+)
+# Records are decoded on first use, inside whichever stage uses them first, so the decoders are a stage of their own
+DECODERS_STAGE = "Decoders"
+
+def CallDecoder(decode, payload):
+    return decode(payload)
+
+# Command registry: every decodable transaction resolves to an operation label, the label printed
+# in front of the access count (None for no access count), a decoder that returns the parsed fields as a
+# record and a renderer that turns the record into terminal lines.
+CommandEntry = namedtuple("CommandEntry", ["operation", "countLabel", "decode", "render"])
+
+def ReadOrWrite(readEntry, writeEntry):
+    return {True: readEntry, False: writeEntry}
+
+def ReadOnly(operation, countLabel, decode, render):
+    entry = CommandEntry(operation, countLabel, decode, render)
+    return ReadOrWrite(entry, entry)
+
+# Program Mode Data Transfer is resolved through the sub-command registries below
+PROGRAM_TRANSFER_ENTRY = CommandEntry(None, None, None, None)
+UNKNOWN_COMMAND_ENTRY = CommandEntry("Unknown operation", None, None, None)
+
+UBM_COMMANDS = {
+    ubm.ENTER_PROGRAMMING_MODE: ReadOrWrite(
+        CommandEntry("Read Enter Programming Mode Command", "Enter Programming Mode Access Count:", None, None),
+        CommandEntry("Write to Enter Programming Mode Command", "Enter Programming Mode Access Count:",
+                     lambda data: fwupdate.DecodeEnterProgrammingModeCommandWrite(data[1:]), fwupdate.RenderEnterProgrammingModeCommandWrite)),
+    ubm.PROGRAM_MODE_DATA_TRANSFER: ReadOrWrite(PROGRAM_TRANSFER_ENTRY, PROGRAM_TRANSFER_ENTRY),
+    ubm.EXIT_PROGRAMING_MODE: ReadOrWrite(
+        CommandEntry("Read from Exit Programming Mode Command", None, None, None),
+        CommandEntry("Write to Exit Programming Mode Command", None,
+                     lambda data: fwupdate.DecodeExitProgrammingModeCommandWrite(data[1:]), fwupdate.RenderExitProgrammingModeCommandWrite)),
+    ubm.GET_OPERATION_STATE: ReadOnly("Read Operational State", "Get Operational State Access Count:",
+                                      lambda data: ubm.DecodeOperationState(data[2]), ubm.RenderOperationState),
+    ubm.GET_LAST_COMMAND_STATUS: ReadOnly("Read Last Command Status", "Get Last Command Status Access Count:",
+                                          lambda data: ubm.DecodeLastCommandStatus(data[2]), ubm.RenderLastCommandStatus),
+    ubm.GET_SILICON_IDENTITY: ReadOnly("Read Silicon Identity", "Get Silicon Identity Access Count:",
+                                       lambda data: ubm.DecodeSiliconIdentity(data[2:]), ubm.RenderSiliconIdentity),
+    ubm.GET_UPDATE_CAPABILITIES: ReadOnly("Read Update Capabilities", "Get Update Capabilities Access Count:",
+                                          lambda data: ubm.DecodeProgrammingCapabilities(data[2]), ubm.RenderProgrammingCapabilities),
+    ubm.GET_HFC_INFO: ReadOnly("Read HFC Info", "Get HFC Info Access Count:",
+                               lambda data: ubm.DecodeHFCInfo(data[2]), ubm.RenderHFCInfo),
+    ubm.GET_BACKPLANE_INFO: ReadOnly("Read Backplane Info", "Get Backplane Info Access Count:",
+                                     lambda data: ubm.DecodeBackplaneInfo(data[2]), ubm.RenderBackplaneInfo),
+    ubm.GET_STARTING_SLOT: ReadOnly("Read Starting Slot Offset", "Get Starting Slot Offset Access Count:",
+                                    lambda data: ubm.DecodeStartingSlot(data[2]), ubm.RenderStartingSlot),
+    ubm.GET_CAPABILITIES: ReadOnly("Read Capabilities", "Get Capabilities Access Count:",
+                                   lambda data: ubm.DecodeCapabilities(data[2:]), ubm.RenderCapabilities),
+    ubm.GET_FEATURES: ReadOrWrite(
+        CommandEntry("Read Features", "Features Command Access Count:", lambda data: ubm.DecodeFeatures(data[2:]), ubm.RenderFeatures),
+        CommandEntry("Write Features Byte", "Features Command Access Count:", lambda data: ubm.DecodeFeatures(data[1:]), ubm.RenderFeaturesWrite)),
+    ubm.GET_CHANGE_COUNT: ReadOrWrite(
+        CommandEntry("Read Change Count", "Change Count Command Access Count:", lambda data: ubm.DecodeChangeCount(data[2:]), ubm.RenderChangeCount),
+        CommandEntry("Write Change Count", "Change Count Command Access Count:", lambda data: ubm.DecodeChangeCountWrite(data[1:]), ubm.RenderChangeCountWrite)),
+    ubm.GET_DFC_INDEX: ReadOrWrite(
+        CommandEntry("Read DFC Index", "DFC Index Command Access Count:", lambda data: ubm.DecodeDFCIndex(data[2]), ubm.RenderDFCIndexRead),
+        CommandEntry("Write DFC Index", "DFC Index Command Access Count:", lambda data: ubm.DecodeDFCIndex(data[1]), ubm.RenderDFCIndexWrite)),
+    ubm.GET_DFC_STATUS_CONTROL: ReadOrWrite(
+        CommandEntry("Read DFC Descriptor", "DFC Descriptor Command Access Count:", lambda data: ubm.DecodeDFCDescriptor(data[2:]), ubm.RenderDFCDescriptor),
+        CommandEntry("Write DFC Descriptor", "DFC Descriptor Command Access Count:", lambda data: ubm.DecodeDFCDescriptorWrite(data[1:]), ubm.RenderDFCDescriptorWrite)),
+}
+
+FRU_COMMAND_ENTRY = CommandEntry("Read of UBM FRU", None, lambda data: fru.DecodeUBMFru(data[FRU_OFFSET_BYTES:]), fru.RenderUBMFru)
+
+PROGRAMMING_MODE_COMMANDS = frozenset((ubm.ENTER_PROGRAMMING_MODE, ubm.PROGRAM_MODE_DATA_TRANSFER, ubm.EXIT_PROGRAMING_MODE))
+
+def SubCommandWriteDecode(decode):
+    return lambda data: decode(data[1:])
+
+def SubCommandEntry(operation, decoder, dataOffset):
+    if decoder is None:
+        return CommandEntry(operation, None, None, None)
+    decode = SubCommandWriteDecode(decoder.decode) if dataOffset else decoder.decode
+    return CommandEntry(operation, None, decode, decoder.render)
+
+# Sub-command entries indexed directly by the sub-command byte
+PROGRAM_WRITE_ENTRIES = [SubCommandEntry("Write to " + fwupdate.GetSubCommandString(subCommand),
+                                         fwupdate.PROGRAMMING_SUB_COMMAND_WRITE_DECODERS.get(subCommand), 1)
+                         for subCommand in range(256)]
+PROGRAM_READ_ENTRIES = [SubCommandEntry("Read from " + fwupdate.GetSubCommandString(subCommand),
+                                        fwupdate.PROGRAMMING_SUB_COMMAND_READ_DECODERS.get(subCommand), 0)
+                        for subCommand in range(256)]
+PROGRAM_READ_ECHO_ENTRIES = [CommandEntry(entry.operation, None, None, None) for entry in PROGRAM_READ_ENTRIES]
+
+def AddControllerCommands(table, ubmAddress):
+    for cmd, entries in UBM_COMMANDS.items():
+        for isRead, entry in entries.items():
+            table[(ubmAddress, cmd, isRead)] = entry
+
+def BuildCommandTable(ubmAddresses):
+    '''
+    Build the dispatch table keyed by (target address, opcode, read) for the UBM controllers and the UBM FRU.
+    '''
+    table = {}
+    for ubmAddress in ubmAddresses:
+        AddControllerCommands(table, ubmAddress)
+    for offset in range(256):
+        table[(FRU_ADDRESS, offset, True)] = FRU_COMMAND_ENTRY
+        table[(FRU_ADDRESS, offset, False)] = FRU_COMMAND_ENTRY
+    return table
 
 class I2CState(Enum):
     IDLE  = auto()
     START = auto()
     DATA  = auto()
+    FIRST = auto()
+    SKIP  = auto()
 
 @dataclass
 class SaleaeFrame:
@@ -36,11 +188,28 @@ class SaleaeFrame:
     data: bytearray
     read: bool
     address: int
+    # Bytes of data written before the (repeated) start of the read phase, all of them for writes
+    writeLength: int
+    # Bytes transferred; data only holds the first byte of transactions skipped by the command filter
+    length: int
+
+    def GetWriteData(self):
+        return memoryview(self.data)[:self.writeLength]
+
+    def GetReadData(self):
+        return memoryview(self.data)[self.writeLength:]
 
 # High level analyzers must subclass the HighLevelAnalyzer class.
 class Hla(HighLevelAnalyzer):
     # List of settings that a user can set for this High Level Analyzer.
-    ubmAddress = StringSetting(label = '7-bit UBM Controller Address in hex format (0x55)')
+    ubmAddress = StringSetting(label = '7-bit UBM Controller Addresses in hex format (0x55, 0x55,0x56, 0x50-0x56 and/or auto)')
+    verbosity = ChoicesSetting(choices = ('Full', 'Summary', 'Off'), label = 'Terminal output')
+    emission = ChoicesSetting(choices = ('All transactions', 'Changes only'), label = 'Emit')
+    exportPath = StringSetting(label = 'NumPy transaction export file (optional, requires NumPy)')
+    referenceImage = StringSetting(label = 'Firmware reference image file (optional)')
+    transactionStore = ChoicesSetting(choices = ('Off', 'On'), label = 'Transaction store')
+    profiling = ChoicesSetting(choices = ('Off', 'On'), label = 'Stage profiling')
+    commandFilter = StringSetting(label = 'Decode only (optional): opcodes in hex, dfc, firmware, sub:0x03, addr:0x55')
 
     def __init__(self):
         '''
@@ -48,14 +217,38 @@ class Hla(HighLevelAnalyzer):
 
         Settings can be accessed using the same name used above.
         '''
-        self.accessCountList = [[ubm.GET_OPERATION_STATE, 0], [ubm.GET_LAST_COMMAND_STATUS, 0], [ubm.GET_SILICON_IDENTITY, 0], [ubm.GET_UPDATE_CAPABILITIES, 0],
-                                [ubm.GET_HFC_INFO, 0], [ubm.GET_BACKPLANE_INFO, 0], [ubm.GET_STARTING_SLOT, 0], [ubm.GET_CAPABILITIES, 0],
-                                [ubm.GET_FEATURES, 0], [ubm.GET_CHANGE_COUNT, 0], [ubm.GET_DFC_INDEX, 0], [ubm.GET_DFC_STATUS_CONTROL, 0],
-                                [ubm.ENTER_PROGRAMMING_MODE, 0], [ubm.PROGRAM_MODE_DATA_TRANSFER, 0], [ubm.EXIT_PROGRAMING_MODE, 0]]
-        self.fruAccessCount = 0
-        self.lastCommand = 0
-        self.lastSubCommand = 0
-        self.ubmAddress = int(self.ubmAddress, 16)
+        self.output = None
+        self.exporter = None
+        self.checksumsChecked = 0
+        self.checksumErrors = 0
+        self.ubmAddresses, self.autoDiscover = ParseControllerAddresses(self.ubmAddress)
+        self.commandTable = BuildCommandTable(self.ubmAddresses)
+        # Controller state and address filter bitmap, both indexed directly by the 7-bit address
+        self.controllers = [None] * ADDRESS_TABLE_SIZE
+        self.addressFilter = bytearray(ADDRESS_TABLE_SIZE)
+        self.addressFilter[FRU_ADDRESS] = 1
+        for ubmAddress in self.ubmAddresses:
+            self.controllers[ubmAddress] = ControllerState(ubmAddress)
+            self.addressFilter[ubmAddress] = 1
+        self.fruAccessCounts = AccessCounters()
+        self.decodeCache = DecodeCache()
+        self.transactions = TransactionStore() if 'On' == self.transactionStore else None
+        self.busMetrics = BusMetrics()
+        self.verbosity = GetVerbosity(self.verbosity)
+        self.changesOnly = ('Changes only' == self.emission)
+        self.lastReads = {}
+        # The reference image is checked once; sessions that end while it is unavailable report why
+        self.referenceImageError = CheckReferenceImage(self.referenceImage) if self.referenceImage else None
+        self.SetCommandFilter(self.commandFilter)
+        self.profiler = None
+        self.runDecoder = None
+        if 'On' == self.profiling:
+            self.profiler = StageProfiler()
+            self.InstallProfiler()
+        if VERBOSITY_OFF != self.verbosity:
+            self.SetOutputSink(BufferedTerminalSink())
+        if self.exportPath:
+            self.SetExportFile(self.exportPath)
         self.reset()
 
     def reset(self):
@@ -64,11 +257,10 @@ class Hla(HighLevelAnalyzer):
         self.data       = bytearray()
         self.start_time = None
         self.read       = False
-    
-    def GetAccessCountIndex(self, cmd):
-        for i, sublist in enumerate(self.accessCountList):
-            if cmd == sublist[0]:
-                return i
+        self.writeLength = 0
+        self.skippedBytes = 0
+        # Data state after the address frames: FIRST until the command filter has seen the first data byte
+        self.dataState  = None
 
     def I2CFrameStateMachine(self, frame):
         out = None
@@ -79,10 +271,15 @@ class Hla(HighLevelAnalyzer):
                 return out
         elif self.state == I2CState.START:
             if frame.type == "address" and frame.data["ack"]:
+                if frame.data["read"] and not self.read:
+                    # Start of the read phase, the bytes so far are the write phase
+                    self.writeLength = len(self.data) + self.skippedBytes
                 self.read |= frame.data["read"]
                 self.address = frame.data["address"][0]
-                if (self.ubmAddress == self.address) | (FRU_ADDRESS == self.address):
-                    self.state = I2CState.DATA
+                if self.addressFilter[self.address]:
+                    if self.dataState is None:
+                        self.dataState = self.firstDataState
+                    self.state = self.dataState
                     return out
         elif self.state == I2CState.DATA:
             if frame.type == "data":
@@ -93,171 +290,583 @@ class Hla(HighLevelAnalyzer):
                 return out
             elif frame.type == "stop":
                 self.state = I2CState.IDLE
-                out = SaleaeFrame(
-                    start_time=self.start_time,
-                    end_time=frame.end_time,
-                    read=self.read,
-                    data=self.data,
-                    address=self.address
-                )
+                out = self.GetTransaction(frame.end_time)
+        elif self.state == I2CState.SKIP:
+            if frame.type == "data":
+                self.skippedBytes += 1
+                return out
+            elif frame.type == "start":
+                self.state = I2CState.START
+                return out
+            elif frame.type == "stop":
+                self.state = I2CState.IDLE
+                out = self.GetTransaction(frame.end_time)
+        elif self.state == I2CState.FIRST:
+            if frame.type == "data":
+                self.data.extend(frame.data["data"])
+                # A write phase may still turn into a programming mode read after a repeated start, which the
+                # filter checks against the sub-command: keep it whole, the decode decides once the read is known
+                if ((self.data[0] in CONTEXT_COMMANDS) or self.IsProgrammingModeRead(self.address, self.data, True) or
+                        self.IsCommandSelected(self.address, self.data, self.read, 1)):
+                    self.dataState = I2CState.DATA
+                else:
+                    self.dataState = I2CState.SKIP
+                self.state = self.dataState
+                return out
+            elif frame.type == "start":
+                self.state = I2CState.START
+                return out
+            elif frame.type == "stop":
+                self.state = I2CState.IDLE
+                out = self.GetTransaction(frame.end_time)
         self.reset()
         return out
+
+    def GetTransaction(self, endTime):
+        length = len(self.data) + self.skippedBytes
+        return SaleaeFrame(
+            start_time=self.start_time,
+            end_time=endTime,
+            read=self.read,
+            data=self.data,
+            address=self.address,
+            writeLength=self.writeLength if self.read else length,
+            length=length
+        )
+
+    def SetCommandFilter(self, text):
+        '''
+        Decode only the transactions selected by a command filter setting (see lib_ubm_filter.ParseCommandFilter); the
+        others are still counted. An empty setting decodes everything.
+        '''
+        self.commandFilter = ParseCommandFilter(text)
+        self.firstDataState = I2CState.DATA if self.commandFilter is None else I2CState.FIRST
+
+    def IsCommandSelected(self, address, data, isRead, writeLength):
+        '''
+        Command filter check of a transaction, only the first byte is needed unless the sub-command of a Program Mode
+        Data Transfer write (writeLength > 1) is checked as well.
+        '''
+        commandFilter = self.commandFilter
+        if not commandFilter.addresses[address]:
+            return False
+        controller = self.controllers[address]
+        if controller is None:
+            return True
+        if self.IsProgrammingModeRead(address, data, isRead):
+            return commandFilter.opcodes[controller.lastCommand] and commandFilter.subCommands[controller.lastSubCommand]
+        cmd = data[0]
+        if (ubm.PROGRAM_MODE_DATA_TRANSFER == cmd) and (writeLength > 1):
+            return commandFilter.opcodes[cmd] and commandFilter.subCommands[data[1]]
+        return commandFilter.opcodes[cmd]
+
+    def SkipTransaction(self, i2c_frame):
+        '''
+        Count a transaction that the command filter skips and keep the command context up to date, without decoding it.
+        '''
+        address = i2c_frame.address
+        data = i2c_frame.data
+        isRead = i2c_frame.read
+        if self.IsCommandResponse(i2c_frame):
+            data = i2c_frame.GetWriteData()
+            isRead = False
+        opcode = self.GetOpcode(address, data, isRead)
+        self.GetUBMOperationAccessCount(address, data, isRead)
+        self.busMetrics.Add(METRICS_FRU_KEY if FRU_ADDRESS == address else opcode, i2c_frame.start_time, i2c_frame.end_time,
+                            i2c_frame.length)
+        self.UpdateContext(address, data, isRead)
     
-    def PrintParsedData(self, address, data, isRead):
-        
-        
-        if self.ubmAddress == address:
+    def AddController(self, ubmAddress):
+        '''
+        Start decoding traffic to another UBM controller.
+        '''
+        if self.controllers[ubmAddress] is not None:
+            return self.controllers[ubmAddress]
+        controller = self.controllers[ubmAddress] = ControllerState(ubmAddress)
+        self.ubmAddresses = sorted(self.ubmAddresses + [ubmAddress])
+        AddControllerCommands(self.commandTable, ubmAddress)
+        self.addressFilter[ubmAddress] = 1
+        return controller
+
+    def GetController(self, address = None):
+        '''
+        Return the ControllerState of a UBM controller, by default the lowest configured address.
+        '''
+        if address is None:
+            if not self.ubmAddresses:
+                return None
+            address = self.ubmAddresses[0]
+        return self.controllers[address]
+
+    def IsProgrammingModeRead(self, address, data, isRead):
+        '''
+        Reads that follow a Program Mode Data Transfer write carry the sub-command response without an opcode byte.
+        '''
+        controller = self.controllers[address]
+        return isRead and (controller is not None) and (ubm.PROGRAM_MODE_DATA_TRANSFER == controller.lastCommand) and (data[0] not in PROGRAMMING_MODE_COMMANDS)
+
+    def IsCommandResponse(self, i2c_frame):
+        '''
+        A Program Mode Data Transfer write followed, after a repeated start, by the read of the sub-command response.
+        '''
+        data = i2c_frame.data
+        return (i2c_frame.read and (i2c_frame.writeLength > 1) and (i2c_frame.length > i2c_frame.writeLength) and
+                (self.controllers[i2c_frame.address] is not None) and (ubm.PROGRAM_MODE_DATA_TRANSFER == data[0]))
+
+    def GetOpcode(self, address, data, isRead):
+        '''
+        Opcode of a transaction: the first byte, or for programming mode reads the command they answer.
+        '''
+        if self.IsProgrammingModeRead(address, data, isRead):
+            return self.controllers[address].lastCommand
+        return data[0]
+
+    def GetCommandEntry(self, address, data, isRead):
+        cmd = data[0]
+        if self.IsProgrammingModeRead(address, data, isRead):
+            return PROGRAM_READ_ENTRIES[self.controllers[address].lastSubCommand]
+
+        entry = self.commandTable.get((address, cmd, isRead), UNKNOWN_COMMAND_ENTRY)
+        if entry is PROGRAM_TRANSFER_ENTRY:
+            if isRead:
+                return PROGRAM_READ_ECHO_ENTRIES[self.controllers[address].lastSubCommand]
+            return PROGRAM_WRITE_ENTRIES[data[1]]
+        return entry
+
+    def DecodeParsedData(self, entry, data):
+        '''
+        Return the CachedDecode of the transaction, or None if the operation has no decoder. The record is only
+        decoded when it is first used.
+        The registry entry identifies the opcode, direction and programming sub-command, so together
+        with the payload bytes it is a complete cache key.
+        '''
+        if entry.decode is None:
+            return None
+        payload = bytes(data)
+        key = (entry, payload)
+        cached = self.decodeCache.Lookup(key)
+        if cached is None:
+            decode = entry.decode
+            if self.runDecoder is not None:
+                decode = partial(self.runDecoder, decode)
+            cached = CachedDecode(decode, payload)
+            self.decodeCache.Store(key, cached)
+        return cached
+
+    def IsMultiController(self):
+        return self.autoDiscover or (len(self.ubmAddresses) > 1)
+
+    def RenderParsedData(self, address, entry, cached, accessCount, checksumOk, dfcIndex, changes):
+        lines = []
+        if self.IsMultiController() and (self.controllers[address] is not None):
+            lines.append(FormatLine("UBM Controller:", hex(address)))
+        if entry.countLabel is not None:
+            lines.append(FormatLine(entry.countLabel, accessCount))
+        if dfcIndex is not None:
+            lines.append(FormatLine("DFC Index:", dfcIndex, "-", FormatSlot(self.controllers[address].dfcState.GetSlot(dfcIndex))))
+        if checksumOk is False:
+            lines.append("Checksum Invalid")
+        if changes:
+            lines.extend(RenderChanges(changes))
+        if cached is not None:
+            lines.extend(cached.GetLines(entry.render))
+        lines.append("")
+        return lines
+
+    def GetDecodeCacheStats(self):
+        return self.decodeCache.GetStats()
+
+    def RenderSummary(self, address, entry, accessCount, checksumOk, dfcIndex, changes):
+        line = FormatLine(entry.operation, "- Access Count:", accessCount)
+        if self.IsMultiController() and (self.controllers[address] is not None):
+            line = FormatLine(hex(address), "-", line)
+        if dfcIndex is not None:
+            line = FormatLine(line, "- DFC Index:", dfcIndex, FormatSlot(self.controllers[address].dfcState.GetSlot(dfcIndex)))
+        if checksumOk is False:
+            line = FormatLine(line, "- Checksum Invalid")
+        if changes:
+            line = FormatLine(line, "- Changed:", ", ".join([change.name for change in changes]))
+        return [line]
+
+    def SetOutputSink(self, sink):
+        '''
+        Replace the terminal sink. Pending lines of the previous sink are written first.
+        '''
+        if self.output is not None:
+            self.output.Close()
+        if self.profiler is not None:
+            sink.Write = self.profiler.Wrap("Output", sink.Write)
+        self.output = sink
+        OPEN_ANALYZERS.add(self)
+
+    def SetExportFile(self, path):
+        '''
+        Export every following transaction to a NumPy .npy file (see lib_ubm_export).
+        '''
+        if self.exporter is not None:
+            self.exporter.Close()
+        self.exporter = NumpyTransactionExporter(path)
+        OPEN_ANALYZERS.add(self)
+
+    def CloseOutput(self):
+        if self.output is not None:
+            self.output.Close()
+        if self.exporter is not None:
+            self.exporter.Close()
+        OPEN_ANALYZERS.discard(self)
+
+    def __del__(self):
+        self.CloseOutput()
+
+    def InstallProfiler(self):
+        '''
+        Wrap the decode stages in the profiler accumulators. The wrappers are instance attributes that shadow the
+        methods, so with profiling off decode calls the methods directly and pays nothing.
+        '''
+        for name, method in PROFILED_STAGES:
+            setattr(self, method, self.profiler.Wrap(name, getattr(self, method)))
+        self.runDecoder = self.profiler.Wrap(DECODERS_STAGE, CallDecoder)
+
+    def GetProfile(self):
+        '''
+        Return the lib_ubm_profile.StageTime of every decode stage, or an empty list when profiling is off.
+        '''
+        return self.profiler.GetStageTimes() if self.profiler is not None else []
+
+    def RenderProfile(self):
+        return RenderProfile(self.GetProfile())
+
+    def DumpProfile(self, reset = False):
+        '''
+        Write the profile table to the terminal, optionally starting a new measurement interval.
+        '''
+        if self.profiler is None:
+            return
+        lines = ["Decode Profile"] + self.RenderProfile() + [""]
+        if self.output is not None:
+            self.output.Write(lines)
+        else:
+            print("\n".join(lines))
+        if reset:
+            self.profiler.Reset()
+
+    def GetDroppedLines(self):
+        return self.output.droppedLines if self.output is not None else 0
+
+    def GetUBMOperation(self, entry):
+        return entry.operation
+
+    def GetUBMOperationAccessCount(self, address, data, isRead):
+        controller = self.controllers[address]
+        if controller is not None:
+            counts = controller.accessCounts
+            if self.IsProgrammingModeRead(address, data, isRead):
+                return counts.commands[ubm.PROGRAM_MODE_DATA_TRANSFER] - 1
+
             cmd = data[0]
-            if ubm.ENTER_PROGRAMMING_MODE == cmd:
-                print("Enter Programming Mode Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                if not isRead:
-                    fwupdate.PrintEnterProgrammingModeCommandWrite(data[1:])
-            elif ubm.PROGRAM_MODE_DATA_TRANSFER == cmd:
-                if not isRead:
-                    fwupdate.PrintProgrammingModeSubCommandWrite(data[1:])
-            elif ubm.PROGRAM_MODE_DATA_TRANSFER == self.lastCommand:
-                if isRead:
-                    fwupdate.PrintProgrammingModeSubCommandRead(self.lastSubCommand, data)
-            elif ubm.EXIT_PROGRAMING_MODE == cmd:
-                if not isRead:
-                    fwupdate.PrintExitProgrammingModeCommandWrite(data[1:])
-            elif ubm.GET_OPERATION_STATE == cmd:
-                print("Get Operational State Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintOperationState(data[2])
-            elif ubm.GET_LAST_COMMAND_STATUS == cmd:
-                print("Get Last Command Status Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintLastCommandStatus(data[2])
-            elif ubm.GET_SILICON_IDENTITY == cmd:
-                print("Get Silicon Identity Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintSiliconIdentity(data[2:])   
-            elif ubm.GET_UPDATE_CAPABILITIES == cmd:
-                print("Get Update Capabilities Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintProgrammingCapabilities(data[2])   
-            elif ubm.GET_HFC_INFO == cmd:
-                print("Get HFC Info Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintHFCInfo(data[2])   
-            elif ubm.GET_BACKPLANE_INFO == cmd:
-                print("Get HFC Info Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintBackplaneInfo(data[2])  
-            elif ubm.GET_STARTING_SLOT == cmd:
-                print("Get Starting Slot Offset Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintStartingSlot(data[2])  
-            elif ubm.GET_CAPABILITIES == cmd:
-                print("Get Capabilities Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                ubm.PrintCapabilities(data[2:])  
-            elif ubm.GET_FEATURES == cmd:
-                print("Features Command Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                if isRead:
-                    ubm.PrintFeatures(data[2:])  
-                else:
-                    ubm.PrintFeaturesWrite(data[1:])
-            elif ubm.GET_CHANGE_COUNT == cmd:
-                print("Change Count Command Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                if isRead:
-                    ubm.PrintChangeCount(data[2:])  
-                else:
-                    ubm.PrintChangeCountWrite(data[1:])
-            elif ubm.GET_DFC_INDEX == cmd:
-                print("DFC Index Command Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                if isRead:
-                    print("DFC Index Read:", data[2])
-                else:
-                    print("DFC Index Written:", data[1])
+            if (ubm.PROGRAM_MODE_DATA_TRANSFER == cmd) and not isRead:
+                counts.CountSubCommand(data[1])
             elif ubm.GET_DFC_STATUS_CONTROL == cmd:
-                print("DFC Descriptor Command Access Count:", self.accessCountList[self.GetAccessCountIndex(cmd)][1])
-                if isRead:
-                    ubm.PrintDFCDescriptor(data[2:])
-                else:
-                    ubm.PrintDFCDescriptorWrite(data[1:])
-            
+                counts.CountDFCIndex(controller.dfcIndex)
+            return counts.CountCommand(cmd)
 
         if FRU_ADDRESS == address:
-            fru.PrintUBMFru(data[2:])
+            return self.fruAccessCounts.CountFRU()
 
-        print("")
+        return 0
 
-    def GetUBMOperation(self, address, data, isRead):
-        if self.ubmAddress == address:
-            cmd = data[0]
-            if ubm.ENTER_PROGRAMMING_MODE == cmd:
-                if isRead:
-                    return "Read Enter Programming Mode Command"
-                else:
-                    return "Write to Enter Programming Mode Command"
-            elif ubm.PROGRAM_MODE_DATA_TRANSFER == cmd:
-                if isRead:
-                    return "Read from " + fwupdate.GetSubCommandString(self.lastSubCommand)
-                else:
-                    return "Write to " + fwupdate.GetSubCommandString(data[1])
-            elif ubm.EXIT_PROGRAMING_MODE == cmd:
-                if isRead:
-                    return "Read from Exit Programming Mode Command"
-                else: 
-                    return "Write to Exit Programming Mode Command"
-            elif ubm.PROGRAM_MODE_DATA_TRANSFER == self.lastCommand:
-                if isRead:
-                    return "Read from " + fwupdate.GetSubCommandString(self.lastSubCommand)
-            elif ubm.GET_OPERATION_STATE == cmd:
-                return "Read Operational State"
-            elif ubm.GET_LAST_COMMAND_STATUS == cmd:
-                return "Read Last Command Status"
-            elif ubm.GET_SILICON_IDENTITY == cmd:
-                return "Read Silicon Identity"
-            elif ubm.GET_UPDATE_CAPABILITIES == cmd:
-                return "Read Update Capabilities"
-            elif ubm.GET_HFC_INFO == cmd:
-                return "Read HFC Info"
-            elif ubm.GET_BACKPLANE_INFO == cmd:
-                return "Read Backplane Info"
-            elif ubm.GET_STARTING_SLOT == cmd:
-                return "Read Starting Slot Offset"
-            elif ubm.GET_CAPABILITIES == cmd:
-                return "Read Capabilities"
-            elif ubm.GET_FEATURES == cmd:
-                if isRead:
-                    return "Read Features"
-                else:
-                    return "Write Features Byte"
-            elif ubm.GET_CHANGE_COUNT == cmd:
-                if isRead:
-                    return "Read Change Count"
-                else:
-                    return "Write Change Count"
-            elif ubm.GET_DFC_INDEX == cmd:
-                if isRead:
-                    return "Read DFC Index"
-                else:
-                    return "Write DFC Index"
-            elif ubm.GET_DFC_STATUS_CONTROL == cmd:
-                if isRead:
-                    return "Read DFC Descriptor"
-                else:
-                    return "Write DFC Descriptor"
-            
+    def GetAccessCounts(self, address = None):
+        '''
+        Snapshot of the access counts of a UBM controller (by default the lowest configured address),
+        with the UBM FRU access count.
+        '''
+        controller = self.GetController(address)
+        counts = controller.accessCounts if controller is not None else AccessCounters()
+        return counts.Snapshot()._replace(fru = self.fruAccessCounts.fru)
+
+    def VerifyChecksum(self, address, data, isRead, cached):
+        '''
+        Verify the checksum of a transaction. Returns True or False for controller responses (once Read Checksum
+        Creation is known to be enabled) and UBM FRU reads from offset 0 that cover the IPMI Common Header, None
+        for transactions without a checksum.
+
+        Programming mode reads contain only the response; other reads start with the opcode written
+        before the repeated start, which is not covered by the checksum.
+        '''
         if FRU_ADDRESS == address:
-            return "Read of UBM FRU"
-        
-        return "Unknown operation"
-    
-    def GetUBMOperationAccessCount(self, address, data, isRead):
-        returnVal = 0
-        if self.ubmAddress == address:
-            cmd = data[0]
-            try:
-                if (ubm.PROGRAM_MODE_DATA_TRANSFER == self.lastCommand) and isRead:
-                    returnVal = self.accessCountList[self.GetAccessCountIndex(self.lastCommand)][1]-1
-                else:
-                    returnVal = self.accessCountList[self.GetAccessCountIndex(cmd)][1]
-                    self.accessCountList[self.GetAccessCountIndex(cmd)][1] += 1
-            except:
-                print("Unable to increment access count for command: ", hex(cmd))
+            if not self.IsFRUImageRead(data, isRead):
+                return None
+            checksumOk = cached.GetRecord().checksumOk
+        elif isRead and (self.controllers[address] is not None) and self.controllers[address].readChecksumCreation:
+            if self.IsProgrammingModeRead(address, data, isRead):
+                checksumOk = ubm.IsReadChecksumValid(data)
+            else:
+                checksumOk = ubm.IsReadChecksumValid(memoryview(data)[1:])
+        else:
+            return None
+
+        self.checksumsChecked += 1
+        if not checksumOk:
+            self.checksumErrors += 1
+        return checksumOk
 
+    def IsFRUImageRead(self, data, isRead):
+        '''
+        A UBM FRU read carries checksums only if it starts at offset 0 and covers the IPMI Common Header, which
+        locates the records. Writes and reads from elsewhere in the FRU have nothing to check against.
+        '''
+        return (isRead and (len(data) >= FRU_OFFSET_BYTES + fru.IPMI_COMMON_HEADER_SIZE) and
+                not any(memoryview(data)[:FRU_OFFSET_BYTES]))
+
+    def GetChecksumErrors(self):
+        return self.checksumErrors
+
+    def TrackDFCState(self, address, data, isRead, cached, time):
+        '''
+        Record DFC descriptor reads and writes against the DFC index selected earlier with GET_DFC_INDEX,
+        and pick up the DFC index to slot mapping (and, with auto discovery, the UBM controllers) from
+        UBM FRU Port Route Info records.
+        Returns the DFC index of descriptor transactions, None otherwise.
+        '''
         if FRU_ADDRESS == address:
-            return self.fruAccessCount
-        
-        return returnVal
+            records = [fruRecord.body for fruRecord in cached.GetRecord().records]
+            for record in records:
+                if isinstance(record, fru.PortRouteInfo):
+                    self.ApplyPortRouteInfo(record)
+            # After the Port Route Info, so controllers discovered from it pick up the overview as well
+            for record in records:
+                if isinstance(record, fru.UBMOverview) and self.IsFRUImageRead(data, isRead):
+                    self.ApplyUBMOverview(record)
+            return None
+
+        controller = self.controllers[address]
+        if (ubm.GET_DFC_STATUS_CONTROL != data[0]) or (controller is None) or self.IsProgrammingModeRead(address, data, isRead):
+            return None
+
+        if cached is not None:
+            if isRead:
+                controller.dfcState.UpdateDescriptor(controller.dfcIndex, cached, time)
+            else:
+                controller.dfcState.UpdateDescriptorWrite(controller.dfcIndex, cached, time)
+        return controller.dfcIndex
+
+    def ApplyPortRouteInfo(self, portRouteInfo):
+        if self.autoDiscover:
+            for descriptor in portRouteInfo.descriptors:
+                if IsControllerAddress(descriptor.ubmControllerAddress):
+                    self.AddController(descriptor.ubmControllerAddress)
+        for ubmAddress in self.ubmAddresses:
+            self.controllers[ubmAddress].dfcState.ApplyPortRouteInfo(portRouteInfo)
+
+    def ApplyUBMOverview(self, overview):
+        '''
+        The UBM Overview gives the Read Checksum Creation setting of controllers that did not report it yet with
+        Features.
+        '''
+        for ubmAddress in self.ubmAddresses:
+            controller = self.controllers[ubmAddress]
+            if controller.readChecksumCreation is None:
+                controller.readChecksumCreation = overview.readChecksumCreation
+
+    def GetReadChanges(self, address, data, isRead, cached, checksumOk, dfcIndex):
+        '''
+        Compare a read with the previous read of the same (controller, opcode, DFC index).
+        Returns None when the decoded content did not change, otherwise the list of changed fields
+        (empty for writes, programming mode reads, invalid checksums and the first read of a register).
+        '''
+        if (not isRead) or (cached is None) or (checksumOk is False) or self.IsProgrammingModeRead(address, data, isRead):
+            return []
+        key = (address, data[0], dfcIndex)
+        previous = self.lastReads.get(key)
+        self.lastReads[key] = cached
+        if previous is None:
+            return []
+        if (previous is cached) or (previous.GetRecord() == cached.GetRecord()):
+            return None
+        return DiffRecords(previous.GetRecord(), cached.GetRecord())
+
+    def GetDFCState(self, dfcIndex, address = None):
+        return self.GetController(address).dfcState.GetState(dfcIndex)
+
+    def GetSlotState(self, slot, address = None):
+        return self.GetController(address).dfcState.GetSlotState(slot)
+
+    def RecordTransaction(self, i2c_frame, accessCount, cached, checksumOk, dfcIndex):
+        '''
+        Append a transaction to the transaction store, the bus metrics and the NumPy export, before UpdateContext so the
+        programming mode context still refers to the command that produced it.
+        '''
+        address = i2c_frame.address
+        data = i2c_frame.data
+        isRead = i2c_frame.read
+        opcode = self.GetOpcode(address, data, isRead)
+        subCommand = NO_VALUE
+        if self.IsProgrammingModeRead(address, data, isRead):
+            subCommand = self.controllers[address].lastSubCommand
+        elif (self.controllers[address] is not None) and (ubm.PROGRAM_MODE_DATA_TRANSFER == opcode) and (i2c_frame.writeLength > 1):
+            subCommand = data[1]
+        status = NO_VALUE
+        if isRead and (cached is not None) and (self.controllers[address] is not None):
+            # Status bytes are taken from the payload, so recording a transaction does not decode it
+            if ubm.PROGRAM_MODE_DATA_TRANSFER == opcode:
+                if len(data) > i2c_frame.writeLength:
+                    status = data[i2c_frame.writeLength]
+            elif (ubm.GET_LAST_COMMAND_STATUS == opcode) and (len(data) > 2):
+                status = data[2]
+        if dfcIndex is None:
+            dfcIndex = NO_VALUE
+        if self.transactions is not None:
+            self.transactions.Append(i2c_frame.start_time, i2c_frame.end_time, address, opcode, subCommand,
+                                     dfcIndex, isRead, status, accessCount, len(data))
+        self.busMetrics.Add(METRICS_FRU_KEY if FRU_ADDRESS == address else opcode, i2c_frame.start_time, i2c_frame.end_time, len(data))
+
+        if self.exporter is not None:
+            descriptor = NO_DESCRIPTOR
+            if NO_VALUE != dfcIndex:
+                descriptor = tuple(data[2:2 + DESCRIPTOR_BYTES] if isRead else data[1:1 + DESCRIPTOR_BYTES])
+                descriptor += NO_DESCRIPTOR[len(descriptor):]
+            self.exporter.Append(i2c_frame.start_time, i2c_frame.end_time, address, opcode, subCommand, isRead,
+                                 len(data), accessCount, checksumOk, dfcIndex, descriptor)
+
+    def GetTransactionStore(self):
+        return self.transactions
+
+    def GetBusMetrics(self):
+        return self.busMetrics
+
+    def RenderBusMetrics(self):
+        return RenderBusMetrics(self.busMetrics, ubm.GetCommandString)
+
+    def TrackFirmwareUpdate(self, address, data, isRead, cached, startTime, endTime):
+        '''
+        Feed programming mode transactions to the firmware update tracker.
+        Returns the annotation frames to emit with the transaction: the latency of an erase, program or verify
+        operation completed by a status read, and the session summary on Exit Programming Mode (after comparing
+        the session with the reference image, if set).
+        '''
+        controller = self.controllers[address]
+        if controller is None:
+            return []
+        if self.IsProgrammingModeRead(address, data, isRead):
+            record = cached.GetRecord() if cached is not None else None
+            latency = controller.firmwareUpdates.SubCommandRead(controller.lastSubCommand, record, endTime)
+            if latency is None:
+                return []
+            frameData = {
+                "phase": latency.phase,
+                "latency_ms": latency.latency * 1000.0,
+                "busy_polls": latency.busyPolls,
+                "status": fwupdate.GetProgrammableModeStatusString(latency.status)
+            }
+            if latency.sectorNumber is not None:
+                frameData["sector"] = latency.sectorNumber
+            return [AnalyzerFrame("Firmware Update Latency", latency.startTime, latency.endTime, frameData)]
+        if isRead:
+            return []
+
+        cmd = data[0]
+        if ubm.ENTER_PROGRAMMING_MODE == cmd:
+            controller.firmwareUpdates.EnterProgrammingMode(startTime)
+        elif (ubm.PROGRAM_MODE_DATA_TRANSFER == cmd) and (cached is not None) and (cached.GetRecord() is not None):
+            controller.firmwareUpdates.SubCommandWrite(data[1], cached.GetRecord(), data, startTime)
+        elif ubm.EXIT_PROGRAMING_MODE == cmd:
+            session = controller.firmwareUpdates.ExitProgrammingMode(endTime)
+            if session is None:
+                return []
+            if self.referenceImageError is not None:
+                session.comparison = UnavailableImageComparison(self.referenceImageError)
+            elif self.referenceImage:
+                session.CompareWithImage(self.referenceImage)
+            if VERBOSITY_OFF != self.verbosity:
+                self.output.Write(RenderFirmwareUpdateSession(session) + [""])
+            return [AnalyzerFrame("Firmware Update Summary", session.startTime, session.endTime, self.GetSessionFields(session))]
+        return []
+
+    def GetSessionFields(self, session):
+        programRate, effectiveRate = session.GetProgramThroughput()
+        frameData = {
+            "duration_ms": session.GetDuration() * 1000.0,
+            "program_bytes_per_sec": programRate,
+            "effective_bytes_per_sec": effectiveRate
+        }
+        for totals in session.GetPhaseTotals():
+            name = totals.phase.lower().replace(" ", "_")
+            frameData[name + "_ms"] = totals.totalTime * 1000.0
+            frameData[name + "_busy_polls"] = totals.busyPolls
+        if session.comparison is not None:
+            imageMatch = IsImageMatch(session.comparison)
+            if imageMatch is not None:
+                frameData["image_match"] = imageMatch
+            else:
+                frameData["image_unavailable"] = session.comparison.unavailable
+        return frameData
+
+    def GetFirmwareUpdateSessions(self):
+        sessions = []
+        for ubmAddress in self.ubmAddresses:
+            sessions.extend(self.controllers[ubmAddress].firmwareUpdates.sessions)
+        return sorted(sessions, key = lambda session: session.startTime)
+
+    def UpdateContext(self, address, data, isRead):
+        controller = self.controllers[address]
+        if (controller is None) or self.IsProgrammingModeRead(address, data, isRead):
+            return
+        cmd = data[0]
+        if ubm.GET_DFC_INDEX == cmd:
+            controller.dfcIndex = data[2] if isRead else data[1]
+        elif ubm.GET_FEATURES == cmd:
+            controller.readChecksumCreation = (data[2] if isRead else data[1]) & 1
+        controller.lastCommand = cmd
+        if ubm.PROGRAM_MODE_DATA_TRANSFER == cmd:
+            controller.lastSubCommand = data[1]
+
+    def AdvanceContext(self, i2c_frame):
+        '''
+        Apply a transaction to the cross-transaction context only: access counts, the command context, whether the
+        controller is in programming mode and, from UBM FRU reads, the DFC slot mapping and discovered controllers.
+        Much cheaper than DecodeTransaction, it is used to compute the starting context of chunks decoded in parallel.
+        '''
+        address = i2c_frame.address
+        data = i2c_frame.data
+        isRead = i2c_frame.read
+        if i2c_frame.length <= 3:
+            return
+        if self.IsCommandResponse(i2c_frame):
+            # The response read leaves the context as the write phase set it
+            data = i2c_frame.GetWriteData()
+            isRead = False
+        self.GetUBMOperationAccessCount(address, data, isRead)
+        if FRU_ADDRESS == address:
+            cached = self.DecodeParsedData(self.GetCommandEntry(address, data, isRead), data)
+            self.TrackDFCState(address, data, isRead, cached, i2c_frame.end_time)
+
+        controller = self.controllers[address]
+        if controller is not None:
+            if self.IsProgrammingModeRead(address, data, isRead):
+                controller.programmingMode = True
+            elif not isRead:
+                if data[0] in (ubm.ENTER_PROGRAMMING_MODE, ubm.PROGRAM_MODE_DATA_TRANSFER):
+                    controller.programmingMode = True
+                elif ubm.EXIT_PROGRAMING_MODE == data[0]:
+                    controller.programmingMode = False
+        self.UpdateContext(address, data, isRead)
+
+    def GetContext(self):
+        '''
+        Return a copy of the cross-transaction context as a DecodeContext.
+        '''
+        controllers = {ubmAddress: self.controllers[ubmAddress] for ubmAddress in self.ubmAddresses}
+        return DecodeContext(copy.deepcopy(controllers), self.fruAccessCounts.fru)
+
+    def SetContext(self, context):
+        '''
+        Continue decoding from a DecodeContext returned by GetContext, adding the controllers it contains.
+        '''
+        for ubmAddress, controller in context.controllers.items():
+            self.AddController(ubmAddress)
+            self.controllers[ubmAddress] = controller
+        self.fruAccessCounts.fru = context.fruAccesses
 
-    
     def decode(self, frame: AnalyzerFrame):
         '''
         Process a frame from the input analyzer, and optionally return a single `AnalyzerFrame` or a list of `AnalyzerFrame`s.
@@ -266,19 +875,105 @@ class Hla(HighLevelAnalyzer):
         '''
 
         if i2c_frame := self.I2CFrameStateMachine(frame):
-            if len(i2c_frame.data) > 3:
-                self.PrintParsedData(i2c_frame.address, i2c_frame.data, i2c_frame.read)
-                operation = self.GetUBMOperation(i2c_frame.address, i2c_frame.data, i2c_frame.read)
-                accessCount = str(self.GetUBMOperationAccessCount(i2c_frame.address, i2c_frame.data, i2c_frame.read))
-                self.lastCommand = i2c_frame.data[0]
-                if ubm.PROGRAM_MODE_DATA_TRANSFER == self.lastCommand:
-                    self.lastSubCommand = i2c_frame.data[1]
-                return AnalyzerFrame(
-                    "UBM Transaction",
-                    i2c_frame.start_time,
-                    i2c_frame.end_time,
-                    {
-                        "Operation": operation,
-                        "Operation Access Count: ": accessCount
-                    }
-                    )
+            return self.DecodeTransaction(i2c_frame)
+
+    def DecodeTransaction(self, i2c_frame):
+        '''
+        Decode a complete I2C transaction (a SaleaeFrame) and return its `AnalyzerFrame` or list of `AnalyzerFrame`s.
+        '''
+        if i2c_frame.length > 3:
+            if (self.commandFilter is not None) and not self.IsCommandSelected(i2c_frame.address, i2c_frame.data, i2c_frame.read,
+                                                                               i2c_frame.writeLength):
+                self.SkipTransaction(i2c_frame)
+                return None
+            if self.IsCommandResponse(i2c_frame):
+                return self.DecodeCommandResponse(i2c_frame)
+            entry = self.GetCommandEntry(i2c_frame.address, i2c_frame.data, i2c_frame.read)
+            accessCount = self.GetUBMOperationAccessCount(i2c_frame.address, i2c_frame.data, i2c_frame.read)
+            cached = self.DecodeParsedData(entry, i2c_frame.data)
+            checksumOk = self.VerifyChecksum(i2c_frame.address, i2c_frame.data, i2c_frame.read, cached)
+            dfcIndex = self.TrackDFCState(i2c_frame.address, i2c_frame.data, i2c_frame.read, cached, i2c_frame.end_time)
+            self.RecordTransaction(i2c_frame, accessCount, cached, checksumOk, dfcIndex)
+            changes = None
+            if self.changesOnly:
+                changes = self.GetReadChanges(i2c_frame.address, i2c_frame.data, i2c_frame.read, cached, checksumOk, dfcIndex)
+                if changes is None:
+                    # Unchanged re-read: counted above, but no frame and no terminal output
+                    self.UpdateContext(i2c_frame.address, i2c_frame.data, i2c_frame.read)
+                    return None
+            if VERBOSITY_FULL == self.verbosity:
+                self.output.Write(self.RenderParsedData(i2c_frame.address, entry, cached, accessCount, checksumOk, dfcIndex, changes))
+            elif VERBOSITY_SUMMARY == self.verbosity:
+                self.output.Write(self.RenderSummary(i2c_frame.address, entry, accessCount, checksumOk, dfcIndex, changes))
+            annotations = self.TrackFirmwareUpdate(i2c_frame.address, i2c_frame.data, i2c_frame.read, cached,
+                                                   i2c_frame.start_time, i2c_frame.end_time)
+            operation = self.GetUBMOperation(entry)
+            self.UpdateContext(i2c_frame.address, i2c_frame.data, i2c_frame.read)
+            frameData = {
+                "Operation": operation,
+                "Operation Access Count: ": str(accessCount),
+                "address": hex(i2c_frame.address)
+            }
+            if cached is not None:
+                frameData.update(cached.GetFields())
+            if checksumOk is not None:
+                frameData["checksum_ok"] = checksumOk
+            if dfcIndex is not None:
+                frameData["dfcIndex"] = dfcIndex
+                slot = self.controllers[i2c_frame.address].dfcState.GetSlot(dfcIndex)
+                if slot is not None:
+                    frameData["slot"] = slot
+            if changes:
+                frameData["changed"] = ", ".join([change.name for change in changes])
+            transactionFrame = AnalyzerFrame(
+                "UBM Transaction",
+                i2c_frame.start_time,
+                i2c_frame.end_time,
+                frameData
+                )
+            if annotations:
+                return [transactionFrame] + annotations
+            return transactionFrame
+
+    def DecodeCommandResponse(self, i2c_frame):
+        '''
+        Decode a Program Mode Data Transfer write and its sub-command response, read after a repeated start, as one
+        transaction. The write phase selects the sub-command the read phase is decoded with.
+        '''
+        address = i2c_frame.address
+        command = i2c_frame.GetWriteData()
+        response = i2c_frame.GetReadData()
+        commandEntry = self.GetCommandEntry(address, command, False)
+        accessCount = self.GetUBMOperationAccessCount(address, command, False)
+        commandCached = self.DecodeParsedData(commandEntry, command)
+        annotations = self.TrackFirmwareUpdate(address, command, False, commandCached, i2c_frame.start_time, i2c_frame.end_time)
+        self.UpdateContext(address, command, False)
+
+        entry = PROGRAM_READ_ENTRIES[command[1]]
+        responseCount = self.GetUBMOperationAccessCount(address, response, True)
+        cached = self.DecodeParsedData(entry, response)
+        checksumOk = self.VerifyChecksum(address, response, True, cached)
+        self.RecordTransaction(i2c_frame, accessCount, cached, checksumOk, None)
+        if VERBOSITY_FULL == self.verbosity:
+            self.output.Write(self.RenderParsedData(address, commandEntry, commandCached, accessCount, None, None, None) +
+                              self.RenderParsedData(address, entry, cached, responseCount, checksumOk, None, None))
+        elif VERBOSITY_SUMMARY == self.verbosity:
+            self.output.Write(self.RenderSummary(address, commandEntry, accessCount, None, None, None) +
+                              self.RenderSummary(address, entry, responseCount, checksumOk, None, None))
+        annotations += self.TrackFirmwareUpdate(address, response, True, cached, i2c_frame.start_time, i2c_frame.end_time)
+
+        frameData = {
+            "Operation": FormatLine(self.GetUBMOperation(commandEntry), "/", self.GetUBMOperation(entry)),
+            "Operation Access Count: ": str(accessCount),
+            "address": hex(address)
+        }
+        if commandCached is not None:
+            frameData.update(commandCached.GetFields())
+        if cached is not None:
+            frameData.update(cached.GetFields())
+        if checksumOk is not None:
+            frameData["checksum_ok"] = checksumOk
+        transactionFrame = AnalyzerFrame("UBM Transaction", i2c_frame.start_time, i2c_frame.end_time, frameData)
+        if annotations:
+            return [transactionFrame] + annotations
+        return transactionFrame
@@ -0,0 +1,92 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Minimal stand-in for the saleae.analyzers and saleae.data modules.
+# The saleae package only exists inside Logic 2, so headless tools (replay, batch decode, benchmarks)
+# install this before importing HighLevelAnalyzer. GraphTime is modelled as a float number of seconds.
+import sys
+import types
+
+class HighLevelAnalyzer:
+    pass
+
+class AnalyzerFrame:
+    __slots__ = ('type', 'start_time', 'end_time', 'data')
+
+    def __init__(self, type, start_time, end_time, data = None):
+        self.type = type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.data = data if data is not None else {}
+
+    def __repr__(self):
+        return "AnalyzerFrame({0!r}, {1}, {2}, {3!r})".format(self.type, self.start_time, self.end_time, self.data)
+
+class Setting:
+    default = None
+
+    def __init__(self, label = '', **kwargs):
+        self.label = label
+        self.__dict__.update(kwargs)
+
+class StringSetting(Setting):
+    default = ''
+
+class NumberSetting(Setting):
+    def __init__(self, label = '', min_value = 0, max_value = None, **kwargs):
+        super().__init__(label, min_value = min_value, max_value = max_value, **kwargs)
+        self.default = min_value
+
+class ChoicesSetting(Setting):
+    def __init__(self, choices, label = '', **kwargs):
+        super().__init__(label, choices = tuple(choices), **kwargs)
+        self.default = self.choices[0]
+
+GraphTime = float
+GraphTimeDelta = float
+
+def Install():
+    '''
+    Register the stand-in modules unless the real saleae package can be imported.
+
+    Returns True if the stand-in was installed.
+    '''
+    try:
+        import saleae.analyzers
+        import saleae.data
+        return False
+    except ImportError:
+        pass
+
+    saleaeModule = types.ModuleType("saleae")
+    analyzersModule = types.ModuleType("saleae.analyzers")
+    dataModule = types.ModuleType("saleae.data")
+
+    analyzersModule.HighLevelAnalyzer = HighLevelAnalyzer
+    analyzersModule.AnalyzerFrame = AnalyzerFrame
+    analyzersModule.StringSetting = StringSetting
+    analyzersModule.NumberSetting = NumberSetting
+    analyzersModule.ChoicesSetting = ChoicesSetting
+    dataModule.GraphTime = GraphTime
+    dataModule.GraphTimeDelta = GraphTimeDelta
+
+    saleaeModule.analyzers = analyzersModule
+    saleaeModule.data = dataModule
+    sys.modules["saleae"] = saleaeModule
+    sys.modules["saleae.analyzers"] = analyzersModule
+    sys.modules["saleae.data"] = dataModule
+    return True
+
+def GetSettingDefault(setting):
+    return getattr(setting, "default", None)
@@ -0,0 +1,176 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Batch decoding of a directory of exported captures in a process pool, with one merged report.
+# Every worker decodes whole files with its own Hla and returns a compact CaptureSummary.
+#
+# Usage: python lib_ubm_batch.py captures/ --address auto
+import argparse
+import fnmatch
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import lib_ubm_replay as replay
+import lib_ubm_commands as ubm
+import lib_ubm_fwupdate as fwupdate
+from lib_ubm_counters import NonZeroCounts
+from lib_ubm_fwsession import IsImageMatch
+
+DEFAULT_PATTERNS = ("*.csv", "*.ubmf")
+UNKNOWN_OPERATION = "Unknown operation"
+
+FirmwareUpdateResult = namedtuple("FirmwareUpdateResult", ["startTime", "duration", "imageVerified", "imageMatch", "failures"])
+CaptureSummary = namedtuple("CaptureSummary", ["path", "frames", "transactions", "seconds", "accessCounts", "fruAccesses",
+                                               "checksumsChecked", "checksumErrors", "firmwareUpdates", "anomalies", "error"])
+
+def FindCaptures(directory, patterns = DEFAULT_PATTERNS):
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            paths.append(path)
+    return paths
+
+def GetFirmwareUpdateResult(session):
+    imageMatch = IsImageMatch(session.comparison) if session.comparison is not None else None
+    failures = tuple("{0} - {1}".format(fwupdate.GetSubCommandString(failure.subCommand), fwupdate.GetProgrammableModeStatusString(failure.status))
+                     for failure in session.failures)
+    return FirmwareUpdateResult(float(session.startTime), session.GetDuration(), bool(session.imageVerified), imageMatch, failures)
+
+def SummarizeCapture(path, settings):
+    '''
+    Decode one capture and return its CaptureSummary. Runs in a worker process.
+    The transaction store is turned off, so memory does not grow with the capture size.
+    '''
+    startTime = time.perf_counter()
+    try:
+        analyzer = replay.CreateAnalyzer(**dict(settings, verbosity = "Off", transactionStore = "Off"))
+        transactions = 0
+        unknownOperations = 0
+        stats = replay.ReplayStats()
+        for frame in replay.Replay(replay.CountFrames(replay.ReadCapture(path), stats), analyzer):
+            if "UBM Transaction" != frame.type:
+                continue
+            transactions += 1
+            if UNKNOWN_OPERATION == frame.data.get("Operation"):
+                unknownOperations += 1
+        analyzer.CloseOutput()
+        frames = stats.frames
+    except Exception as error:
+        return CaptureSummary(path, 0, 0, time.perf_counter() - startTime, {}, 0, 0, 0, (), ("Decode failed: {0}".format(error),),
+                              "{0}: {1}".format(type(error).__name__, error))
+
+    accessCounts = {}
+    for ubmAddress in analyzer.ubmAddresses:
+        counts = NonZeroCounts(analyzer.GetAccessCounts(ubmAddress).commands)
+        if counts:
+            accessCounts[ubmAddress] = counts
+    firmwareUpdates = tuple(GetFirmwareUpdateResult(session) for session in analyzer.GetFirmwareUpdateSessions())
+
+    anomalies = []
+    if analyzer.GetChecksumErrors():
+        anomalies.append("{0} checksum errors".format(analyzer.GetChecksumErrors()))
+    if unknownOperations:
+        anomalies.append("{0} unknown operations".format(unknownOperations))
+    for result in firmwareUpdates:
+        for failure in result.failures:
+            anomalies.append("Firmware update at {0}: {1}".format(result.startTime, failure))
+        if result.imageMatch is False:
+            anomalies.append("Firmware update at {0}: Image Mismatch".format(result.startTime))
+
+    return CaptureSummary(path, frames, transactions, time.perf_counter() - startTime, accessCounts,
+                          analyzer.GetAccessCounts().fru, analyzer.checksumsChecked, analyzer.GetChecksumErrors(),
+                          firmwareUpdates, tuple(anomalies), None)
+
+def RunBatch(paths, settings, jobs = None):
+    '''
+    Decode the captures in a process pool (one worker per core by default) and return their summaries in path order.
+    '''
+    if jobs == 1:
+        return [SummarizeCapture(path, settings) for path in paths]
+    with ProcessPoolExecutor(max_workers = jobs) as executor:
+        return list(executor.map(SummarizeCapture, paths, [settings] * len(paths), chunksize = 1))
+
+def MergeSummaries(summaries):
+    '''
+    Merge capture summaries into one report dict.
+    '''
+    accessCounts = {}
+    for summary in summaries:
+        for ubmAddress, counts in summary.accessCounts.items():
+            merged = accessCounts.setdefault(ubmAddress, {})
+            for cmd, count in counts.items():
+                merged[cmd] = merged.get(cmd, 0) + count
+
+    return {
+        "files": len(summaries),
+        "failedFiles": [summary.path for summary in summaries if summary.error is not None],
+        "frames": sum([summary.frames for summary in summaries]),
+        "transactions": sum([summary.transactions for summary in summaries]),
+        "decodeSeconds": sum([summary.seconds for summary in summaries]),
+        "accessCounts": accessCounts,
+        "fruAccesses": sum([summary.fruAccesses for summary in summaries]),
+        "checksumsChecked": sum([summary.checksumsChecked for summary in summaries]),
+        "checksumErrors": sum([summary.checksumErrors for summary in summaries]),
+        "firmwareUpdates": sum([len(summary.firmwareUpdates) for summary in summaries]),
+        "imageMismatches": sum([1 for summary in summaries for result in summary.firmwareUpdates if result.imageMatch is False]),
+        "anomalies": {summary.path: list(summary.anomalies) for summary in summaries if summary.anomalies},
+    }
+
+def RenderReport(report, wallSeconds):
+    lines = ["UBM Batch Report",
+             "Files: {0} ({1} failed)".format(report["files"], len(report["failedFiles"])),
+             "Frames: {0}, Transactions: {1}".format(report["frames"], report["transactions"]),
+             "Decode Time: {0:.3f} s in {1:.3f} s wall clock ({2:.0f} frames/sec)".format(
+                 report["decodeSeconds"], wallSeconds, report["frames"] / wallSeconds if wallSeconds else 0.0),
+             "Checksum Errors: {0} of {1} checked".format(report["checksumErrors"], report["checksumsChecked"]),
+             "Firmware Updates: {0} ({1} image mismatches)".format(report["firmwareUpdates"], report["imageMismatches"]),
+             "UBM FRU Access Count: {0}".format(report["fruAccesses"])]
+    for ubmAddress in sorted(report["accessCounts"]):
+        lines.append("UBM Controller {0}".format(hex(ubmAddress)))
+        for cmd, count in sorted(report["accessCounts"][ubmAddress].items()):
+            lines.append("  {0} ({1}) Access Count: {2}".format(ubm.GetCommandString(cmd), hex(cmd), count))
+    for path, anomalies in report["anomalies"].items():
+        lines.append(path)
+        for anomaly in anomalies:
+            lines.append("  " + anomaly)
+    return lines
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Decode a directory of exported I2C captures with the UBM High Level Analyzer.")
+    parser.add_argument("directory", help = "directory of Saleae I2C CSV exports and UBM binary frame files")
+    parser.add_argument("--address", default = "0x55", help = "7-bit UBM Controller Addresses in hex format: 0x55, 0x55,0x56, 0x50-0x56 and/or auto")
+    parser.add_argument("--pattern", action = "append", help = "file name pattern (default: *.csv and *.ubmf)")
+    parser.add_argument("--jobs", type = int, default = None, help = "worker processes (default: one per core)")
+    parser.add_argument("--reference-image", default = "", help = "firmware image to compare firmware update sessions against")
+    parser.add_argument("--json", metavar = "OUTPUT", help = "also write the merged report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = FindCaptures(args.directory, args.pattern or DEFAULT_PATTERNS)
+    settings = {"ubmAddress": args.address, "referenceImage": args.reference_image}
+    startTime = time.perf_counter()
+    summaries = RunBatch(paths, settings, args.jobs)
+    report = MergeSummaries(summaries)
+    print("\n".join(RenderReport(report, time.perf_counter() - startTime)))
+    if args.json:
+        with open(args.json, "w") as jsonFile:
+            json.dump(report, jsonFile, indent = 2)
+    return 1 if report["failedFiles"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Decode benchmarks of Hla.decode (with the saleae stand-in) on synthetic traffic from lib_ubm_synth, per traffic type:
+# frames/sec, latency per transaction and peak memory. Traffic is generated from a fixed seed before timing starts and
+# every run uses a fresh analyzer, so results are repeatable. Save a run with --json and compare later runs against it
+# with --baseline to catch performance regressions.
+#
+# Usage: python lib_ubm_bench.py --json baseline.json
+#        python lib_ubm_bench.py --baseline baseline.json --tolerance 0.15
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+from collections import namedtuple
+
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_output import BufferedTerminalSink
+
+MIXED_BENCHMARK = "mixed"
+BENCHMARKS = tuple(synth.TRAFFIC_TYPES) + (MIXED_BENCHMARK,)
+
+DEFAULT_TRANSACTIONS = 2000
+DEFAULT_MIXED_TRANSACTIONS = 20000
+DEFAULT_REPEAT = 5
+
+BenchmarkResult = namedtuple("BenchmarkResult", ["name", "transactions", "frames", "seconds", "framesPerSecond",
+                                                 "transactionsPerSecond", "latencyMedian", "latencyP95", "latencyP99",
+                                                 "latencyMax", "peakMemory"])
+
+def BuildTransactions(name, count, seed):
+    '''
+    Return the frames of at least count transactions of one traffic type (or the default mix), grouped per transaction.
+    '''
+    generator = synth.TrafficGenerator(seed = seed)
+    if MIXED_BENCHMARK == name:
+        return [frames for _, frames in synth.GenerateTransactions(generator, count)]
+    transactions = []
+    build = synth.TRAFFIC_TYPES[name]
+    while len(transactions) < count:
+        transactions.extend(build(generator))
+    return transactions
+
+def CreateBenchmarkAnalyzer(settings):
+    analyzer = replay.CreateAnalyzer(**settings)
+    if analyzer.output is not None:
+        # Rendering is measured, the terminal is not
+        analyzer.SetOutputSink(BufferedTerminalSink(open(os.devnull, "w"), dropWhenFull = False))
+    return analyzer
+
+def CloseBenchmarkAnalyzer(analyzer):
+    analyzer.CloseOutput()
+    if analyzer.output is not None:
+        analyzer.output.stream.close()
+
+def TimeDecode(frames, settings):
+    analyzer = CreateBenchmarkAnalyzer(settings)
+    decode = analyzer.decode
+    gc.disable()
+    try:
+        startTime = time.perf_counter()
+        for frame in frames:
+            decode(frame)
+        seconds = time.perf_counter() - startTime
+    finally:
+        gc.enable()
+    CloseBenchmarkAnalyzer(analyzer)
+    return seconds
+
+def MeasureLatencies(transactions, settings):
+    '''
+    Decode time of every transaction (all of its frames), in seconds.
+    '''
+    analyzer = CreateBenchmarkAnalyzer(settings)
+    decode = analyzer.decode
+    counter = time.perf_counter_ns
+    latencies = array('d')
+    gc.disable()
+    try:
+        for frames in transactions:
+            startTime = counter()
+            for frame in frames:
+                decode(frame)
+            latencies.append((counter() - startTime) * 1e-9)
+    finally:
+        gc.enable()
+    CloseBenchmarkAnalyzer(analyzer)
+    return sorted(latencies)
+
+def MeasurePeakMemory(frames, settings):
+    '''
+    Peak memory allocated while creating an analyzer and decoding the frames, in bytes.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        analyzer = CreateBenchmarkAnalyzer(settings)
+        decode = analyzer.decode
+        for frame in frames:
+            decode(frame)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    CloseBenchmarkAnalyzer(analyzer)
+    return peak
+
+def GetPercentile(sortedValues, percentile):
+    return sortedValues[min(int(len(sortedValues) * percentile), len(sortedValues) - 1)]
+
+def RunBenchmark(name, count, settings, repeat = DEFAULT_REPEAT, seed = 0):
+    '''
+    Benchmark one traffic type. Throughput is the best of repeat runs, after an untimed warm-up run.
+    '''
+    transactions = BuildTransactions(name, count, seed)
+    frames = [frame for transaction in transactions for frame in transaction]
+    TimeDecode(frames, settings)
+    seconds = min(TimeDecode(frames, settings) for _ in range(repeat))
+    latencies = MeasureLatencies(transactions, settings)
+    return BenchmarkResult(name, len(transactions), len(frames), seconds, len(frames) / seconds, len(transactions) / seconds,
+                           GetPercentile(latencies, 0.5), GetPercentile(latencies, 0.95), GetPercentile(latencies, 0.99),
+                           latencies[-1], MeasurePeakMemory(frames, settings))
+
+def RenderResults(results):
+    lines = ["{0:<22} {1:>8} {2:>12} {3:>10} {4:>9} {5:>9} {6:>9} {7:>10}".format(
+        "Benchmark", "Trans.", "Frames/sec", "Trans/sec", "p50 us", "p95 us", "p99 us", "Peak KiB")]
+    for result in results:
+        lines.append("{0:<22} {1:>8} {2:>12.0f} {3:>10.0f} {4:>9.1f} {5:>9.1f} {6:>9.1f} {7:>10.1f}".format(
+            result.name, result.transactions, result.framesPerSecond, result.transactionsPerSecond, result.latencyMedian * 1e6,
+            result.latencyP95 * 1e6, result.latencyP99 * 1e6, result.peakMemory / 1024.0))
+    return lines
+
+def CompareWithBaseline(results, baseline, tolerance):
+    '''
+    Return one line per regression: throughput below or peak memory above the baseline by more than tolerance.
+    '''
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        if result.framesPerSecond < previous["framesPerSecond"] * (1.0 - tolerance):
+            regressions.append("{0}: {1:.0f} frames/sec, baseline {2:.0f}".format(result.name, result.framesPerSecond,
+                                                                                  previous["framesPerSecond"]))
+        if result.peakMemory > previous["peakMemory"] * (1.0 + tolerance):
+            regressions.append("{0}: peak memory {1} bytes, baseline {2}".format(result.name, result.peakMemory, previous["peakMemory"]))
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark the UBM High Level Analyzer decode on synthetic traffic.")
+    parser.add_argument("benchmarks", nargs = "*", help = "benchmarks to run (default: all): {0}".format(", ".join(BENCHMARKS)))
+    parser.add_argument("--transactions", type = int, default = DEFAULT_TRANSACTIONS, help = "transactions per traffic type benchmark")
+    parser.add_argument("--mixed-transactions", type = int, default = DEFAULT_MIXED_TRANSACTIONS, help = "transactions of the mixed benchmark")
+    parser.add_argument("--repeat", type = int, default = DEFAULT_REPEAT, help = "timed runs per benchmark, the best one counts")
+    parser.add_argument("--seed", type = int, default = 0, help = "traffic random seed (default: 0)")
+    parser.add_argument("--verbosity", choices = ("Full", "Summary", "Off"), default = "Off", help = "analyzer terminal output level (default: Off)")
+    parser.add_argument("--transaction-store", choices = ("On", "Off"), default = "On", help = "analyzer transaction store setting")
+    parser.add_argument("--json", metavar = "OUTPUT", help = "write the results as JSON, for use as a baseline")
+    parser.add_argument("--baseline", help = "JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type = float, default = 0.1, help = "allowed regression against the baseline (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    names = args.benchmarks or BENCHMARKS
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark {0}".format(name))
+    settings = {"ubmAddress": "0x55", "verbosity": args.verbosity, "transactionStore": args.transaction_store}
+
+    results = []
+    for name in names:
+        count = args.mixed_transactions if MIXED_BENCHMARK == name else args.transactions
+        results.append(RunBenchmark(name, count, settings, args.repeat, args.seed))
+        print(RenderResults(results[-1:])[-1], file = sys.stderr)
+    print("\n".join(RenderResults(results)))
+
+    if args.json:
+        with open(args.json, "w") as jsonFile:
+            json.dump({"settings": settings, "seed": args.seed, "results": {result.name: result._asdict() for result in results}},
+                      jsonFile, indent = 2)
+    if args.baseline:
+        with open(args.baseline) as baselineFile:
+            regressions = CompareWithBaseline(results, json.load(baselineFile)["results"], args.tolerance)
+        for regression in regressions:
+            print("Regression: " + regression)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
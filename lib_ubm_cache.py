@@ -0,0 +1,96 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict, namedtuple
+from lib_ubm_render import RecordFields
+
+DEFAULT_CACHE_ENTRIES = 4096
+
+DecodeCacheStats = namedtuple("DecodeCacheStats", ["hits", "misses", "evictions", "entries"])
+
+class CachedDecode:
+    '''
+    Decoded record of one payload. The record is decoded on first use, followed by the rendered lines and frame
+    fields, so payloads nobody looks at are never decoded.
+    '''
+    __slots__ = ('decode', 'payload', 'record', 'lines', 'fields')
+
+    def __init__(self, decode, payload):
+        self.decode = decode
+        self.payload = payload
+        self.record = None
+        self.lines = None
+        self.fields = None
+
+    def GetRecord(self):
+        '''
+        Return the decoded record, or None if the payload is too short for it.
+        '''
+        if self.decode is not None:
+            decode = self.decode
+            self.decode = None
+            try:
+                self.record = decode(self.payload)
+            except IndexError:
+                # Transaction cut short by a stop condition: no fields to decode
+                pass
+        return self.record
+
+    def GetLines(self, render):
+        if self.lines is None:
+            record = self.GetRecord()
+            self.lines = render(record) if record is not None else []
+        return self.lines
+
+    def GetFields(self):
+        if self.fields is None:
+            self.fields = RecordFields(self.GetRecord())
+        return self.fields
+
+class DecodeCache:
+    '''
+    Bounded LRU cache of decoded payloads.
+
+    Keys must identify everything the decode depends on: the opcode, direction and programming
+    sub-command (Hla uses its command registry entry for this) plus the payload bytes.
+    '''
+    __slots__ = ('entries', 'maxEntries', 'hits', 'misses', 'evictions')
+
+    def __init__(self, maxEntries = DEFAULT_CACHE_ENTRIES):
+        self.entries = OrderedDict()
+        self.maxEntries = maxEntries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def Lookup(self, key):
+        cached = self.entries.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return cached
+
+    def Store(self, key, cached):
+        self.entries[key] = cached
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last = False)
+            self.evictions += 1
+
+    def Clear(self):
+        self.entries.clear()
+
+    def GetStats(self):
+        return DecodeCacheStats(self.hits, self.misses, self.evictions, len(self.entries))
@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import namedtuple
+from lib_ubm_render import FormatLine, PrintLines
+from lib_ubm_registers import Register, Field, ByteField
+
 GET_OPERATION_STATE = 0x00
 GET_LAST_COMMAND_STATUS = 0x01
 GET_SILICON_IDENTITY = 0x02
@@ -28,6 +32,25 @@ GET_CHANGE_COUNT = 0x35
 GET_DFC_INDEX = 0x36
 GET_DFC_STATUS_CONTROL = 0x40
 
+COMMAND_STRING_DICT = {GET_OPERATION_STATE: "Operational State",
+                       GET_LAST_COMMAND_STATUS: "Last Command Status",
+                       GET_SILICON_IDENTITY: "Silicon Identity",
+                       GET_UPDATE_CAPABILITIES: "Update Capabilities",
+                       ENTER_PROGRAMMING_MODE: "Enter Programming Mode",
+                       PROGRAM_MODE_DATA_TRANSFER: "Program Mode Data Transfer",
+                       EXIT_PROGRAMING_MODE: "Exit Programming Mode",
+                       GET_HFC_INFO: "HFC Info",
+                       GET_BACKPLANE_INFO: "Backplane Info",
+                       GET_STARTING_SLOT: "Starting Slot",
+                       GET_CAPABILITIES: "Capabilities",
+                       GET_FEATURES: "Features",
+                       GET_CHANGE_COUNT: "Change Count",
+                       GET_DFC_INDEX: "DFC Index",
+                       GET_DFC_STATUS_CONTROL: "DFC Status and Control",}
+
+def GetCommandString(cmd):
+    return COMMAND_STRING_DICT.get(cmd, "Unknown Command")
+
 OPERATIONAL_STATE_INVALID = 0
 OPERATIONAL_STATE_INITIALIZING = 1
 OPERATIONAL_STATE_BUSY = 2
@@ -61,36 +84,42 @@ DRIVE_INSTALL_TYPE_NVME = 5
 DRIVE_INSTALL_TYPE_RSVD1 = 6
 DRIVE_INSTALL_TYPE_BAY_EMPTY = 7
 
+READ_CHECKSUM_SEED = 0xA5
+
 def CalculateFRUChecksum(data, startByte, endByte):
-        checksumOut = 0
-        for x in range(startByte, endByte):
-            checksumOut += data[x]
-            checksumOut &= 0xFF
-        checksumOut = 255 - checksumOut + 1
-        return checksumOut
+        return 0xFF & -sum(data[startByte:endByte])
 
 def CalulateReadChecksum(data):
-        checksum = 0xFF & (sum(data) + 0xA5)
-        return 0xFF & ((255 - checksum) + 1)
+        return 0xFF & -(sum(data) + READ_CHECKSUM_SEED)
+
+def IsReadChecksumValid(response):
+    '''
+    Check the 0xA5 seeded checksum of a controller response. The checksum is the last byte of the
+    response, so the seeded sum of the whole response is zero when it is valid.
+    '''
+    return 0 == (0xFF & (sum(response) + READ_CHECKSUM_SEED))
+
+OPERATIONAL_STATE_STRING_DICT = {
+    OPERATIONAL_STATE_INVALID: "Invalid Operational State",
+    OPERATIONAL_STATE_INITIALIZING: "Operational State Initializing",
+    OPERATIONAL_STATE_BUSY: "Operational State Busy",
+    OPERATIONAL_STATE_READY: "Operational State Ready",
+    OPERATIONAL_STATE_REDUCED_FUNCTIONALITY: "Operational State Reduced Functionality",
+}
+OPERATIONAL_STATE_RESERVED_STRING = "Operational State Reserved"
 
 def GetOperationalStateString(state):
-    switcher = {
-        0: "Invalid Operational State",
-        1: "Operational State Initializing",
-        2: "Operational State Busy",
-        3: "Operational State Ready",
-        4: "Operational State Reduced Functionality",
-        }
-    return switcher.get(state, "Operational State Reserved")
+    return OPERATIONAL_STATE_STRING_DICT.get(state, OPERATIONAL_STATE_RESERVED_STRING)
+
+PROGRAMMING_UPDATE_MODE_STRING_DICT = {
+    0: "Programming Update is not supported",
+    1: "Programming Update supported while Devices remain online",
+    2: "Programming Update supported while Devices are offline",
+    3: "Programming Update support is Vendor Specific"
+}
 
 def GetProgrammingUpdateModeCapabilitiesString( byte):
-    switcher = {
-        0: "Programming Update is not supported",
-        1: "Programming Update supported while Devices remain online",
-        2: "Programming Update supported while Devices are offline",
-        3: "Programming Update support is Vendor Specific"
-    }
-    return switcher.get((byte & 3))
+    return PROGRAMMING_UPDATE_MODE_STRING_DICT.get((byte & 3))
 
 def GetChangeCountSourceString(source):
     stringOut = ""
@@ -117,119 +146,219 @@ LAST_COMMAND_STATUS_STRING_DICT = {0: "Failed",
                                 7: "Command Not Implemented",
                                 8: "Invalid Descriptor Index",}
 
+# Register layouts of the single byte responses (see lib_ubm_registers)
+OPERATION_STATE = Register("OperationState", __name__, [
+    [ByteField("state", "Operational State: ", OPERATIONAL_STATE_STRING_DICT, OPERATIONAL_STATE_RESERVED_STRING)]])
+PROGRAMMING_CAPABILITIES = Register("ProgrammingCapabilities", __name__, [
+    [Field("updateMode", 0, 2, "Update mode: ", PROGRAMMING_UPDATE_MODE_STRING_DICT)]])
+HFC_INFO = Register("HFCInfo", __name__, [
+    [Field("connectorId", 0, 4, "Host Facing Connector ID: "),
+     Field("segregated", 7, 1, labels = {0: "Port Type: Converged", 1: "Port Type: Segregated"})]])
+BACKPLANE_INFO = Register("BackplaneInfo", __name__, [
+    [Field("backplaneNumber", 0, 4, "Backplane Number :"),
+     Field("backplaneType", 5, 3, "Backplane Type :")]])
+
+OperationState = OPERATION_STATE.record
+LastCommandStatus = namedtuple("LastCommandStatus", ["status"])
+SiliconIdentity = namedtuple("SiliconIdentity", ["specVersionMajor", "specVersionMinor", "pcieVendorId", "deviceCode",
+                                                 "imageVersionMajor", "imageVersionMinor", "vendorSpecificByte12", "vendorSpecificByte13"])
+ProgrammingCapabilities = PROGRAMMING_CAPABILITIES.record
+HFCInfo = HFC_INFO.record
+BackplaneInfo = BACKPLANE_INFO.record
+StartingSlot = namedtuple("StartingSlot", ["startingSlot"])
+DFCIndex = namedtuple("DFCIndex", ["dfcIndex"])
+
+def DecodeOperationState(opState):
+    return OPERATION_STATE.DecodeByte(opState)
+
+def RenderOperationState(record):
+    return OPERATION_STATE.Render(record)
+
 def PrintOperationState(opState):
-    print("Operational State: ", GetOperationalStateString(opState))
+    PrintLines(RenderOperationState(DecodeOperationState(opState)))
+
+def DecodeLastCommandStatus(status):
+    return LastCommandStatus(status)
+
+def RenderLastCommandStatus(record):
+    if record.status in LAST_COMMAND_STATUS_STRING_DICT:
+        return [FormatLine("Last Command Status: ", LAST_COMMAND_STATUS_STRING_DICT[record.status])]
+    return ["Last Command Status: Unkown"]
 
 def PrintLastCommandStatus(status):
-    try:
-        print("Last Command Status: ", LAST_COMMAND_STATUS_STRING_DICT[status])
-    except:
-        print("Last Command Status: Unkown")
+    PrintLines(RenderLastCommandStatus(DecodeLastCommandStatus(status)))
+
+def DecodeSiliconIdentity(siliconIdentiy):
+    return SiliconIdentity(siliconIdentiy[0]>>4,
+                           siliconIdentiy[0]&0x0F,
+                           (siliconIdentiy[2]<<8) | siliconIdentiy[1],
+                           (siliconIdentiy[7]<<24) | (siliconIdentiy[6]<<16) | (siliconIdentiy[5]<<8) | siliconIdentiy[4],
+                           siliconIdentiy[11],
+                           siliconIdentiy[10],
+                           siliconIdentiy[12],
+                           siliconIdentiy[13])
+
+def RenderSiliconIdentity(record):
+    return ["Silicon Identity:",
+            "UBM Spec Version Version {:x}.{:x}".format(record.specVersionMajor, record.specVersionMinor),
+            FormatLine("PCIe Vendor ID: ", hex(record.pcieVendorId)),
+            FormatLine("UBM Controller Device Code: ", hex(record.deviceCode)),
+            "UBM Controller Image Version {0}.{1}".format(record.imageVersionMajor, record.imageVersionMinor),
+            FormatLine("Vendor Specific Byte 12: ", hex(record.vendorSpecificByte12)),
+            FormatLine("Vendor Specific Byte 12: ", hex(record.vendorSpecificByte13))]
 
 def PrintSiliconIdentity(siliconIdentiy):
-    print("Silicon Identity:")
-    printString = "UBM Spec Version Version "
-    printString += "{:x}.".format(siliconIdentiy[0]>>4)
-    printString += "{:x}".format(siliconIdentiy[0]&0x0F)
-    print(printString)
-    print("PCIe Vendor ID: ", hex(((siliconIdentiy[2]<<8) | siliconIdentiy[1])))
-    print("UBM Controller Device Code: ", hex(((siliconIdentiy[7]<<24) | (siliconIdentiy[6]<<16) | (siliconIdentiy[5]<<8) | siliconIdentiy[4])))
-    printString = "UBM Controller Image Version "
-    printString += "{0}.".format(siliconIdentiy[11])
-    printString += "{0}".format(siliconIdentiy[10])
-    print(printString)
-    print("Vendor Specific Byte 12: ", hex(siliconIdentiy[12]))
-    print("Vendor Specific Byte 12: ", hex(siliconIdentiy[13]))
+    PrintLines(RenderSiliconIdentity(DecodeSiliconIdentity(siliconIdentiy)))
+
+def DecodeProgrammingCapabilities(capabilities):
+    return PROGRAMMING_CAPABILITIES.DecodeByte(capabilities)
+
+def RenderProgrammingCapabilities(record):
+    return PROGRAMMING_CAPABILITIES.Render(record)
 
 def PrintProgrammingCapabilities(capabilities):
-    print("Update mode: ", GetProgrammingUpdateModeCapabilitiesString(capabilities))
+    PrintLines(RenderProgrammingCapabilities(DecodeProgrammingCapabilities(capabilities)))
+
+def DecodeHFCInfo(hfcInfo):
+    return HFC_INFO.DecodeByte(hfcInfo)
+
+def RenderHFCInfo(record):
+    return HFC_INFO.Render(record)
 
 def PrintHFCInfo( hfcInfo):
-    print("Host Facing Connector ID: ", hfcInfo & 0x0F)
-    if 1 == (hfcInfo>>7):
-        print("Port Type: Segregated")
-    else:
-        print("Port Type: Converged")
+    PrintLines(RenderHFCInfo(DecodeHFCInfo(hfcInfo)))
+
+def DecodeBackplaneInfo(bpInfo):
+    return BACKPLANE_INFO.DecodeByte(bpInfo)
+
+def RenderBackplaneInfo(record):
+    return BACKPLANE_INFO.Render(record)
 
 def PrintBackplaneInfo( bpInfo):
-    print("Backplane Number :", bpInfo&0x0F)
-    print("Backplane Type :", bpInfo>>5)
+    PrintLines(RenderBackplaneInfo(DecodeBackplaneInfo(bpInfo)))
+
+def DecodeStartingSlot(startingSlot):
+    return StartingSlot(startingSlot)
+
+def RenderStartingSlot(record):
+    return [FormatLine("Starting Slot Offset: ", record.startingSlot)]
 
 def PrintStartingSlot(startingSlot):
-    print("Starting Slot Offset: ", startingSlot)
+    PrintLines(RenderStartingSlot(DecodeStartingSlot(startingSlot)))
+
+def DecodeDFCIndex(dfcIndex):
+    return DFCIndex(dfcIndex)
+
+def RenderDFCIndexRead(record):
+    return [FormatLine("DFC Index Read:", record.dfcIndex)]
+
+def RenderDFCIndexWrite(record):
+    return [FormatLine("DFC Index Written:", record.dfcIndex)]
 
 TwoWireResetCapabilityString_Dict = {0: "2 Wire Reset is not supported",
                                     1: "2 Wire Slave Reset and 2Wire Mux is supported",
                                     2: "UBM FRU and UBM Controller is supported",
                                     3: "2Wire Slave Reset and UBM FRU and UBM Controller and 2Wire Mux are supported"}
 
+CAPABILITIES = Register("Capabilities", __name__, [
+    [ByteField("byte0", "Capabilities Byte 0: ", hex),
+     Field("clockRoutingPresent", 0, 1, "Clock Routing Present: "),
+     Field("slotPowerControl", 1, 1, "Slot Power Control: "),
+     Field("pcieResetControl", 2, 1, "PCIe Reset Control: "),
+     Field("dualPort", 3, 1, "Dual Port: "),
+     Field("twoWireResetSupport", 4, 2, "2-Wire Reset Support: ", TwoWireResetCapabilityString_Dict),
+     Field("changeDetectInterrupt", 6, 1, "Change Detect Interrupt Operation: "),
+     Field("dfcChangeCount", 7, 1, "DFC Change Count: ")],
+    [ByteField("byte1", "Capabilities Byte 1: ", hex),
+     Field("prsntReported", 0, 1, "PRSNT Reported: "),
+     Field("ifdet1Reported", 1, 1, "IFDET 1 Reported: "),
+     Field("ifdet2Reported", 2, 1, "IFDET 2 Reported: "),
+     Field("dfcPerstManagementOverride", 3, 1, "DFC PERST Management Override supported: "),
+     Field("dfcSmbusResetControl", 4, 1, "DFC SMBus Reset Control Supported: ")]])
+
+Capabilities = CAPABILITIES.record
+
+def DecodeCapabilities(capabilities):
+    return CAPABILITIES.Decode(capabilities)
+
+def RenderCapabilities(record):
+    return CAPABILITIES.Render(record)
+
 def PrintCapabilities(capabilities):
-    print("Capabilities Byte 0: ", hex(capabilities[0]))
-    print("Clock Routing Present: ", capabilities[0]&1)
-    print("Slot Power Control: ", (capabilities[0]>>1)&1)
-    print("PCIe Reset Control: ", (capabilities[0]>>2)&1)
-    print("Dual Port: ", (capabilities[0]>>3)&1)
-    print("2-Wire Reset Support: ", TwoWireResetCapabilityString_Dict[(capabilities[0]>>4)&3])
-    print("Change Detect Interrupt Operation: ", (capabilities[0]>>6)&1)
-    print("DFC Change Count: ", (capabilities[0]>>7)&1)
-
-    print("Capabilities Byte 1: ", hex(capabilities[1]))
-    print("PRSNT Reported: ", (capabilities[1]>>0)&1)
-    print("IFDET 1 Reported: ", (capabilities[1]>>1)&1)
-    print("IFDET 2 Reported: ", (capabilities[1]>>2)&1)
-    print("DFC PERST Management Override supported: ", (capabilities[1]>>3)&1)
-    print("DFC SMBus Reset Control Supported: ", (capabilities[1]>>4)&1)
+    PrintLines(RenderCapabilities(DecodeCapabilities(capabilities)))
 
 DFCPerstManagementOverride_Dict = { 0: "No Override",
                                     1: "DFC PERST Managed upon install",
                                     2: "DFC PERST Automatically released upon install",
                                     3: "Reserved"}
 
+def FeaturesLayouts(byte0Label, byte1Label):
+    return [[ByteField("byte0", byte0Label, hex),
+             Field("readChecksumCreation", 0, 1, "Read Checksum Creation: "),
+             Field("writeChecksumChecking", 1, 1, "Write Checksum Checking: "),
+             Field("cprsntLegacyMode", 2, 1, "CPRSNT Legacy Mode: "),
+             Field("pcieResetChangeCountMask", 3, 1, "PCIe Reset Change Count Mask: "),
+             Field("driveTypeInstallChangeCountMask", 4, 1, "Drive Type Install Change Count Mask: "),
+             Field("operationalStateChangeCountMask", 5, 1, "Operational State Change Count Mask: "),
+             Field("dfcPerstManagementOverride", 6, 2, "DFC PERST Management Override: ", DFCPerstManagementOverride_Dict)],
+            [ByteField("byte1", byte1Label, hex),
+             Field("dfcSmbusResetControl", 0, 1, "DFC SMBus Reset Control: ")]]
+
+# Reads and writes share the Features record, writes are only rendered with their own byte labels
+FEATURES = Register("Features", __name__, FeaturesLayouts("Features Byte 0: ", "Features Byte 1: "))
+FEATURES_WRITE = Register("FeaturesWrite", __name__, FeaturesLayouts("Features Write Byte 0: ", "Features Write Byte 1: "))
+
+Features = FEATURES.record
+ChangeCount = namedtuple("ChangeCount", ["changeCount", "changeSource"])
+ChangeCountWrite = namedtuple("ChangeCountWrite", ["changeCount"])
+
+def DecodeFeatures(features):
+    return FEATURES.Decode(features)
+
+def RenderFeatures(record):
+    return FEATURES.Render(record)
+
+def RenderFeaturesWrite(record):
+    return FEATURES_WRITE.Render(record)
+
 def PrintFeatures(features):
-    print("Features Byte 0: ", hex(features[0]))
-    print("Read Checksum Creation: ", features[0]&1)
-    print("Write Checksum Checking: ", (features[0]>>1)&1)
-    print("CPRSNT Legacy Mode: ", (features[0]>>2)&1)
-    print("PCIe Reset Change Count Mask: ", (features[0]>>3)&1)
-    print("Drive Type Install Change Count Mask: ", (features[0]>>4)&1)
-    print("Operational State Change Count Mask: ", (features[0]>>5)&1)
-    print("DFC PERST Management Override: ", DFCPerstManagementOverride_Dict[(features[0]>>6)&3])
-
-    print("Features Byte 1: ", hex(features[1]))
-    print("DFC SMBus Reset Control: ", (features[1]>>0)&1)
+    PrintLines(RenderFeatures(DecodeFeatures(features)))
 
 def PrintFeaturesWrite(features):
-    print("Features Write Byte 0: ", hex(features[0]))
-    print("Read Checksum Creation: ", features[0]&1)
-    print("Write Checksum Checking: ", (features[0]>>1)&1)
-    print("CPRSNT Legacy Mode: ", (features[0]>>2)&1)
-    print("PCIe Reset Change Count Mask: ", (features[0]>>3)&1)
-    print("Drive Type Install Change Count Mask: ", (features[0]>>4)&1)
-    print("Operational State Change Count Mask: ", (features[0]>>5)&1)
-    print("DFC PERST Management Override: ", DFCPerstManagementOverride_Dict[(features[0]>>6)&3])
-
-    print("Features Write Byte 1: ", hex(features[1]))
-    print("DFC SMBus Reset Control: ", (features[1]>>0)&1)
+    PrintLines(RenderFeaturesWrite(DecodeFeatures(features)))
+
+def DecodeChangeCount(changeCount):
+    return ChangeCount(changeCount[0], changeCount[1])
+
+def RenderChangeCount(record):
+    return [FormatLine("Change Count Reported:", record.changeCount),
+            FormatLine("Change Source:", GetChangeCountSourceString(record.changeSource))]
 
 def PrintChangeCount(changeCount):
-    print("Change Count Reported:", changeCount[0])
-    print("Change Source:", GetChangeCountSourceString(changeCount[1]))
+    PrintLines(RenderChangeCount(DecodeChangeCount(changeCount)))
+
+def DecodeChangeCountWrite(changeCount):
+    return ChangeCountWrite(changeCount[0])
+
+def RenderChangeCountWrite(record):
+    return [FormatLine("Change Count Written: ", record.changeCount)]
 
 def PrintChangeCountWrite(changeCount):
-    print("Change Count Written: ", changeCount[0])
+    PrintLines(RenderChangeCountWrite(DecodeChangeCountWrite(changeCount)))
+
+DRIVE_INSTALL_STRING_DICT = {
+    DRIVE_INSTALL_TYPE_RSVD0: "Reserved 0 Drive Installed",
+    DRIVE_INSTALL_TYPE_1001_PCIE: "1001 PCIe Drive Installed",
+    DRIVE_INSTALL_TYPE_RSVD1: "Reserved 1 Drive Installed",
+    DRIVE_INSTALL_TYPE_GEN_Z: "Gen Z Drive Installed",
+    DRIVE_INSTALL_TYPE_SAS_SATA: "SAS/ SATA Drive Installed",
+    DRIVE_INSTALL_TYPE_NVME: "NVMe Drive Installed",
+    DRIVE_INSTALL_TYPE_EDSFF: "EDSFF Drive Installed",
+    DRIVE_INSTALL_TYPE_BAY_EMPTY: "No Drive Installed",
+}
 
 def GetDriveInstallBitsString(bits):
-    switcher = {
-        DRIVE_INSTALL_TYPE_RSVD0: "Reserved 0 Drive Installed",
-        DRIVE_INSTALL_TYPE_1001_PCIE: "1001 PCIe Drive Installed",
-        DRIVE_INSTALL_TYPE_RSVD1: "Reserved 1 Drive Installed",
-        DRIVE_INSTALL_TYPE_GEN_Z: "Gen Z Drive Installed",
-        DRIVE_INSTALL_TYPE_SAS_SATA: "SAS/ SATA Drive Installed",
-        DRIVE_INSTALL_TYPE_NVME: "NVMe Drive Installed",
-        DRIVE_INSTALL_TYPE_EDSFF: "EDSFF Drive Installed",
-        DRIVE_INSTALL_TYPE_BAY_EMPTY: "No Drive Installed",
-        }
-    return switcher.get(bits)
+    return DRIVE_INSTALL_STRING_DICT.get(bits)
 
 STATUS_CODE_UNSUPPORTED = 0
 STATUS_CODE_OK = 1
@@ -241,117 +370,147 @@ STATUS_CODE_UNKNOWN = 6
 STATUS_CODE_NOT_AVAILABLE = 7
 STATUS_CODE_NO_ACCESS = 8
 
+DRIVE_STATUS_CODE_STRING_DICT = {
+    STATUS_CODE_UNSUPPORTED: "Unsupported",
+    STATUS_CODE_OK: "OK",
+    STATUS_CODE_CRITICAL: "Critical",
+    STATUS_CODE_NON_CRITICAL: "Non-Critical",
+    STATUS_CODE_UNRECOVERABLE: "Unrecoverable",
+    STATUS_CODE_NOT_INSTALLED: "Not Installed",
+    STATUS_CODE_UNKNOWN: "Unknown",
+    STATUS_CODE_NOT_AVAILABLE: "Not Available",
+    STATUS_CODE_NO_ACCESS: "No Access",
+}
+DRIVE_STATUS_CODE_RESERVED_STRING = "RSVD"
+
 def GetDriveStatusCodeString(bits):
-    switcher = {
-        STATUS_CODE_UNSUPPORTED: "Unsupported",
-        STATUS_CODE_OK: "OK",
-        STATUS_CODE_CRITICAL: "Critical",
-        STATUS_CODE_NON_CRITICAL: "Non-Critical",
-        STATUS_CODE_UNRECOVERABLE: "Unrecoverable",
-        STATUS_CODE_NOT_INSTALLED: "Not Installed",
-        STATUS_CODE_UNKNOWN: "Unknown",
-        STATUS_CODE_NOT_AVAILABLE: "Not Available",
-        STATUS_CODE_NO_ACCESS: "No Access",
-    }
-    return switcher.get(bits, "RSVD")
+    return DRIVE_STATUS_CODE_STRING_DICT.get(bits, DRIVE_STATUS_CODE_RESERVED_STRING)
+
+DRIVE_PWRDIS_STRING_DICT = {
+    0: "PWRDIS OFF",
+    16: "PWDRIS ON"}
 
 def GetDrivePWRDISString(dfcDescByte4):
-    switcher = {
-        0: "PWRDIS OFF",
-        16: "PWDRIS ON"}
-    return switcher.get(dfcDescByte4&0x10)
+    return DRIVE_PWRDIS_STRING_DICT.get(dfcDescByte4&0x10)
+
+DRIVE_PCIE_RESET_STRING_DICT = {
+    0: "PCIe Reset NOP",
+    1: "PCIe Reset Initiate",
+    2: "PCIe Reset Held Low",
+    3: "PCIe Reset Reserved"}
 
 def GetDrivePCIeResetString(dfcDescByte0):
-    switcher = {
-        0: "PCIe Reset NOP",
-        1: "PCIe Reset Initiate",
-        2: "PCIe Reset Held Low",
-        3: "PCIe Reset Reserved"}
-    return switcher.get(dfcDescByte0>>6)
+    return DRIVE_PCIE_RESET_STRING_DICT.get(dfcDescByte0>>6)
+
+DRIVE_PCIE_RESET_COMMAND_STRING_DICT = {
+    0: "PCIe Reset NOP",
+    1: "PCIe Reset Hold High",
+    2: "PCIe Reset Hold Low",
+    3: "PCIe Reset Reserved"}
 
 def GetDrivePCIeResetCommandString(dfcDescByte0):
-    switcher = {
-        0: "PCIe Reset NOP",
-        1: "PCIe Reset Hold High",
-        2: "PCIe Reset Hold Low",
-        3: "PCIe Reset Reserved"}
-    return switcher.get(dfcDescByte0>>6)
+    return DRIVE_PCIE_RESET_COMMAND_STRING_DICT.get(dfcDescByte0>>6)
+
+DFC_DESCRIPTOR = Register("DFCDescriptor", __name__, [
+    [ByteField("byte0", "Drive Descriptor Byte 0: ", hex),
+     Field("driveType", 0, 3, "Drive Type Installed: ", DRIVE_INSTALL_STRING_DICT),
+     Field("bifurcatePort", 5, 1, "Bifurcate Port: "),
+     Field("pcieReset", 6, 2, "PCIe Reset: ", DRIVE_PCIE_RESET_STRING_DICT)],
+    [ByteField("byte1", "Drive Descriptor Byte 1: ", hex),
+     Field("statusCode", 0, 4, "Status Code: ", DRIVE_STATUS_CODE_STRING_DICT, DRIVE_STATUS_CODE_RESERVED_STRING),
+     Field("swap", 4, 1, "Swap Bit: "),
+     Field("disable", 5, 1, "Disable Bit: "),
+     Field("predictFailure", 6, 1, "Predict Failure Bit: ")],
+    [ByteField("byte2", "Drive Descriptor Byte 2: ", hex),
+     Field("rrAbort", 0, 1, "R/R Abort Bit: "),
+     Field("rebuildRemap", 1, 1, "Rebuild/Remap  Bit: "),
+     Field("inFailedArray", 2, 1, "in Failed Array Bit: "),
+     Field("inCriticalArray", 3, 1, "in Critical Array Bit: "),
+     Field("consCheck", 4, 1, "Cons Check Bit: "),
+     Field("hotSpare", 5, 1, "Hot Spare Bit: "),
+     Field("rsvdDevice", 6, 1, "Rsvd Device Bit: "),
+     Field("ok", 7, 1, "OK Bit: ")],
+    [ByteField("byte3", "Drive Descriptor Byte 3: ", hex),
+     Field("report", 0, 1, "Report Bit: "),
+     Field("identify", 1, 1, "Identify Bit: "),
+     Field("remove", 2, 1, "Remove Bit: "),
+     Field("readyToInsert", 3, 1, "Ready to Insert Bit: "),
+     Field("enclosureBypassedA", 4, 1, "Enclosure Bypassed A Bit: "),
+     Field("enclosureBypassedB", 5, 1, "Enclosure Bypassed B Bit: "),
+     Field("doNotRemove", 6, 1, "Do Not Remove Bit: "),
+     Field("active", 7, 1, "Active Bit: ")],
+    [ByteField("byte4", "Drive Descriptor Byte 4: ", hex),
+     Field("deviceBypassedB", 0, 1, "Device Bypassed B: "),
+     Field("deviceBypassedA", 1, 1, "Device Bypassed A: "),
+     Field("bypassedB", 2, 1, "Bypassed B: "),
+     Field("bypassedA", 3, 1, "Bypassed A: "),
+     Field("deviceOff", 4, 1, "Device Off: "),
+     Field("faultRequested", 5, 1, "Fault Requested: "),
+     Field("faultSensed", 6, 1, "Fault Sensed: "),
+     Field("appClientBypassedB", 7, 1, "App Client Bypassed B: ")],
+    [ByteField("changeCount", "DFC Change Count: ")],
+    [ByteField("vendorSpecificByte6", "Vendor Specific Byte 6: ", hex)],
+    [ByteField("vendorSpecificByte7", "Vendor Specific Byte 7: ", hex)]])
+
+DFC_DESCRIPTOR_WRITE = Register("DFCDescriptorWrite", __name__, [
+    [ByteField("byte0", "Drive Descriptor Write Byte 0: ", hex),
+     Field("pcieReset", 6, 2, "PCIe Reset: ", DRIVE_PCIE_RESET_COMMAND_STRING_DICT)],
+    [ByteField("byte1", "Drive Descriptor Write Byte 1: ", hex),
+     Field("swap", 4, 1, "Swap Bit: "),
+     Field("disable", 5, 1, "Disable Bit: "),
+     Field("predictFailure", 6, 1, "Predict Failure Bit: "),
+     Field("select", 7, 1, "Select Bit: ")],
+    [ByteField("byte2", "Drive Descriptor Write Byte 2: ", hex),
+     Field("requestRRAbort", 0, 1, "Request R/R Abort Bit: "),
+     Field("requestRebuildRemap", 1, 1, "Request Rebuild/Remap  Bit: "),
+     Field("requestInFailedArray", 2, 1, "Request in Failed Array Bit: "),
+     Field("requestInCriticalArray", 3, 1, "Request in Critical Array Bit: "),
+     Field("requestConsCheck", 4, 1, "Request Cons Check Bit: "),
+     Field("requestHotSpare", 5, 1, "Request Hot Spare Bit: "),
+     Field("requestRsvdDevice", 6, 1, "Request Rsvd Device Bit: "),
+     Field("requestOk", 7, 1, "Request OK Bit: ")],
+    [ByteField("byte3", "Drive Descriptor Write Byte 3: ", hex),
+     Field("requestIdentify", 1, 1, "Request Identify Bit: "),
+     Field("requestRemove", 2, 1, "Request Remove Bit: "),
+     Field("requestInsert", 3, 1, "Request Insert Bit: "),
+     Field("doNotRemove", 6, 1, "Do Not Remove Bit: "),
+     Field("active", 7, 1, "Active Bit: ")],
+    [ByteField("byte4", "Drive Descriptor Write Byte 4: ", hex),
+     Field("enableBypassedB", 2, 1, "Enable Bypassed B: "),
+     Field("enableBypassedA", 3, 1, "Enable Bypassed A: "),
+     Field("deviceOff", 4, 1, "Device Off: "),
+     Field("requestFault", 5, 1, "Request Fault: ")]])
+
+DFCDescriptor = DFC_DESCRIPTOR.record
+DFCDescriptorWrite = DFC_DESCRIPTOR_WRITE.record
+
+def DecodeDFCDescriptor(descriptor):
+    return DFC_DESCRIPTOR.Decode(descriptor)
+
+def RenderDFCDescriptor(record):
+    return DFC_DESCRIPTOR.Render(record)
 
 def PrintDFCDescriptor( descriptor):
-    print("Drive Descriptor Byte 0: ", hex(descriptor[0]))
-    print("Drive Type Installed: ", GetDriveInstallBitsString(descriptor[0]&7))
-    print("Bifurcate Port: ", (descriptor[0]>>5)&1)
-    print("PCIe Reset: ", GetDrivePCIeResetString(descriptor[0]))
-
-    print("Drive Descriptor Byte 1: ", hex(descriptor[1]))
-    print("Status Code: ", GetDriveStatusCodeString(descriptor[1]&0x0F))
-    print("Swap Bit: ", (descriptor[1]>>4) & 1)
-    print("Disable Bit: ", (descriptor[1]>>5) & 1)
-    print("Predict Failure Bit: ", (descriptor[1]>>6) & 1)
-
-    print("Drive Descriptor Byte 2: ", hex(descriptor[2]))
-    print("R/R Abort Bit: ",        (descriptor[2]>>0) & 1)
-    print("Rebuild/Remap  Bit: ",   (descriptor[2]>>1) & 1)
-    print("in Failed Array Bit: ",  (descriptor[2]>>2) & 1)
-    print("in Critical Array Bit: ",(descriptor[2]>>3) & 1)
-    print("Cons Check Bit: ",       (descriptor[2]>>4) & 1)
-    print("Hot Spare Bit: ",        (descriptor[2]>>5) & 1)
-    print("Rsvd Device Bit: ",      (descriptor[2]>>6) & 1)
-    print("OK Bit: ",               (descriptor[2]>>7) & 1)
-
-    print("Drive Descriptor Byte 3: ", hex(descriptor[3]))
-    print("Report Bit: ",                   (descriptor[3]>>0) & 1)
-    print("Identify Bit: ",                 (descriptor[3]>>1) & 1)
-    print("Remove Bit: ",                   (descriptor[3]>>2) & 1)
-    print("Ready to Insert Bit: ",          (descriptor[3]>>3) & 1)
-    print("Enclosure Bypassed A Bit: ",     (descriptor[3]>>4) & 1)
-    print("Enclosure Bypassed B Bit: ",     (descriptor[3]>>5) & 1)
-    print("Do Not Remove Bit: ",            (descriptor[3]>>6) & 1)
-    print("Active Bit: ",                   (descriptor[3]>>7) & 1)
-
-    print("Drive Descriptor Byte 4: ", hex(descriptor[4]))
-    print("Device Bypassed B: ",        (descriptor[4]>>0) & 1)
-    print("Device Bypassed A: ",        (descriptor[4]>>1) & 1)
-    print("Bypassed B: ",               (descriptor[4]>>2) & 1)
-    print("Bypassed A: ",               (descriptor[4]>>3) & 1)
-    print("Device Off: ",               (descriptor[4]>>4) & 1)
-    print("Fault Requested: ",          (descriptor[4]>>5) & 1)
-    print("Fault Sensed: ",             (descriptor[4]>>6) & 1)
-    print("App Client Bypassed B: ",    (descriptor[4]>>7) & 1)
-
-    print("DFC Change Count: ", descriptor[5])
-    print("Vendor Specific Byte 6: ", hex(descriptor[6]))
-    print("Vendor Specific Byte 7: ", hex(descriptor[7]))
+    PrintLines(RenderDFCDescriptor(DecodeDFCDescriptor(descriptor)))
+
+def DecodeDFCDescriptors(descriptors):
+    '''
+    Batch decode of an N x 8 uint8 array of DFC descriptor reads (needs NumPy). Returns a DFCDescriptor whose
+    fields are arrays of length N.
+    '''
+    return DFC_DESCRIPTOR.DecodeColumns(descriptors)
+
+def DecodeDFCDescriptorWrite(descriptor):
+    return DFC_DESCRIPTOR_WRITE.Decode(descriptor)
+
+def RenderDFCDescriptorWrite(record):
+    return DFC_DESCRIPTOR_WRITE.Render(record)
 
 def PrintDFCDescriptorWrite(descriptor):
-    print("Drive Descriptor Write Byte 0: ", hex(descriptor[0]))
-    print("PCIe Reset: ", GetDrivePCIeResetCommandString(descriptor[0]))
-
-    print("Drive Descriptor Write Byte 1: ", hex(descriptor[1]))
-    print("Swap Bit: ", (descriptor[1]>>4) & 1)
-    print("Disable Bit: ", (descriptor[1]>>5) & 1)
-    print("Predict Failure Bit: ", (descriptor[1]>>6) & 1)
-    print("Select Bit: ", (descriptor[1]>>7) & 1)
-
-    print("Drive Descriptor Write Byte 2: ", hex(descriptor[2]))
-    print("Request R/R Abort Bit: ",        (descriptor[2]>>0) & 1)
-    print("Request Rebuild/Remap  Bit: ",   (descriptor[2]>>1) & 1)
-    print("Request in Failed Array Bit: ",  (descriptor[2]>>2) & 1)
-    print("Request in Critical Array Bit: ",(descriptor[2]>>3) & 1)
-    print("Request Cons Check Bit: ",       (descriptor[2]>>4) & 1)
-    print("Request Hot Spare Bit: ",        (descriptor[2]>>5) & 1)
-    print("Request Rsvd Device Bit: ",      (descriptor[2]>>6) & 1)
-    print("Request OK Bit: ",               (descriptor[2]>>7) & 1)
-
-    print("Drive Descriptor Write Byte 3: ", hex(descriptor[3]))
-    print("Request Identify Bit: ",                 (descriptor[3]>>1) & 1)
-    print("Request Remove Bit: ",                   (descriptor[3]>>2) & 1)
-    print("Request Insert Bit: ",          (descriptor[3]>>3) & 1)
-    print("Do Not Remove Bit: ",            (descriptor[3]>>6) & 1)
-    print("Active Bit: ",                   (descriptor[3]>>7) & 1)
-
-    print("Drive Descriptor Write Byte 4: ", hex(descriptor[4]))
-    print("Enable Bypassed B: ",               (descriptor[4]>>2) & 1)
-    print("Enable Bypassed A: ",               (descriptor[4]>>3) & 1)
-    print("Device Off: ",               (descriptor[4]>>4) & 1)
-    print("Request Fault: ",          (descriptor[4]>>5) & 1)
\ No newline at end of file
+    PrintLines(RenderDFCDescriptorWrite(DecodeDFCDescriptorWrite(descriptor)))
+
+def DecodeDFCDescriptorWrites(descriptors):
+    '''
+    Batch decode of an N x 5 (or wider) uint8 array of DFC descriptor writes (needs NumPy), see DecodeDFCDescriptors.
+    '''
+    return DFC_DESCRIPTOR_WRITE.DecodeColumns(descriptors)
@@ -0,0 +1,85 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import namedtuple
+from lib_ubm_counters import AccessCounters
+from lib_ubm_dfc import DFCStateTable
+from lib_ubm_fwsession import FirmwareUpdateTracker
+
+ADDRESS_TABLE_SIZE = 256
+MAX_CONTROLLER_ADDRESS = 0x7F
+FRU_ADDRESS = 0x57
+AUTO_DISCOVER_KEYWORD = "auto"
+
+# Cross-transaction decoding context at a point of a capture: the ControllerState of every controller by address
+# and the UBM FRU access count. See Hla.GetContext.
+DecodeContext = namedtuple("DecodeContext", ["controllers", "fruAccesses"])
+
+class ControllerState:
+    '''
+    Decoding context of one UBM controller: access counters, the command context needed to decode
+    programming mode reads and DFC descriptors, the DFC state table and the firmware update tracker.
+    programmingMode is only maintained by Hla.AdvanceContext.
+    '''
+    __slots__ = ('address', 'accessCounts', 'lastCommand', 'lastSubCommand', 'dfcIndex', 'readChecksumCreation',
+                 'programmingMode', 'dfcState', 'firmwareUpdates')
+
+    def __init__(self, address):
+        self.address = address
+        self.accessCounts = AccessCounters()
+        self.lastCommand = 0
+        self.lastSubCommand = 0
+        self.dfcIndex = 0
+        # Unknown (None) until a Features transaction or the UBM FRU UBM Overview shows the setting
+        self.readChecksumCreation = None
+        self.programmingMode = False
+        self.dfcState = DFCStateTable(address)
+        self.firmwareUpdates = FirmwareUpdateTracker()
+
+def IsControllerAddress(address):
+    '''
+    True for a 7-bit target address that is not the UBM FRU address.
+    '''
+    return (0 <= address <= MAX_CONTROLLER_ADDRESS) and (FRU_ADDRESS != address)
+
+def ParseAddress(text):
+    return int(text, 16)
+
+def ParseControllerAddresses(text):
+    '''
+    Parse the UBM controller address setting: hex addresses and ranges separated by commas or spaces
+    (e.g. "0x55", "0x55, 0x56" or "0x50-0x56"), optionally with "auto" to add the controllers listed in the
+    UBM FRU Port Route Info. An empty setting means auto.
+    Returns (sorted list of addresses, auto discover). Raises ValueError for an address above 0x7F or for the
+    UBM FRU address, including within a range.
+    '''
+    addresses = set()
+    autoDiscover = False
+    tokens = text.replace(",", " ").split()
+    if not tokens:
+        return [], True
+    for token in tokens:
+        if AUTO_DISCOVER_KEYWORD == token.lower():
+            autoDiscover = True
+        elif "-" in token:
+            first, last = token.split("-", 1)
+            addresses.update(range(ParseAddress(first), ParseAddress(last) + 1))
+        else:
+            addresses.add(ParseAddress(token))
+    for address in sorted(addresses):
+        if FRU_ADDRESS == address:
+            raise ValueError("Invalid UBM controller address {0}: it is the UBM FRU address".format(hex(address)))
+        if not IsControllerAddress(address):
+            raise ValueError("Invalid UBM controller address {0}: 7-bit addresses are 0x0-0x7f".format(hex(address)))
+    return sorted(addresses), autoDiscover
@@ -0,0 +1,63 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import namedtuple
+
+COUNTER_TABLE_SIZE = 256
+
+AccessCountSnapshot = namedtuple("AccessCountSnapshot", ["commands", "subCommands", "dfcIndexes", "fru"])
+
+class AccessCounters:
+    '''
+    Access counters indexed directly by opcode, programming sub-command and DFC index.
+
+    Every Count* method returns the count before the increment, which is the value reported
+    as the access count of the transaction being counted. Unknown opcodes are counted as well.
+    '''
+    __slots__ = ('commands', 'subCommands', 'dfcIndexes', 'fru')
+
+    def __init__(self):
+        self.commands = [0] * COUNTER_TABLE_SIZE
+        self.subCommands = [0] * COUNTER_TABLE_SIZE
+        self.dfcIndexes = [0] * COUNTER_TABLE_SIZE
+        self.fru = 0
+
+    def CountCommand(self, cmd):
+        count = self.commands[cmd]
+        self.commands[cmd] = count + 1
+        return count
+
+    def CountSubCommand(self, subCommand):
+        count = self.subCommands[subCommand]
+        self.subCommands[subCommand] = count + 1
+        return count
+
+    def CountDFCIndex(self, dfcIndex):
+        count = self.dfcIndexes[dfcIndex]
+        self.dfcIndexes[dfcIndex] = count + 1
+        return count
+
+    def CountFRU(self):
+        count = self.fru
+        self.fru = count + 1
+        return count
+
+    def Snapshot(self):
+        return AccessCountSnapshot(tuple(self.commands), tuple(self.subCommands), tuple(self.dfcIndexes), self.fru)
+
+def NonZeroCounts(counts):
+    '''
+    Return {index: count} for the non-zero entries of a counter table or snapshot field.
+    '''
+    return {index: count for index, count in enumerate(counts) if count}
@@ -0,0 +1,85 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import namedtuple
+
+DFC_INDEX_COUNT = 256
+
+DFCSlotState = namedtuple("DFCSlotState", ["dfcIndex", "slot", "descriptor", "readTime", "written", "writeTime"])
+
+def GetDescriptorRecord(cached):
+    return cached.GetRecord() if cached is not None else None
+
+class DFCStateTable:
+    '''
+    Latest DFC Status and Control descriptors of one UBM controller, indexed by DFC index. Descriptors are kept as
+    the lib_ubm_cache.CachedDecode of their payload and only decoded when a state is looked up.
+
+    The slot offset of each DFC index comes from the Port Route Info records of the UBM FRU
+    that name this controller. Lookups by DFC index or by slot are O(1).
+    '''
+    __slots__ = ('controllerAddress', 'descriptors', 'readTimes', 'written', 'writeTimes', 'slotOffsets', 'slotIndexes')
+
+    def __init__(self, controllerAddress):
+        self.controllerAddress = controllerAddress
+        self.descriptors = [None] * DFC_INDEX_COUNT
+        self.readTimes = [None] * DFC_INDEX_COUNT
+        self.written = [None] * DFC_INDEX_COUNT
+        self.writeTimes = [None] * DFC_INDEX_COUNT
+        self.slotOffsets = [None] * DFC_INDEX_COUNT
+        self.slotIndexes = {}
+
+    def UpdateDescriptor(self, dfcIndex, descriptor, time):
+        self.descriptors[dfcIndex] = descriptor
+        self.readTimes[dfcIndex] = time
+
+    def UpdateDescriptorWrite(self, dfcIndex, descriptor, time):
+        self.written[dfcIndex] = descriptor
+        self.writeTimes[dfcIndex] = time
+
+    def ApplyPortRouteInfo(self, portRouteInfo):
+        '''
+        Map DFC indexes to slot offsets from a decoded Port Route Info record (lib_ubm_fru.PortRouteInfo).
+        '''
+        for descriptor in portRouteInfo.descriptors:
+            if descriptor.ubmControllerAddress != self.controllerAddress:
+                continue
+            previousSlot = self.slotOffsets[descriptor.dfcIndex]
+            if previousSlot is not None:
+                self.slotIndexes.pop(previousSlot, None)
+            self.slotOffsets[descriptor.dfcIndex] = descriptor.slotOffset
+            self.slotIndexes[descriptor.slotOffset] = descriptor.dfcIndex
+
+    def GetSlot(self, dfcIndex):
+        return self.slotOffsets[dfcIndex]
+
+    def GetState(self, dfcIndex):
+        return DFCSlotState(dfcIndex, self.slotOffsets[dfcIndex], GetDescriptorRecord(self.descriptors[dfcIndex]),
+                            self.readTimes[dfcIndex], GetDescriptorRecord(self.written[dfcIndex]), self.writeTimes[dfcIndex])
+
+    def GetSlotState(self, slot):
+        '''
+        Current state of a physical slot, or None if no Port Route Info maps a DFC index to it.
+        '''
+        dfcIndex = self.slotIndexes.get(slot)
+        if dfcIndex is None:
+            return None
+        return self.GetState(dfcIndex)
+
+    def GetKnownStates(self):
+        return [self.GetState(dfcIndex) for dfcIndex in range(DFC_INDEX_COUNT)
+                if (self.descriptors[dfcIndex] is not None) or (self.written[dfcIndex] is not None)]
+
+def FormatSlot(slot):
+    return "Unknown Slot" if slot is None else "Slot {0}".format(slot)
@@ -0,0 +1,147 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Columnar export of decoded transactions to a NumPy .npy file of structured records.
+# NumPy is optional: the analyzer works without it, only the export needs it.
+import json
+import struct
+import lib_ubm_commands as ubm
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_ALIGNMENT = 64
+DEFAULT_CHUNK_ROWS = 65536
+METADATA_SUFFIX = ".json"
+
+# Checksum column values
+CHECKSUM_NONE = -1
+CHECKSUM_INVALID = 0
+CHECKSUM_OK = 1
+
+DESCRIPTOR_BYTES = 8
+NO_DESCRIPTOR = (0,) * DESCRIPTOR_BYTES
+
+TRANSACTION_FIELDS = [
+    ("startTime", "<f8"),
+    ("endTime", "<f8"),
+    ("address", "u1"),
+    ("opcode", "u1"),
+    ("subCommand", "<i2"),
+    ("isRead", "?"),
+    ("length", "<u4"),
+    ("accessCount", "<u4"),
+    ("checksum", "i1"),
+    ("dfcIndex", "<i2"),
+    ("descriptor", "u1", (DESCRIPTOR_BYTES,)),
+]
+
+def GetTransactionDtype():
+    if np is None:
+        raise ImportError("NumPy is required to export transactions")
+    return np.dtype(TRANSACTION_FIELDS)
+
+def GetChecksumValue(checksumOk):
+    if checksumOk is None:
+        return CHECKSUM_NONE
+    return CHECKSUM_OK if checksumOk else CHECKSUM_INVALID
+
+def FormatNpyHeader(dtype, rows):
+    return "{{'descr': {0!r}, 'fortran_order': False, 'shape': ({1},), }}".format(np.lib.format.dtype_to_descr(dtype), rows)
+
+def BuildNpyHeader(dtype, rows, headerSize):
+    header = FormatNpyHeader(dtype, rows)
+    padding = headerSize - len(NPY_MAGIC) - 2 - len(header) - 1
+    return NPY_MAGIC + struct.pack("<H", headerSize - len(NPY_MAGIC) - 2) + header.encode("latin1") + b" " * padding + b"\n"
+
+def GetNpyHeaderSize(dtype):
+    '''
+    Header size that fits any row count, so the header can be rewritten in place on close.
+    '''
+    size = len(NPY_MAGIC) + 2 + len(FormatNpyHeader(dtype, 1 << 63)) + 1
+    return (size + NPY_ALIGNMENT - 1) // NPY_ALIGNMENT * NPY_ALIGNMENT
+
+class NumpyTransactionExporter:
+    '''
+    Writes transactions to a .npy file in chunks of structured records.
+
+    The header is written with room for any row count and rewritten with the final count by Close(), so the
+    file can be reloaded with LoadTransactions (np.load(path, mmap_mode = 'r')) without reading it into memory.
+
+    startTime and endTime are seconds relative to the start of the first exported transaction, so GraphTime values
+    are only ever subtracted. The .npy header cannot hold other keys, so Close() writes that origin to a metadata
+    file next to the export (path + ".json", see LoadExportMetadata).
+    '''
+    def __init__(self, path, chunkRows = DEFAULT_CHUNK_ROWS):
+        self.dtype = GetTransactionDtype()
+        self.path = path
+        self.chunkRows = chunkRows
+        self.pending = []
+        self.rows = 0
+        self.origin = None
+        self.headerSize = GetNpyHeaderSize(self.dtype)
+        self.file = open(path, "wb")
+        self.file.write(BuildNpyHeader(self.dtype, 0, self.headerSize))
+
+    def Append(self, startTime, endTime, address, opcode, subCommand, isRead, length, accessCount, checksumOk, dfcIndex, descriptor = NO_DESCRIPTOR):
+        if self.origin is None:
+            self.origin = startTime
+        self.pending.append((float(startTime - self.origin), float(endTime - self.origin), address, opcode, subCommand, isRead, length,
+                             accessCount, GetChecksumValue(checksumOk), dfcIndex, descriptor))
+        if len(self.pending) >= self.chunkRows:
+            self.Flush()
+
+    def Flush(self):
+        if not self.pending:
+            return
+        self.file.write(np.array(self.pending, dtype = self.dtype).tobytes())
+        self.rows += len(self.pending)
+        self.pending = []
+
+    def Close(self):
+        if self.file.closed:
+            return
+        self.Flush()
+        self.file.seek(0)
+        self.file.write(BuildNpyHeader(self.dtype, self.rows, self.headerSize))
+        self.file.close()
+        with open(self.path + METADATA_SUFFIX, "w") as metadataFile:
+            json.dump({"origin": None if self.origin is None else str(self.origin), "timeUnit": "s", "rows": self.rows},
+                      metadataFile, indent = 2)
+
+def LoadExportMetadata(path):
+    '''
+    Return the metadata of an export: origin (the capture time the row times are relative to, as text), timeUnit
+    and rows.
+    '''
+    with open(path + METADATA_SUFFIX) as metadataFile:
+        return json.load(metadataFile)
+
+def LoadTransactions(path, mmap_mode = 'r'):
+    if np is None:
+        raise ImportError("NumPy is required to load exported transactions")
+    return np.load(path, mmap_mode = mmap_mode)
+
+def DecodeDFCDescriptorReads(transactions):
+    '''
+    Batch decode every complete DFC descriptor read of exported transactions (LoadTransactions). Returns the rows
+    of the reads and a lib_ubm_commands.DFCDescriptor of field arrays in row order, e.g. the drive state history
+    of one DFC index is the fields where transactions["dfcIndex"][rows] == index.
+    '''
+    rows = np.flatnonzero((transactions["dfcIndex"] >= 0) & transactions["isRead"] &
+                          (transactions["length"] >= 2 + DESCRIPTOR_BYTES))
+    return rows, ubm.DecodeDFCDescriptors(transactions["descriptor"][rows])
@@ -0,0 +1,81 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Command filter: selects the transactions Hla decodes. The setting is compiled into one bitmap per opcode,
+# programming sub-command and target address, each indexed directly by the byte value.
+from collections import namedtuple
+import lib_ubm_commands as ubm
+
+FILTER_TABLE_SIZE = 256
+SUB_COMMAND_PREFIX = "sub:"
+ADDRESS_PREFIX = "addr:"
+
+# Opcode groups by name
+COMMAND_GROUPS = {
+    "dfc": (ubm.GET_DFC_INDEX, ubm.GET_DFC_STATUS_CONTROL),
+    "firmware": (ubm.ENTER_PROGRAMMING_MODE, ubm.PROGRAM_MODE_DATA_TRANSFER, ubm.EXIT_PROGRAMING_MODE),
+}
+
+# Bitmaps of the selected opcodes, sub-commands and addresses. Opcodes only apply to UBM controller transactions and
+# sub-commands to Program Mode Data Transfer.
+CommandFilter = namedtuple("CommandFilter", ["opcodes", "subCommands", "addresses"])
+
+def ParseValues(text):
+    '''
+    Parse a hex value (0x40) or range (0x20-0x22).
+    '''
+    if "-" in text:
+        first, last = text.split("-", 1)
+        values = range(int(first, 16), int(last, 16) + 1)
+    else:
+        values = [int(text, 16)]
+    for value in values:
+        if not (0 <= value < FILTER_TABLE_SIZE):
+            raise ValueError("Invalid command filter value {0}".format(hex(value)))
+    return values
+
+def MakeBitmap(values):
+    if not values:
+        return bytearray([1]) * FILTER_TABLE_SIZE
+    bitmap = bytearray(FILTER_TABLE_SIZE)
+    for value in values:
+        bitmap[value] = 1
+    return bitmap
+
+def ParseCommandFilter(text):
+    '''
+    Parse the command filter setting: opcodes and opcode ranges in hex format, opcode groups (dfc, firmware),
+    sub:<sub-command> and addr:<target address>, separated by commas or spaces (e.g. "dfc", "firmware sub:0x03-0x05"
+    or "0x00 addr:0x55"). Every dimension that is not given selects everything; sub-commands also select Program Mode
+    Data Transfer. Returns a CommandFilter, or None for an empty setting.
+    '''
+    tokens = text.replace(",", " ").split()
+    if not tokens:
+        return None
+    opcodes = set()
+    subCommands = set()
+    addresses = set()
+    for token in tokens:
+        name = token.lower()
+        if name in COMMAND_GROUPS:
+            opcodes.update(COMMAND_GROUPS[name])
+        elif name.startswith(SUB_COMMAND_PREFIX):
+            subCommands.update(ParseValues(name[len(SUB_COMMAND_PREFIX):]))
+        elif name.startswith(ADDRESS_PREFIX):
+            addresses.update(ParseValues(name[len(ADDRESS_PREFIX):]))
+        else:
+            opcodes.update(ParseValues(name))
+    if subCommands:
+        opcodes.add(ubm.PROGRAM_MODE_DATA_TRANSFER)
+    return CommandFilter(MakeBitmap(opcodes), MakeBitmap(subCommands), MakeBitmap(addresses))
@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import namedtuple
+from lib_ubm_render import FormatLine, PrintLines
+from lib_ubm_registers import ByteLayout, Register, Field, ByteField, GetFieldNames
+
 IPMI_OFFSET_MULTIPLIER = 8
 IPMI_MULTIRECORD_OFFSET_BYTE = 5
 RECORD_HEADER_SIZE = 5
@@ -24,16 +28,48 @@ RECORD_HEADER_CHECKSUM_BTYE = 4
 RECORD_TYPE_UBM_OVERVIEW = 0xA0
 RECORD_TYPE_PORT_ROUTE_INFO = 0xA1
 
+IPMI_COMMON_HEADER_SIZE = 8
+UBM_OVERVIEW_RECORD_SIZE = 15
+
+IPMICommonHeader = namedtuple("IPMICommonHeader", ["formatVersion", "internalUseOffset", "chassisInfoOffset", "boardInfoOffset",
+                                                   "productInfoOffset", "multirecordOffset", "headerChecksum"])
+RecordHeader = namedtuple("RecordHeader", ["recordType", "recordFormat", "eol", "recordLength", "recordChecksum", "headerChecksum"])
+PortRouteInfo = namedtuple("PortRouteInfo", ["descriptors"])
+FRURecord = namedtuple("FRURecord", ["header", "body", "headerChecksumOk", "dataChecksumOk"])
+RecordView = namedtuple("RecordView", ["recordType", "view"])
+UBMFru = namedtuple("UBMFru", ["commonHeader", "records", "commonHeaderChecksumOk", "checksumOk"])
+
+def DecodeIPMICommonHeader(data):
+    return IPMICommonHeader(data[0] & 0x0F,
+                            data[1]*IPMI_OFFSET_MULTIPLIER,
+                            data[2]*IPMI_OFFSET_MULTIPLIER,
+                            data[3]*IPMI_OFFSET_MULTIPLIER,
+                            data[4]*IPMI_OFFSET_MULTIPLIER,
+                            data[IPMI_MULTIRECORD_OFFSET_BYTE]*IPMI_OFFSET_MULTIPLIER,
+                            data[7])
+
+def RenderIPMICommonHeader(record):
+    return ["IPMI Common Header",
+            FormatLine("Format Version: ", record.formatVersion),
+            FormatLine("Internal Use Area Starting Offset:", record.internalUseOffset),
+            FormatLine("Chassis Info Area Starting Offset:", record.chassisInfoOffset),
+            FormatLine("Board Info Area Starting Offset:", record.boardInfoOffset),
+            FormatLine("Product Info Area Starting Offset:", record.productInfoOffset),
+            FormatLine("Multirecord Area Starting Offset:", record.multirecordOffset),
+            FormatLine("IPMI Header Checksum:", hex(record.headerChecksum)),
+            ""]
+
 def PrintIPMICommonHeader(data):
-    print("IPMI Common Header")
-    print("Format Version: ", data[0] & 0x0F)
-    print("Internal Use Area Starting Offset:", data[1]*IPMI_OFFSET_MULTIPLIER)
-    print("Chassis Info Area Starting Offset:", data[2]*IPMI_OFFSET_MULTIPLIER)
-    print("Board Info Area Starting Offset:", data[3]*IPMI_OFFSET_MULTIPLIER)
-    print("Product Info Area Starting Offset:", data[4]*IPMI_OFFSET_MULTIPLIER)
-    print("Multirecord Area Starting Offset:", data[IPMI_MULTIRECORD_OFFSET_BYTE]*IPMI_OFFSET_MULTIPLIER)
-    print("IPMI Header Checksum:", hex(data[7]))
-    print("")
+    PrintLines(RenderIPMICommonHeader(DecodeIPMICommonHeader(data)))
+
+def IsZeroChecksum(data):
+    return 0 == (sum(data) & 0xFF)
+
+def IsRecordHeaderChecksumValid(record):
+    return IsZeroChecksum(record[:RECORD_HEADER_SIZE])
+
+def IsRecordDataChecksumValid(record):
+    return 0 == ((sum(record[RECORD_HEADER_SIZE:]) + record[RECORD_HEADER_RECORD_CHECKSUM_BYTE]) & 0xFF)
 
 def IsRecordEOL(header):
     return (header[RECORD_HEADER_FORMAT_AND_EOL_BYTE]>>7) & 1
@@ -41,203 +77,336 @@ def IsRecordEOL(header):
 def GetRecordLength(header):
     return header[RECORD_HEADER_SIZE_BYTE]
 
-def GetRecord(data, recordIndex):
-    multiRecordStartOffset = data[IPMI_MULTIRECORD_OFFSET_BYTE]*IPMI_OFFSET_MULTIPLIER
-    recordStart = multiRecordStartOffset
-    for i in range(0, recordIndex):
-        recordStart += data[recordStart + RECORD_HEADER_SIZE_BYTE] + RECORD_HEADER_SIZE
-    
-    return data[recordStart:]
+RECORD_TYPE_STRING_DICT = {
+    RECORD_TYPE_UBM_OVERVIEW: "UBM Overview (0xA0)",
+    RECORD_TYPE_PORT_ROUTE_INFO: "Port Route Info Area (0xA1)",
+}
 
 def GetRecordTypeString(type):
-    switcher = {
-        RECORD_TYPE_UBM_OVERVIEW: "UBM Overview (0xA0)",
-        RECORD_TYPE_PORT_ROUTE_INFO: "Port Route Info Area (0xA1)",
-    }
-    return switcher.get(type, "Unknown Record Type")
+    return RECORD_TYPE_STRING_DICT.get(type, "Unknown Record Type")
+
+def DecodeRecordHeader(header):
+    return RecordHeader(header[RECORD_HEADER_TYPE_BYTE],
+                        header[RECORD_HEADER_FORMAT_AND_EOL_BYTE]&0x0F,
+                        IsRecordEOL(header),
+                        header[RECORD_HEADER_SIZE_BYTE],
+                        header[RECORD_HEADER_RECORD_CHECKSUM_BYTE],
+                        header[RECORD_HEADER_CHECKSUM_BTYE])
+
+def RenderRecordHeader(record):
+    return ["Record Header",
+            FormatLine("Record Type: ", GetRecordTypeString(record.recordType)),
+            FormatLine("Record Format:", record.recordFormat),
+            FormatLine("EOL bit:", record.eol),
+            FormatLine("Record Length: ", record.recordLength),
+            FormatLine("Record Checksum:", hex(record.recordChecksum)),
+            FormatLine("Header Checksum:", hex(record.headerChecksum)),
+            ""]
 
 def PrintRecordHeader(header):
-    print("Record Header")
-    print("Record Type: ", GetRecordTypeString(header[RECORD_HEADER_TYPE_BYTE]))
-    print("Record Format:", header[RECORD_HEADER_FORMAT_AND_EOL_BYTE]&0x0F)
-    print("EOL bit:", IsRecordEOL(header))
-    print("Record Length: ", header[RECORD_HEADER_SIZE_BYTE])
-    print("Record Checksum:", hex(header[RECORD_HEADER_RECORD_CHECKSUM_BYTE]))
-    print("Header Checksum:", hex(header[RECORD_HEADER_CHECKSUM_BTYE]))
-    print("")
+    PrintLines(RenderRecordHeader(DecodeRecordHeader(header)))
+
+TwoWireDeviceArrangementString_Dict = {
+    0: "No Mux routed on HFC 2-Wire Interface (0)",
+    1: "DFC 2-Wire interface behind MUX (1)",
+    2: "reserved (2)",
+    3: "UBM Controller and DFC 2-Wire interface located behind MUX (3)",
+}
+
+TwoWireMaxByteCountString_Dict = {
+    0: "No Limit (0)",
+    1: "16 Bytes (1)",
+    2: "32 Bytes (2)",
+    3: "64 Bytes (3)",
+    4: "128 Bytes (4)",
+    5: "256 Bytes (5)",
+}
+
+TWO_WIRE_INFO = Register("TwoWireInfo", __name__, [
+    [Field("deviceArrangement", 0, 2, "2-Wire Device Arrangement: ", TwoWireDeviceArrangementString_Dict),
+     Field("muxAddress", 2, 3, "2-Wire MUX Address: "),
+     Field("maxByteCount", 5, 3, "UBM Controller 2-Wire Max Byte Count: ", TwoWireMaxByteCountString_Dict)]])
+
+TwoWireInfo = TWO_WIRE_INFO.record
+
+def Decode2WireInfo(byte):
+    return TWO_WIRE_INFO.DecodeByte(byte)
+
+def Render2WireInfo(record):
+    return TWO_WIRE_INFO.Render(record)
 
 def Print2WireInfo(byte):
-    switcher_1 = {
-        0: "No Mux routed on HFC 2-Wire Interface (0)",
-        1: "DFC 2-Wire interface behind MUX (1)",
-        2: "reserved (2)",
-        3: "UBM Controller and DFC 2-Wire interface located behind MUX (3)",
-    }
-
-    print("2-Wire Device Arrangement: ", switcher_1.get(byte&0x03))
-    print("2-Wire MUX Address: ", (byte>>2) & 0x07)
-    switcher_2 = {
-        0: "No Limit (0)",
-        1: "16 Bytes (1)",
-        2: "32 Bytes (2)",
-        3: "64 Bytes (3)",
-        4: "128 Bytes (4)",
-        5: "256 Bytes (5)",
-    }
-    print("UBM Controller 2-Wire Max Byte Count: ", switcher_2.get((byte>>5) & 0x07))
+    PrintLines(Render2WireInfo(Decode2WireInfo(byte)))
+
+TwoWireMuxEnableBitLocationString_Dict = {
+    0: "Mux Enable is not applicable (0)",
+    1: "Reserved (1)",
+    2: "Mux Enable located at bit 2 of channel select byte (E.g., PCA9540, PCA9542, PCA9544)) (2)",
+    3: "Mux Enable located at Bit 3 of Channel Select Byte (E.g., PCA9547) (3)"
+}
+
+TwoWireMuxChannelCountString_Dict = {
+    0: "No Mux implemented (0)",
+    1: "2 Channel Mux implemented (1)",
+    2: "4 Channel Mux implemented (2)",
+    3: "8 Channel Mux implemented (3)",
+}
+
+TwoWireMuxEnableChannelMethodString_Dict = {
+    0: "2-Wire Mux Enable Channel Method: Channels are selected using bit location (E.g., PCA9543,PCA9546, PCA9548) (bit = 0)",
+    1: "2-Wire Mux Enable Channel Method: Channels are selected using enable bit and channel byte (E.g., PCA9540, PCA9542, PCA9544, PCA9547) (bit = 1)",
+}
+
+# Only the valid line is rendered for a descriptor that is not valid
+TWO_WIRE_MUX_INFO = Register("TwoWireMuxInfo", __name__, [
+    [Field("valid", 7, 1, labels = {0: "2-Wire Mux Descriptor is not Valid", 1: "2-Wire Mux Description is Valid"}),
+     Field("enableChannelMethod", 6, 1, labels = TwoWireMuxEnableChannelMethodString_Dict),
+     Field("enableBitLocation", 2, 2, "2-Wire Mux Enable bit location: ", TwoWireMuxEnableBitLocationString_Dict),
+     Field("channelCount", 0, 2, "2-Wire Mux Channel Count: ", TwoWireMuxChannelCountString_Dict)]])
+
+TwoWireMuxInfo = TWO_WIRE_MUX_INFO.record
+
+def Decode2WireMuxInfoByte(byte):
+    return TWO_WIRE_MUX_INFO.DecodeByte(byte)
+
+def Render2WireMuxInfoByte(record):
+    lines = TWO_WIRE_MUX_INFO.Render(record)
+    if 1 != record.valid:
+        return lines[:1]
+    return lines
 
 def Print2WireMuxInfoByte(byte):
-    if 1 == (byte>>7) & 1:
-        print("2-Wire Mux Description is Valid")
-        if 1 == ((byte>>6) & 1):
-            print("2-Wire Mux Enable Channel Method: Channels are selected using enable bit and channel byte (E.g., PCA9540, PCA9542, PCA9544, PCA9547) (bit = 1)")
-        else:
-            print("2-Wire Mux Enable Channel Method: Channels are selected using bit location (E.g., PCA9543,PCA9546, PCA9548) (bit = 0)")
-
-        switcher_1 = {
-            0: "Mux Enable is not applicable (0)",
-            1: "Reserved (1)",
-            2: "Mux Enable located at bit 2 of channel select byte (E.g., PCA9540, PCA9542, PCA9544)) (2)",
-            3: "Mux Enable located at Bit 3 of Channel Select Byte (E.g., PCA9547) (3)"
-        }
-        print("2-Wire Mux Enable bit location: ", switcher_1.get((byte>>2) & 3))
-
-        switcher_2 = {
-            0: "No Mux implemented (0)",
-            1: "2 Channel Mux implemented (1)",
-            2: "4 Channel Mux implemented (2)",
-            3: "8 Channel Mux implemented (3)",
-        }
-        print("2-Wire Mux Channel Count: ", switcher_2.get(byte & 3))
-    else:
-        print("2-Wire Mux Descriptor is not Valid")
+    PrintLines(Render2WireMuxInfoByte(Decode2WireMuxInfoByte(byte)))
+
+# Layouts of the UBM Overview bytes that are not nested records. The spec version is rendered on one line.
+UBM_OVERVIEW_VERSION = ByteLayout([
+    Field("specVersionMajor", 4, 4),
+    Field("specVersionMinor", 0, 4)])
+UBM_OVERVIEW_TIME_LIMIT = ByteLayout([
+    Field("fruInvalid", 0, 1, "UBM FRU Invalid: "),
+    Field("maxTimeLimit", 1, 7, "UBM Controller Max Time Limit: ", "{0} seconds".format)])
+UBM_OVERVIEW_FEATURES = ByteLayout([
+    Field("readChecksumCreation", 0, 1, "Read Checksum Creation: "),
+    Field("writeChecksumChecking", 1, 1, "Write Checksum Checking: "),
+    Field("cprsntLegacyMode", 2, 1, "CPRSNT Legacy Mode: "),
+    Field("pcieResetChangeCountMask", 3, 1, "PCIe Reset Change Count Mask: "),
+    Field("driveTypeInstalledChangeCountMask", 4, 1, "Drive Type Installed Change Count Mask: "),
+    Field("operationalStateChangeCountMask", 5, 1, "Operational State Change Count Mask: ")])
+
+UBMOverview = namedtuple("UBMOverview", GetFieldNames(UBM_OVERVIEW_VERSION) + ["twoWireInfo"] +
+                                        GetFieldNames(UBM_OVERVIEW_TIME_LIMIT) + GetFieldNames(UBM_OVERVIEW_FEATURES) +
+                                        ["dfcDescriptorCount", "portRouteDescriptorCount", "backplaneDfcCount", "maxPowerPerDfc",
+                                         "twoWireMuxInfo"])
+
+def DecodeUBMOverviewRecord(record):
+    return UBMOverview(*UBM_OVERVIEW_VERSION.values[record[5]],
+                       Decode2WireInfo(record[6]),
+                       *UBM_OVERVIEW_TIME_LIMIT.values[record[7]],
+                       *UBM_OVERVIEW_FEATURES.values[record[8]],
+                       record[10],
+                       record[11],
+                       record[12],
+                       record[13],
+                       Decode2WireMuxInfoByte(record[14]))
+
+def RenderUBMOverviewRecord(record):
+    lines = ["UBM Overview:",
+             "UBM Spec Version: {0}.{1}".format(record.specVersionMajor, record.specVersionMinor)]
+    lines.extend(Render2WireInfo(record.twoWireInfo))
+    lines.extend(UBM_OVERVIEW_TIME_LIMIT.RenderFields(record))
+    lines.extend(UBM_OVERVIEW_FEATURES.RenderFields(record))
+    lines.extend([FormatLine("Number of DFC Status and Control Descriptors: ", record.dfcDescriptorCount),
+                  FormatLine("Number of UBM Port Route Descriptors: ", record.portRouteDescriptorCount),
+                  FormatLine("Number of Backplane DFCs: ", record.backplaneDfcCount),
+                  FormatLine("Max Power per DFC: ", record.maxPowerPerDfc)])
+    lines.extend(Render2WireMuxInfoByte(record.twoWireMuxInfo))
+    return lines
 
 def PrintUBMOverviewRecord(record):
-    print("UBM Overview:")
-    print("UBM Spec Version: {0}.{1}".format((record[5]>>4), record[5]&0x0F))
-
-    Print2WireInfo(record[6])
-
-    print("UBM FRU Invalid: ", record[7]&1)
-    print("UBM Controller Max Time Limit: ", (record[7]>>1) & 0x7F, 'seconds')
+    PrintLines(RenderUBMOverviewRecord(DecodeUBMOverviewRecord(record)))
 
-    print("Read Checksum Creation: ", record[8]&1)
-    print("Write Checksum Checking: ", (record[8]>>1) & 1)
-    print("CPRSNT Legacy Mode: ", (record[8]>>2) & 1)
-    print("PCIe Reset Change Count Mask: ", (record[8]>>3) & 1)
-    print("Drive Type Installed Change Count Mask: ", (record[8]>>4) & 1)
-    print("Operational State Change Count Mask: ", (record[8]>>5) & 1)
+UBMTypeString_Dict = {
+    0: "UBM Controller Type: UBM Controller is defined by this specification (0)",
+    1: "UBM Controller Type: UBM Controller is Vendor specific (1)",
+}
 
-    print("Number of DFC Status and Control Descriptors: ", record[10])
-    print("Number of UBM Port Route Descriptors: ", record[11])
-    print("Number of Backplane DFCs: ", record[12])
-    print("Max Power per DFC: ", record[13])
-    Print2WireMuxInfoByte(record[14])
+def RenderUBMType(typeBit):
+    # Only 1 is Vendor specific, any other value is defined by the specification
+    return [UBMTypeString_Dict.get(typeBit, UBMTypeString_Dict[0])]
 
 def PrintUBMType(typeBit):
-    if 1 == typeBit:
-        print("UBM Controller Type: UBM Controller is Vendor specific (1)")
-    else:
-        print("UBM Controller Type: UBM Controller is defined by this specification (0)")
+    PrintLines(RenderUBMType(typeBit))
+
+LinkWidthString_Dict = {
+    0: "1 lane (0)",
+    1: "2 lanes (1)",
+    2: "4 lanes (2)",
+    3: "8 lanes (3)",
+    4: "16 lanes (4)",
+}
+
+MaxSataLinkRateString_Dict = {
+    0: "Not Supported (0)",
+    1: "3 Gb/s (1)",
+    2: "6 Gb/s (2)",
+    3: "No Limit (3)",
+}
+
+MaxPcieLinkRateString_Dict = {
+    0: "Not Supported (0)",
+    1: "PCIe-1 (2.5 GT/s) (1)",
+    2: "PCIe-2 (5 GT/s) (2)",
+    3: "PCIe-3 (3)",
+    4: "PCIe-4 (16 GT/s) (4)",
+    5: "PCIe-5 (32 GT/s) (5)",
+    6: "PCIe-6 (TBD) (6)",
+    7: "7h = No Limit (7)"
+}
+
+MaxSasLinkRateString_Dict = {
+    0: "Not Supported (0)",
+    1: "SAS-1 (3 Gb/s) (1)",
+    2: "SAS-2 (6 Gb/s) (2)",
+    3: "SAS-3 (12 Gb/s) (3)",
+    4: "SAS-4 (22.5 Gb/s) (4)",
+    5: "SAS-5 (TBD) (5)",
+    6: "SAS-6 (TBD) (6)",
+    7: "7h = No Limit (7)"
+}
+
+PORT_ROUTE_DESCRIPTOR_SIZE = 7
+PORT_ROUTE_LINK_BYTE = 3
+PORT_ROUTE_LINK_RATES_BYTE = 4
+
+# Port Route Descriptor bytes, from byte 0 (record byte 5) on
+PORT_ROUTE_DESCRIPTOR = Register("PortRouteDescriptor", __name__, [
+    [Field("ubmControllerType", 0, 1, labels = UBMTypeString_Dict),
+     Field("ubmControllerAddress", 1, 7, "UBM Controller Address: ", hex)],
+    [ByteField("dfcIndex", "DFC Status and Control Descriptor Index: ")],
+    [Field("otherSupport", 0, 1, "Other bit: "),
+     Field("pcie1001Support", 1, 1, "SFF TA 1001 PCIe Support: "),
+     Field("genZSupport", 3, 1, "Gen-Z Support: "),
+     Field("sasSataSupport", 4, 1, "SAS/SATA Support: "),
+     Field("quadPcieSupport", 5, 1, "Quad PCIe Support: "),
+     Field("dfcEmptySupport", 7, 1, "DFC Empty Support: ")],
+    [Field("linkWidth", 0, 4, "Link Width: ", LinkWidthString_Dict),
+     Field("segregated", 6, 1, labels = {0: "Port Type: Converged  (0)", 1: "Port Type: Segregated (1)"}),
+     Field("secondaryPort", 7, 1, labels = {0: "Domain: Primary Port", 1: "Domain: Secondary Port"})],
+    [Field("maxSataLinkRate", 0, 2, "Max SATA Link Rate: ", MaxSataLinkRateString_Dict),
+     Field("maxPcieLinkRate", 2, 3, "Max PCIe Link Rate: ", MaxPcieLinkRateString_Dict),
+     Field("maxSasLinkRate", 5, 3, "Max SAS Link Rate: ", MaxSasLinkRateString_Dict)],
+    [Field("hfcStartingLane", 0, 4, "HFC Starting Lane: "),
+     Field("hfcIdentity", 4, 4, "HFC Identity: ")],
+    [ByteField("slotOffset", "Slot Offset: ")]])
+
+PortRouteDescriptor = PORT_ROUTE_DESCRIPTOR.record
+
+def RenderPortRouteByte3(linkWidth, segregated, secondaryPort):
+    return list(PORT_ROUTE_DESCRIPTOR.layouts[PORT_ROUTE_LINK_BYTE].Render((linkWidth, segregated, secondaryPort)))
 
 def PrintPortRouteByte3Byte(byte):
-    switcher = {
-        0: "1 lane (0)",
-        1: "2 lanes (1)",
-        2: "4 lanes (2)",
-        3: "8 lanes (3)",
-        4: "16 lanes (4)",
-    }
-    print("Link Width: ", switcher.get(byte&0x0F))
-
-    if 1 == ((byte>>6) & 1):
-        print("Port Type: Segregated (1)")
-    else:
-        print("Port Type: Converged  (0)")
-
-    if 1 == ((byte>>7) & 1):
-        print("Domain: Secondary Port")
-    else:
-        print("Domain: Primary Port")
+    PrintLines(PORT_ROUTE_DESCRIPTOR.layouts[PORT_ROUTE_LINK_BYTE].lines[byte])
+
+def RenderMaxLinkRates(maxSataLinkRate, maxPcieLinkRate, maxSasLinkRate):
+    return list(PORT_ROUTE_DESCRIPTOR.layouts[PORT_ROUTE_LINK_RATES_BYTE].Render((maxSataLinkRate, maxPcieLinkRate, maxSasLinkRate)))
 
 def PrintMaxLinkRatesByte(byte):
-    switcher_1 = {
-        0: "Not Supported (0)",
-        1: "3 Gb/s (1)",
-        2: "6 Gb/s (2)",
-        3: "No Limit (3)",
-    }
-    switcher_2 = {
-        0: "Not Supported (0)",
-        1: "PCIe-1 (2.5 GT/s) (1)",
-        2: "PCIe-2 (5 GT/s) (2)",
-        3: "PCIe-3 (3)",
-        4: "PCIe-4 (16 GT/s) (4)",
-        5: "PCIe-5 (32 GT/s) (5)",
-        6: "PCIe-6 (TBD) (6)",
-        7: "7h = No Limit (7)"
-    }
-    switcher_3 = {
-        0: "Not Supported (0)",
-        1: "SAS-1 (3 Gb/s) (1)",
-        2: "SAS-2 (6 Gb/s) (2)",
-        3: "SAS-3 (12 Gb/s) (3)",
-        4: "SAS-4 (22.5 Gb/s) (4)",
-        5: "SAS-5 (TBD) (5)",
-        6: "SAS-6 (TBD) (6)",
-        7: "7h = No Limit (7)"
-    }
-    print("Max SATA Link Rate: ", switcher_1.get(byte&0x03))
-    print("Max PCIe Link Rate: ", switcher_2.get((byte>>2) & 7))
-    print("Max SAS Link Rate: ", switcher_3.get((byte>>5) & 7))
+    PrintLines(PORT_ROUTE_DESCRIPTOR.layouts[PORT_ROUTE_LINK_RATES_BYTE].lines[byte])
 
-def PrintPortRouteInfoRecord(record):
-    numberOfDescriptors = int(record[RECORD_HEADER_SIZE_BYTE]/7)
-    print("Port Route Info:")
-    for descriptorIndex in range(0, numberOfDescriptors):
-        offset = 7*descriptorIndex
-        PrintUBMType(record[5 + offset]&1)
-        print("UBM Controller Address: ", hex(record[5 + offset]>>1))
+def DecodePortRouteDescriptor(record, offset):
+    return PORT_ROUTE_DESCRIPTOR.Decode(record[5 + offset:5 + offset + PORT_ROUTE_DESCRIPTOR_SIZE])
 
-        print("DFC Status and Control Descriptor Index: ", record[6 + offset])
+def RenderPortRouteDescriptor(descriptor):
+    lines = PORT_ROUTE_DESCRIPTOR.Render(descriptor, 0, 2)
+    lines.append("Drive Type Supported Bits:")
+    lines.extend(PORT_ROUTE_DESCRIPTOR.Render(descriptor, 2))
+    lines.append("")
+    return lines
 
-        print("Drive Type Supported Bits:")
-        print("Other bit: ", record[7 + offset]&1)
-        print("SFF TA 1001 PCIe Support: ", (record[7 + offset]>>1) & 1)
-        print("Gen-Z Support: ", (record[7 + offset]>>3) & 1)
-        print("SAS/SATA Support: ", (record[7 + offset]>>4) & 1)
-        print("Quad PCIe Support: ", (record[7 + offset]>>5) & 1)
-        print("DFC Empty Support: ", (record[7 + offset]>>7) & 1)
+def DecodePortRouteInfoRecord(record):
+    numberOfDescriptors = int(min(record[RECORD_HEADER_SIZE_BYTE], len(record) - RECORD_HEADER_SIZE)/PORT_ROUTE_DESCRIPTOR_SIZE)
+    return PortRouteInfo(tuple(DecodePortRouteDescriptor(record, PORT_ROUTE_DESCRIPTOR_SIZE*descriptorIndex) for descriptorIndex in range(0, numberOfDescriptors)))
 
-        PrintPortRouteByte3Byte(record[8 + offset])
+def RenderPortRouteInfoRecord(record):
+    lines = ["Port Route Info:"]
+    for descriptor in record.descriptors:
+        lines.extend(RenderPortRouteDescriptor(descriptor))
+    return lines
 
-        PrintMaxLinkRatesByte(record[9 + offset])
+def PrintPortRouteInfoRecord(record):
+    PrintLines(RenderPortRouteInfoRecord(DecodePortRouteInfoRecord(record)))
+
+def IterRecords(data):
+    '''
+    Walk the multirecord area once and yield a RecordView (record type, memoryview of header and data)
+    per record, without copying the FRU image. Stops after the EOL record, or at the first record
+    that does not fit in the data read so far (truncated FRU reads).
+    '''
+    view = memoryview(data)
+    length = len(view)
+    if length < IPMI_COMMON_HEADER_SIZE:
+        return
+
+    recordStart = view[IPMI_MULTIRECORD_OFFSET_BYTE]*IPMI_OFFSET_MULTIPLIER
+    while recordStart + RECORD_HEADER_SIZE <= length:
+        recordEnd = recordStart + RECORD_HEADER_SIZE + view[recordStart + RECORD_HEADER_SIZE_BYTE]
+        if recordEnd > length:
+            return
+        record = view[recordStart:recordEnd]
+        yield RecordView(record[RECORD_HEADER_TYPE_BYTE], record)
+        if IsRecordEOL(record):
+            return
+        recordStart = recordEnd
 
-        print("HFC Starting Lane: ", record[10 + offset]&0x0F)
-        print("HFC Identity: ", (record[10 + offset]>>4) & 0x0F)
+def DecodeRecord(record):
+    recordType = record[RECORD_HEADER_TYPE_BYTE]
 
-        print("Slot Offset: ", record[11 + offset])
+    if (RECORD_TYPE_UBM_OVERVIEW == recordType) and (len(record) >= UBM_OVERVIEW_RECORD_SIZE):
+        return DecodeUBMOverviewRecord(record)
+    elif RECORD_TYPE_PORT_ROUTE_INFO == recordType:
+        return DecodePortRouteInfoRecord(record)
+    return None
 
-        print("")
+def RenderRecord(record):
+    if isinstance(record, UBMOverview):
+        return RenderUBMOverviewRecord(record)
+    elif isinstance(record, PortRouteInfo):
+        return RenderPortRouteInfoRecord(record)
+    return []
 
 def PrintRecord(record):
-    recordType = record[RECORD_HEADER_TYPE_BYTE]
-
-    if RECORD_TYPE_UBM_OVERVIEW == recordType:
-        PrintUBMOverviewRecord(record)
-    elif RECORD_TYPE_PORT_ROUTE_INFO == recordType:
-        PrintPortRouteInfoRecord(record)
+    PrintLines(RenderRecord(DecodeRecord(record)))
+
+def DecodeFRURecord(record):
+    return FRURecord(DecodeRecordHeader(record),
+                     DecodeRecord(record),
+                     IsRecordHeaderChecksumValid(record),
+                     IsRecordDataChecksumValid(record))
+
+def DecodeUBMFru(data):
+    if len(data) < IPMI_COMMON_HEADER_SIZE:
+        # Too short to locate any checksum
+        return UBMFru(None, (), None, None)
+    commonHeaderChecksumOk = IsZeroChecksum(memoryview(data)[:IPMI_COMMON_HEADER_SIZE])
+    records = tuple(DecodeFRURecord(record.view) for record in IterRecords(data))
+    checksumOk = commonHeaderChecksumOk and all(record.headerChecksumOk and record.dataChecksumOk for record in records)
+    return UBMFru(DecodeIPMICommonHeader(data), records, commonHeaderChecksumOk, checksumOk)
+
+def RenderUBMFru(record):
+    if record.commonHeader is None:
+        return ["UBM FRU read is too short for the IPMI Common Header"]
+    lines = RenderIPMICommonHeader(record.commonHeader)
+    if not record.commonHeaderChecksumOk:
+        lines.insert(-1, "IPMI Header Checksum Invalid")
+    for fruRecord in record.records:
+        lines.extend(RenderRecordHeader(fruRecord.header))
+        if not fruRecord.headerChecksumOk:
+            lines.insert(-1, "Header Checksum Invalid")
+        if not fruRecord.dataChecksumOk:
+            lines.insert(-1, "Record Checksum Invalid")
+        lines.extend(RenderRecord(fruRecord.body))
+        lines.append("")
+    return lines
 
 def PrintUBMFru(data):
-    PrintIPMICommonHeader(data)
-
-    recordIndex = 0
-    while 1:
-        record = GetRecord(data, recordIndex)
-        PrintRecordHeader(record)
-        PrintRecord(record)
-        print("")
-        if IsRecordEOL(record):
-            return
-        recordIndex += 1
-        
\ No newline at end of file
+    PrintLines(RenderUBMFru(DecodeUBMFru(data)))
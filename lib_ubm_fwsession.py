@@ -0,0 +1,442 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Reconstruction of firmware update sessions (Enter Programming Mode -> Program Mode Data Transfer
+# sub-commands -> Exit Programming Mode) from the decoded programming mode records.
+import mmap
+import os
+from collections import namedtuple
+import lib_ubm_fwupdate as fwupdate
+from lib_ubm_render import FormatLine
+
+PROGRAMMING_STATUS_SUCCESS = 1
+PROGRAMMING_STATUS_BUSY = 6
+
+ERASED_BYTE = 0xFF
+
+# Sector coverage bits
+SECTOR_ERASED = (1<<0)
+SECTOR_PROGRAMMED = (1<<1)
+SECTOR_VERIFIED = (1<<2)
+
+# Program write layout: command, sub-command, number of bytes, sector number, sector index, sequence number, data.
+# The number of bytes counts the sector number, sector index and sequence number bytes plus the data.
+PROGRAM_WRITE_HEADER_BYTES = 3
+PROGRAM_WRITE_DATA_OFFSET = 6
+
+PHASE_ERASE = "Erase"
+PHASE_PROGRAM = "Program"
+PHASE_VERIFY = "Verify"
+PHASE_VERIFY_IMAGE = "Verify Image"
+PHASES = (PHASE_ERASE, PHASE_PROGRAM, PHASE_VERIFY, PHASE_VERIFY_IMAGE)
+
+# Sub-commands that start a timed operation, and the status sub-commands that complete it
+PHASE_COMMANDS = {
+    fwupdate.PROGRAMMING_SUB_COMMAND_ERASE : PHASE_ERASE,
+    fwupdate.PROGRAMMING_SUB_COMMAND_PROGRAM : PHASE_PROGRAM,
+    fwupdate.PROGRAMMING_SUB_COMMAND_VERIFY : PHASE_VERIFY,
+    fwupdate.PROGRAMMING_SUB_COMMAND_VERIFY_IMAGE : PHASE_VERIFY_IMAGE,
+}
+
+PHASE_STATUS_COMMANDS = {
+    fwupdate.PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS : PHASE_ERASE,
+    fwupdate.PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS : PHASE_PROGRAM,
+    fwupdate.PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS : PHASE_VERIFY,
+    fwupdate.PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS : PHASE_VERIFY_IMAGE,
+}
+
+OperationLatency = namedtuple("OperationLatency", ["phase", "sectorNumber", "sectorIndex", "startTime", "endTime", "latency",
+                                                   "busyPolls", "dataBytes", "status"])
+PhaseTotals = namedtuple("PhaseTotals", ["phase", "operations", "totalTime", "maxLatency", "busyPolls", "dataBytes"])
+SubCommandFailure = namedtuple("SubCommandFailure", ["time", "subCommand", "status"])
+SectorMismatch = namedtuple("SectorMismatch", ["sectorNumber", "offset", "expected", "actual"])
+# unavailable is None, or why the reference image could not be read (no other field is set then)
+ImageComparison = namedtuple("ImageComparison", ["imageSize", "comparedBytes", "matchingSectors", "mismatchedSectors", "missingSectors",
+                                                 "unavailable"])
+
+def CheckReferenceImage(path):
+    '''
+    Return None if path is a reference image that can be compared against, otherwise why it cannot.
+    '''
+    try:
+        with open(path, "rb") as imageFile:
+            if not os.fstat(imageFile.fileno()).st_size:
+                return "empty file"
+    except OSError as error:
+        return error.strerror or str(error)
+    return None
+
+def UnavailableImageComparison(reason):
+    return ImageComparison(0, 0, [], [], [], reason)
+
+class SectorBuffer:
+    '''
+    Programmed bytes of one sector, placed by sector index. Bytes that were not programmed read as erased (0xFF).
+    '''
+    __slots__ = ('firstIndex', 'indexCount', 'data', 'programmedIndexes')
+
+    def __init__(self, firstIndex, indexCount, transferSize):
+        self.firstIndex = firstIndex
+        self.indexCount = indexCount
+        self.data = bytearray([ERASED_BYTE]) * (indexCount * transferSize)
+        self.programmedIndexes = bytearray(indexCount)
+
+    def Program(self, sectorIndex, transferSize, payload):
+        slot = sectorIndex - self.firstIndex
+        if slot < 0:
+            return
+        if slot >= self.indexCount:
+            # Sector geometry not known or exceeded: grow the buffer
+            self.data.extend(bytearray([ERASED_BYTE]) * ((slot + 1 - self.indexCount) * transferSize))
+            self.programmedIndexes.extend(bytearray(slot + 1 - self.indexCount))
+            self.indexCount = slot + 1
+        offset = slot * transferSize
+        self.data[offset:offset + len(payload)] = payload
+        self.programmedIndexes[slot] = 1
+
+    def Erase(self):
+        self.data[:] = bytearray([ERASED_BYTE]) * len(self.data)
+        self.programmedIndexes[:] = bytearray(self.indexCount)
+
+    def IsFullyProgrammed(self):
+        return all(self.programmedIndexes)
+
+class PendingOperation:
+    '''
+    Erase, program or verify command waiting for its first non-Busy status read.
+    '''
+    __slots__ = ('phase', 'sectorNumber', 'sectorIndex', 'startTime', 'dataBytes', 'busyPolls')
+
+    def __init__(self, phase, sectorNumber, sectorIndex, startTime, dataBytes):
+        self.phase = phase
+        self.sectorNumber = sectorNumber
+        self.sectorIndex = sectorIndex
+        self.startTime = startTime
+        self.dataBytes = dataBytes
+        self.busyPolls = 0
+
+class FirmwareUpdateSession:
+    '''
+    One firmware update: the NV geometry, the per-sector reassembled image and the sector coverage bitmap.
+
+    Sector Index values address program transfers within a sector (from the sector's first index to its
+    last index in the NV geometry). The transfer size is taken from the first Program write of the session.
+
+    Erase, program and verify latency is the time from the start of the command write to the end of the
+    first status read that is not Busy.
+    '''
+    def __init__(self, startTime):
+        self.startTime = startTime
+        self.endTime = None
+        self.geometry = None
+        self.transferSize = 0
+        self.sectors = {}
+        self.coverage = bytearray(256)
+        self.pendingOperation = None
+        self.latencies = []
+        self.failures = []
+        self.imageVerified = None
+        self.comparison = None
+
+    def ApplyGeometry(self, geometry):
+        self.geometry = geometry
+
+    def GetSectorIndexes(self, sectorNumber):
+        if (self.geometry is not None) and (sectorNumber < len(self.geometry.sectorIndexes)):
+            indexes = self.geometry.sectorIndexes[sectorNumber]
+            return indexes.firstIndex, max(indexes.lastIndex - indexes.firstIndex + 1, 0)
+        return 0, 0
+
+    def GetSector(self, sectorNumber):
+        sector = self.sectors.get(sectorNumber)
+        if sector is None:
+            firstIndex, indexCount = self.GetSectorIndexes(sectorNumber)
+            sector = self.sectors[sectorNumber] = SectorBuffer(firstIndex, indexCount, self.transferSize)
+        return sector
+
+    def Program(self, sectorNumber, sectorIndex, payload):
+        if not self.transferSize:
+            self.transferSize = len(payload)
+        self.GetSector(sectorNumber).Program(sectorIndex, self.transferSize, payload)
+        self.coverage[sectorNumber] |= SECTOR_PROGRAMMED
+
+    def Erase(self, sectorNumber):
+        if sectorNumber in self.sectors:
+            self.sectors[sectorNumber].Erase()
+        self.coverage[sectorNumber] = SECTOR_ERASED
+
+    def MarkVerified(self, sectorNumber):
+        self.coverage[sectorNumber] |= SECTOR_VERIFIED
+
+    def StartOperation(self, phase, record, startTime, dataBytes = 0):
+        self.pendingOperation = PendingOperation(phase, getattr(record, "sectorNumber", None), getattr(record, "sectorIndex", None),
+                                                 startTime, dataBytes)
+
+    def CompleteOperation(self, endTime, status):
+        pending = self.pendingOperation
+        self.pendingOperation = None
+        latency = OperationLatency(pending.phase, pending.sectorNumber, pending.sectorIndex, pending.startTime, endTime,
+                                   float(endTime - pending.startTime), pending.busyPolls, pending.dataBytes, status)
+        self.latencies.append(latency)
+        return latency
+
+    def GetDuration(self):
+        if self.endTime is None:
+            return None
+        return float(self.endTime - self.startTime)
+
+    def GetPhaseTotals(self):
+        totals = []
+        for phase in PHASES:
+            latencies = [latency for latency in self.latencies if phase == latency.phase]
+            if latencies:
+                totals.append(PhaseTotals(phase, len(latencies), sum([latency.latency for latency in latencies]),
+                                          max([latency.latency for latency in latencies]),
+                                          sum([latency.busyPolls for latency in latencies]),
+                                          sum([latency.dataBytes for latency in latencies])))
+        return totals
+
+    def GetSectorLatencies(self):
+        '''
+        Total latency per (sector number, phase) for the sector operations.
+        '''
+        sectorLatencies = {}
+        for latency in self.latencies:
+            if latency.sectorNumber is not None:
+                key = (latency.sectorNumber, latency.phase)
+                sectorLatencies[key] = sectorLatencies.get(key, 0.0) + latency.latency
+        return sectorLatencies
+
+    def GetProgramThroughput(self):
+        '''
+        Programmed data bytes per second of program operation time, and per second of session time.
+        '''
+        programBytes = sum([latency.dataBytes for latency in self.latencies if PHASE_PROGRAM == latency.phase])
+        programTime = sum([latency.latency for latency in self.latencies if PHASE_PROGRAM == latency.phase])
+        duration = self.GetDuration()
+        return (programBytes / programTime if programTime else 0.0,
+                programBytes / duration if duration else 0.0)
+
+    def GetSectorNumbers(self):
+        if self.geometry is not None:
+            return range(self.geometry.numberOfSectors)
+        return sorted(self.sectors)
+
+    def GetImage(self):
+        '''
+        Return the reassembled image, sector after sector, and the image offset of every sector.
+        '''
+        image = bytearray()
+        offsets = {}
+        for sectorNumber in self.GetSectorNumbers():
+            offsets[sectorNumber] = len(image)
+            sector = self.sectors.get(sectorNumber)
+            if sector is not None:
+                image += sector.data
+            else:
+                image += bytearray([ERASED_BYTE]) * (self.GetSectorIndexes(sectorNumber)[1] * self.transferSize)
+        return image, offsets
+
+    def CompareWithImage(self, path):
+        '''
+        Compare the programmed sectors with a reference image file, opened with mmap. A missing, unreadable or empty
+        file gives a comparison that reports the image as unavailable.
+        '''
+        try:
+            with open(path, "rb") as imageFile:
+                with mmap.mmap(imageFile.fileno(), 0, access = mmap.ACCESS_READ) as reference:
+                    self.comparison = self.CompareWithBuffer(reference)
+        except (OSError, ValueError) as error:
+            # mmap raises ValueError for an empty file
+            self.comparison = UnavailableImageComparison(getattr(error, "strerror", None) or str(error))
+        return self.comparison
+
+    def CompareWithBuffer(self, reference):
+        matchingSectors = []
+        mismatchedSectors = []
+        missingSectors = []
+        comparedBytes = 0
+        offset = 0
+        for sectorNumber in self.GetSectorNumbers():
+            sector = self.sectors.get(sectorNumber)
+            sectorLength = len(sector.data) if sector is not None else (self.GetSectorIndexes(sectorNumber)[1] * self.transferSize)
+            if (sector is None) or not (self.coverage[sectorNumber] & SECTOR_PROGRAMMED):
+                missingSectors.append(sectorNumber)
+                offset += sectorLength
+                continue
+
+            expected = reference[offset:offset + sectorLength]
+            actual = memoryview(sector.data)[:len(expected)]
+            comparedBytes += len(expected)
+            if (len(expected) == sectorLength) and (actual == expected):
+                matchingSectors.append(sectorNumber)
+            else:
+                mismatch = next((index for index in range(len(expected)) if actual[index] != expected[index]), len(expected))
+                mismatchedSectors.append(SectorMismatch(sectorNumber, offset + mismatch,
+                                                        expected[mismatch] if mismatch < len(expected) else None,
+                                                        sector.data[mismatch] if mismatch < sectorLength else None))
+            offset += sectorLength
+        return ImageComparison(len(reference), comparedBytes, matchingSectors, mismatchedSectors, missingSectors, None)
+
+class FirmwareUpdateTracker:
+    '''
+    Follows programming mode transactions and builds a FirmwareUpdateSession for every update.
+    A sub-command seen outside of a session (capture started during an update) opens one.
+    '''
+    def __init__(self):
+        self.sessions = []
+        self.session = None
+
+    def GetSession(self, time):
+        if self.session is None:
+            self.EnterProgrammingMode(time)
+        return self.session
+
+    def EnterProgrammingMode(self, time):
+        self.session = FirmwareUpdateSession(time)
+        self.sessions.append(self.session)
+
+    def ExitProgrammingMode(self, time):
+        '''
+        Close the current session and return it, or None when no session was open.
+        '''
+        session = self.session
+        if session is not None:
+            session.endTime = time
+        self.session = None
+        return session
+
+    def SubCommandWrite(self, subCommand, record, data, time):
+        '''
+        Track a sub-command write, time being the start of the write.
+        '''
+        session = self.GetSession(time)
+        dataBytes = 0
+        if fwupdate.PROGRAMMING_SUB_COMMAND_PROGRAM == subCommand:
+            dataBytes = max(record.numberOfBytes - PROGRAM_WRITE_HEADER_BYTES, 0)
+            payload = data[PROGRAM_WRITE_DATA_OFFSET:PROGRAM_WRITE_DATA_OFFSET + dataBytes]
+            session.Program(record.sectorNumber, record.sectorIndex, payload)
+            dataBytes = len(payload)
+        phase = PHASE_COMMANDS.get(subCommand)
+        if phase is not None:
+            session.StartOperation(phase, record, time, dataBytes)
+
+    def SubCommandRead(self, subCommand, record, time):
+        '''
+        Track a sub-command status read, time being the end of the read.
+        Returns the OperationLatency of the operation the read completed, None otherwise.
+        '''
+        session = self.GetSession(time)
+        status = getattr(record, "status", None)
+        if status is None:
+            return None
+
+        latency = None
+        pending = session.pendingOperation
+        if (pending is not None) and (PHASE_STATUS_COMMANDS.get(subCommand) == pending.phase):
+            if PROGRAMMING_STATUS_BUSY == status:
+                pending.busyPolls += 1
+                return None
+            latency = session.CompleteOperation(time, status)
+        elif PROGRAMMING_STATUS_BUSY == status:
+            return None
+
+        if PROGRAMMING_STATUS_SUCCESS != status:
+            session.failures.append(SubCommandFailure(time, subCommand, status))
+            return latency
+
+        if fwupdate.PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY == subCommand:
+            session.ApplyGeometry(record)
+        elif fwupdate.PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS == subCommand:
+            session.Erase(record.sectorNumber)
+        elif fwupdate.PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS == subCommand:
+            session.MarkVerified(record.sectorNumber)
+        elif fwupdate.PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS == subCommand:
+            session.imageVerified = True
+        return latency
+
+def GetCoverageString(flags):
+    names = []
+    if flags & SECTOR_ERASED:
+        names.append("Erased")
+    if flags & SECTOR_PROGRAMMED:
+        names.append("Programmed")
+    if flags & SECTOR_VERIFIED:
+        names.append("Verified")
+    return " / ".join(names) if names else "Untouched"
+
+def RenderFirmwareUpdateSession(session):
+    lines = ["Firmware Update Session",
+             FormatLine("Start Time:", session.startTime),
+             FormatLine("End Time:", session.endTime)]
+    for sectorNumber in session.GetSectorNumbers():
+        lines.append(FormatLine("Sector", sectorNumber, "-", GetCoverageString(session.coverage[sectorNumber])))
+    for failure in session.failures:
+        lines.append(FormatLine("Failed", fwupdate.GetSubCommandString(failure.subCommand), "-",
+                                fwupdate.GetProgrammableModeStatusString(failure.status)))
+    if session.imageVerified:
+        lines.append("Image Verified")
+    lines.extend(RenderSessionTiming(session))
+    if session.comparison is not None:
+        lines.extend(RenderImageComparison(session.comparison))
+    return lines
+
+def FormatMilliseconds(seconds):
+    return "{0:.3f} ms".format(seconds * 1000.0)
+
+def RenderSessionTiming(session):
+    duration = session.GetDuration()
+    lines = []
+    if duration is not None:
+        lines.append(FormatLine("Session Duration:", FormatMilliseconds(duration)))
+    phaseTime = 0.0
+    for totals in session.GetPhaseTotals():
+        phaseTime += totals.totalTime
+        lines.append("{0}: {1} Operations, Total {2}, Max {3}, Busy Polls {4}".format(
+            totals.phase, totals.operations, FormatMilliseconds(totals.totalTime), FormatMilliseconds(totals.maxLatency), totals.busyPolls))
+    if duration is not None:
+        lines.append(FormatLine("Other:", FormatMilliseconds(max(duration - phaseTime, 0.0))))
+    for (sectorNumber, phase), latency in sorted(session.GetSectorLatencies().items()):
+        lines.append(FormatLine("Sector", sectorNumber, phase, "Latency:", FormatMilliseconds(latency)))
+    programRate, effectiveRate = session.GetProgramThroughput()
+    if programRate:
+        lines.append("Programming Throughput: {0:.0f} bytes/sec ({1:.0f} bytes/sec over the session)".format(programRate, effectiveRate))
+    return lines
+
+def RenderOperationLatency(latency):
+    return FormatLine(latency.phase, "Latency:", FormatMilliseconds(latency.latency), "- Busy Polls:", latency.busyPolls)
+
+def RenderImageComparison(comparison):
+    if comparison.unavailable is not None:
+        return [FormatLine("Reference Image Unavailable:", comparison.unavailable)]
+    lines = [FormatLine("Reference Image Size:", comparison.imageSize),
+             FormatLine("Compared Bytes:", comparison.comparedBytes),
+             FormatLine("Matching Sectors:", list(comparison.matchingSectors))]
+    for mismatch in comparison.mismatchedSectors:
+        lines.append("Sector {0} Mismatch at Image Offset {1}: Expected {2} Programmed {3}".format(
+            mismatch.sectorNumber, hex(mismatch.offset),
+            "None" if mismatch.expected is None else hex(mismatch.expected),
+            "None" if mismatch.actual is None else hex(mismatch.actual)))
+    if comparison.missingSectors:
+        lines.append(FormatLine("Sectors Not Programmed:", list(comparison.missingSectors)))
+    lines.append("Image Match" if IsImageMatch(comparison) else "Image Mismatch")
+    return lines
+
+def IsImageMatch(comparison):
+    '''
+    True or False, or None when the reference image was unavailable.
+    '''
+    if comparison.unavailable is not None:
+        return None
+    return (not comparison.mismatchedSectors) and (not comparison.missingSectors) and (comparison.comparedBytes == comparison.imageSize)
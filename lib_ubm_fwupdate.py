@@ -12,6 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from collections import namedtuple
+from lib_ubm_render import Decoder, FormatLine, PrintLines
+
 PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY = 0x01
 PROGRAMMING_SUB_COMMAND_ERASE = 0x02
 PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS = 0x03
@@ -25,163 +28,263 @@ PROGRAMMING_SUB_COMMAND_SET_ACTIVE_IMAGE = 0x0A
 PROGRAMMING_SUB_COMMAND_ACTIVE_IMAGE_STATUS = 0x0B
 
 
+EnterProgrammingMode = namedtuple("EnterProgrammingMode", ["programmingAddress", "unlockSequence0", "unlockSequence1", "unlockSequence2", "transferToProgrammingMode"])
+ExitProgrammingMode = namedtuple("ExitProgrammingMode", ["lockSequence0", "lockSequence1", "lockSequence2", "transferToProgrammingMode"])
+
+def DecodeEnterProgrammingModeCommandWrite(data):
+    return EnterProgrammingMode(data[0], data[1], data[2], data[3], data[4]&1)
+
+def RenderEnterProgrammingModeCommandWrite(record):
+    return [FormatLine("2-Wire Programming Address: ", hex(record.programmingAddress)),
+            FormatLine("Unlock Sequence 0:", hex(record.unlockSequence0)),
+            FormatLine("Unlock Sequence 1:", hex(record.unlockSequence1)),
+            FormatLine("Unlock Sequence 2:", hex(record.unlockSequence2)),
+            FormatLine("Transfer to Programming Update Mode Bit: ", record.transferToProgrammingMode)]
+
 def PrintEnterProgrammingModeCommandWrite(data):
-    print("2-Wire Programming Address: ", hex(data[0]))
-    print("Unlock Sequence 0:", hex(data[1]))
-    print("Unlock Sequence 1:", hex(data[2]))
-    print("Unlock Sequence 2:", hex(data[3]))
-    print("Transfer to Programming Update Mode Bit: ", data[4]&1)
+    PrintLines(RenderEnterProgrammingModeCommandWrite(DecodeEnterProgrammingModeCommandWrite(data)))
+
+def DecodeExitProgrammingModeCommandWrite(data):
+    return ExitProgrammingMode(data[0], data[1], data[2], data[3]&1)
+
+def RenderExitProgrammingModeCommandWrite(record):
+    return [FormatLine("Lock Sequence 0:", hex(record.lockSequence0)),
+            FormatLine("Lock Sequence 1:", hex(record.lockSequence1)),
+            FormatLine("Lock Sequence 2:", hex(record.lockSequence2)),
+            FormatLine("Transfer to Programming Update Mode Bit: ", record.transferToProgrammingMode)]
 
 def PrintExitProgrammingModeCommandWrite(data):
-    print("Lock Sequence 0:", hex(data[0]))
-    print("Lock Sequence 1:", hex(data[1]))
-    print("Lock Sequence 2:", hex(data[2]))
-    print("Transfer to Programming Update Mode Bit: ", data[3]&1)
+    PrintLines(RenderExitProgrammingModeCommandWrite(DecodeExitProgrammingModeCommandWrite(data)))
+
+SUB_COMMAND_STRING_DICT = {
+    PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY : "Get NV Geometry",
+    PROGRAMMING_SUB_COMMAND_ERASE : "Erase Sector",
+    PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS : "Get Erase Status",
+    PROGRAMMING_SUB_COMMAND_PROGRAM : "Program Sector",
+    PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS : "Get Program Status",
+    PROGRAMMING_SUB_COMMAND_VERIFY : "Verify Programmed Sector",
+    PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS : "Get Programmed Sector Verify Status",
+    PROGRAMMING_SUB_COMMAND_VERIFY_IMAGE : "Verify Image",
+    PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS : "Get Verify Image Status",
+    PROGRAMMING_SUB_COMMAND_SET_ACTIVE_IMAGE : "Set Active Image",
+    PROGRAMMING_SUB_COMMAND_ACTIVE_IMAGE_STATUS : "Get Active Image Status",
+}
 
 def GetSubCommandString(subCommand):
-    switcher = {
-        PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY : "Get NV Geometry",
-        PROGRAMMING_SUB_COMMAND_ERASE : "Erase Sector",
-        PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS : "Get Erase Status",
-        PROGRAMMING_SUB_COMMAND_PROGRAM : "Program Sector",
-        PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS : "Get Program Status",
-        PROGRAMMING_SUB_COMMAND_VERIFY : "Verify Programmed Sector",
-        PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS : "Get Programmed Sector Verify Status",
-        PROGRAMMING_SUB_COMMAND_VERIFY_IMAGE : "Verify Image",
-        PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS : "Get Verify Image Status",
-        PROGRAMMING_SUB_COMMAND_SET_ACTIVE_IMAGE : "Set Active Image",
-        PROGRAMMING_SUB_COMMAND_ACTIVE_IMAGE_STATUS : "Get Active Image Status",
-    }
-
-    return switcher.get(subCommand, "Unknown")
+    return SUB_COMMAND_STRING_DICT.get(subCommand, "Unknown")
+
+PROGRAMMABLE_MODE_STATUS_STRING_DICT = {
+    0: "Invalid (0)",
+    1: "Success (1)",
+    2: "Image Verify Failed (2)",
+    3: "Unsupported Device (3)",
+    4: "Non-Volatile Location Invalid (4)",
+    5: "Unknown Error (5)",
+    6: "Busy (6)"
+}
+
+# Status text of every status byte value
+PROGRAMMABLE_MODE_STATUS_STRINGS = tuple(PROGRAMMABLE_MODE_STATUS_STRING_DICT.get(status, "Reserved {0}".format(status))
+                                         for status in range(256))
 
 def GetProgrammableModeStatusString(status):
-    switcher = {
-        0: "Invalid (0)",
-        1: "Success (1)",
-        2: "Image Verify Failed (2)",
-        3: "Unsupported Device (3)",
-        4: "Non-Volatile Location Invalid (4)",
-        5: "Unknown Error (5)",
-        6: "Busy (6)"
-    }
-    return switcher.get(status, "Reserved {0}".format(status))
+    return PROGRAMMABLE_MODE_STATUS_STRINGS[status]
+
+SubCommandStatusWrite = namedtuple("SubCommandStatusWrite", ["numberOfBytes"])
+NVGeometry = namedtuple("NVGeometry", ["status", "numberOfDataBytes", "numberOfSectors", "sectorSize", "sectorIndexes"])
+SectorIndexes = namedtuple("SectorIndexes", ["firstIndex", "lastIndex"])
+EraseWrite = namedtuple("EraseWrite", ["numberOfBytes", "sectorNumber", "sectorIndex", "checksum"])
+EraseStatus = namedtuple("EraseStatus", ["status", "numberOfBytes", "sectorNumber", "sectorIndex", "checksum"])
+ProgramWrite = namedtuple("ProgramWrite", ["numberOfBytes", "sectorNumber", "sectorIndex", "sequenceNumber"])
+ProgramStatus = namedtuple("ProgramStatus", ["status", "numberOfBytes", "sequenceNumber"])
+VerifyWrite = namedtuple("VerifyWrite", ["numberOfBytes", "sectorNumber", "sectorIndex"])
+VerifyStatus = namedtuple("VerifyStatus", ["status", "numberOfBytes", "sectorNumber", "sectorIndex"])
+VerifyImageWrite = namedtuple("VerifyImageWrite", ["numberOfBytes", "imageNumber"])
+VerifyImageStatus = namedtuple("VerifyImageStatus", ["status", "numberOfBytes", "imageNumber"])
+
+def DecodeSubCommandStatusWrite(data):
+    return SubCommandStatusWrite(data[1])
+
+def RenderSubCommandStatusWrite(title, record):
+    return [title, FormatLine("Number of Bytes: ", record.numberOfBytes)]
+
+def RenderWriteToNVGeometrySubCommand(record):
+    return RenderSubCommandStatusWrite("Write to NV Geometry Sub-Command", record)
 
 def PrintWriteToNVGeometrySubCommand(data):
-    print("Write to NV Geometry Sub-Command")
-    print("Number of Bytes: ", data[1])
+    PrintLines(RenderWriteToNVGeometrySubCommand(DecodeSubCommandStatusWrite(data)))
 
-def PrintReadFromNVGeometrySubCommand(data):
-    print("Read of NV Geometry Sub-Command")
-    print("Programmable Mode Status: ", GetProgrammableModeStatusString(data[0]))
-    print("Number of Data Bytes: ", data[1])
-    print("Number of Sectors: ", data[2])
+def DecodeReadFromNVGeometrySubCommand(data):
     numSectors = data[2]
-    print("Sector Size: ", data[3])
     offset = 4
-    for sectorIndex in range(0, numSectors):
-        print("Sector {0} First Index {1}".format(sectorIndex, data[offset + sectorIndex*2]))
-        print("Sector {0} Last Index {1}".format(sectorIndex, data[offset + sectorIndex*2 + 1]))
+    sectorIndexes = tuple(SectorIndexes(data[offset + sectorIndex*2], data[offset + sectorIndex*2 + 1]) for sectorIndex in range(0, numSectors))
+    return NVGeometry(data[0], data[1], numSectors, data[3], sectorIndexes)
+
+def RenderReadFromNVGeometrySubCommand(record):
+    lines = ["Read of NV Geometry Sub-Command",
+             FormatLine("Programmable Mode Status: ", GetProgrammableModeStatusString(record.status)),
+             FormatLine("Number of Data Bytes: ", record.numberOfDataBytes),
+             FormatLine("Number of Sectors: ", record.numberOfSectors),
+             FormatLine("Sector Size: ", record.sectorSize)]
+    for sectorIndex, indexes in enumerate(record.sectorIndexes):
+        lines.append("Sector {0} First Index {1}".format(sectorIndex, indexes.firstIndex))
+        lines.append("Sector {0} Last Index {1}".format(sectorIndex, indexes.lastIndex))
+    return lines
+
+def PrintReadFromNVGeometrySubCommand(data):
+    PrintLines(RenderReadFromNVGeometrySubCommand(DecodeReadFromNVGeometrySubCommand(data)))
+
+def DecodeWriteToEraseSubCommand(data):
+    return EraseWrite(data[1], data[2], data[3], data[4])
+
+def RenderWriteToEraseSubCommand(record):
+    return ["Write to Erase Sub-Command",
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Sector Number: ", record.sectorNumber),
+            FormatLine("Sector Index: ", record.sectorIndex),
+            FormatLine("Checksum: ", hex(record.checksum))]
 
 def PrintWriteToEraseSubCommand(data):
-    print("Write to Erase Sub-Command")
-    print("Number of Bytes: ", data[1])
-    print("Sector Number: ", data[2])
-    print("Sector Index: ", data[3])
-    print("Checksum: ", hex(data[4]))
+    PrintLines(RenderWriteToEraseSubCommand(DecodeWriteToEraseSubCommand(data)))
+
+def RenderWriteToGetEraseStatusSubCommand(record):
+    return RenderSubCommandStatusWrite("Write to Get Erase Status Sub-Command", record)
 
 def PrintWriteToGetEraseStatusSubCommand(data):
-    print("Write to Get Erase Status Sub-Command")
-    print("Number of Bytes: ", data[1])
+    PrintLines(RenderWriteToGetEraseStatusSubCommand(DecodeSubCommandStatusWrite(data)))
+
+def DecodeReadFromGetEraseStatusSubCommand(data):
+    return EraseStatus(data[0], data[1], data[2], data[3], data[4])
+
+def RenderReadFromGetEraseStatusSubCommand(record):
+    return ["Read From Get Erase Status Sub-Command",
+            FormatLine("Programmable Mode Status: ", GetProgrammableModeStatusString(record.status)),
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Sector Number: ", record.sectorNumber),
+            FormatLine("Sector Index: ", record.sectorIndex),
+            FormatLine("Checksum: ", hex(record.checksum))]
 
 def PrintReadFromGetEraseStatusSubCommand(data):
-    print("Read From Get Erase Status Sub-Command")
-    print("Programmable Mode Status: ", GetProgrammableModeStatusString(data[0]))
-    print("Number of Bytes: ", data[1])
-    print("Sector Number: ", data[2])
-    print("Sector Index: ", data[3])
-    print("Checksum: ", hex(data[4]))
+    PrintLines(RenderReadFromGetEraseStatusSubCommand(DecodeReadFromGetEraseStatusSubCommand(data)))
+
+def DecodeWriteToProgramSubCommand(data):
+    return ProgramWrite(data[1], data[2], data[3], data[4])
+
+def RenderWriteToProgramSubCommand(record):
+    return ["Write to Program Sub-Command",
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Sector Number: ", record.sectorNumber),
+            FormatLine("Sector Index: ", record.sectorIndex),
+            FormatLine("Application Seuqence Number: ", record.sequenceNumber)]
 
 def PrintWriteToProgramSubCommand(data):
-    print("Write to Program Sub-Command")
-    print("Number of Bytes: ", data[1])
-    print("Sector Number: ", data[2])
-    print("Sector Index: ", data[3])
-    print("Application Seuqence Number: ", data[4])
+    PrintLines(RenderWriteToProgramSubCommand(DecodeWriteToProgramSubCommand(data)))
+
+def RenderWriteToGetProgramStatusSubCommand(record):
+    return RenderSubCommandStatusWrite("Write to Get Program Status Sub-Command", record)
 
 def PrintWriteToGetProgramStatusSubCommand(data):
-    print("Write to Get Program Status Sub-Command")
-    print("Number of Bytes: ", data[1])
+    PrintLines(RenderWriteToGetProgramStatusSubCommand(DecodeSubCommandStatusWrite(data)))
+
+def DecodeReadFromGetProgramStatusSubCommand(data):
+    return ProgramStatus(data[0], data[1], data[2])
+
+def RenderReadFromGetProgramStatusSubCommand(record):
+    return ["Read from Get Program Status Sub-Command",
+            FormatLine("Programmable Mode Status: ", GetProgrammableModeStatusString(record.status)),
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Application Seuqence Number: ", record.sequenceNumber)]
 
 def PrintReadFromGetProgramStatusSubCommand(data):
-    print("Read from Get Program Status Sub-Command")
-    print("Programmable Mode Status: ", GetProgrammableModeStatusString(data[0]))
-    print("Number of Bytes: ", data[1])
-    print("Application Seuqence Number: ", data[2])
+    PrintLines(RenderReadFromGetProgramStatusSubCommand(DecodeReadFromGetProgramStatusSubCommand(data)))
+
+def DecodeWriteToVerifySubCommand(data):
+    return VerifyWrite(data[1], data[2], data[3])
+
+def RenderWriteToVerifySubCommand(record):
+    return ["Write to Verify Sub-Command",
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Sector Number: ", record.sectorNumber),
+            FormatLine("Sector Index: ", record.sectorIndex)]
 
 def PrintWriteToVerifySubCommand(data):
-    print("Write to Verify Sub-Command")
-    print("Number of Bytes: ", data[1])
-    print("Sector Number: ", data[2])
-    print("Sector Index: ", data[3])
+    PrintLines(RenderWriteToVerifySubCommand(DecodeWriteToVerifySubCommand(data)))
+
+def RenderWriteToGetVerifyStatusSubCommand(record):
+    return RenderSubCommandStatusWrite("Write to Get Verify Status Sub-Command", record)
 
 def PrintWriteToGetVerifyStatusSubCommand(data):
-    print("Write to Get Verify Status Sub-Command")
-    print("Number of Bytes: ", data[1])
+    PrintLines(RenderWriteToGetVerifyStatusSubCommand(DecodeSubCommandStatusWrite(data)))
+
+def DecodeReadFromGetVerifyStatusSubCommand(data):
+    return VerifyStatus(data[0], data[1], data[2], data[3])
+
+def RenderReadFromGetVerifyStatusSubCommand(record):
+    return ["Read from Get Verify Status Sub-Command",
+            FormatLine("Programmable Mode Status: ", GetProgrammableModeStatusString(record.status)),
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Sector Number: ", record.sectorNumber),
+            FormatLine("Sector Index: ", record.sectorIndex)]
 
 def PrintReadFromGetVerifyStatusSubCommand(data):
-    print("Read from Get Verify Status Sub-Command")
-    print("Programmable Mode Status: ", GetProgrammableModeStatusString(data[0]))
-    print("Number of Bytes: ", data[1])
-    print("Sector Number: ", data[2])
-    print("Sector Index: ", data[3])
+    PrintLines(RenderReadFromGetVerifyStatusSubCommand(DecodeReadFromGetVerifyStatusSubCommand(data)))
+
+def DecodeWriteToVerifyImageSubCommand(data):
+    return VerifyImageWrite(data[1], data[2])
+
+def RenderWriteToVerifyImageSubCommand(record):
+    return ["Write to Verify Image Sub-Command",
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Image Number: ", record.imageNumber)]
 
 def PrintWriteToVerifyImageSubCommand(data):
-    print("Write to Verify Image Sub-Command")
-    print("Number of Bytes: ", data[1])
-    print("Image Number: ", data[2])
+    PrintLines(RenderWriteToVerifyImageSubCommand(DecodeWriteToVerifyImageSubCommand(data)))
+
+def RenderWriteToGetVerifyImageStatusSubCommand(record):
+    return RenderSubCommandStatusWrite("Write to Get Verify Image Status Sub-Command", record)
 
 def PrintWriteToGetVerifyImageStatusSubCommand(data):
-    print("Write to Get Verify Image Status Sub-Command")
-    print("Number of Bytes: ", data[1])
+    PrintLines(RenderWriteToGetVerifyImageStatusSubCommand(DecodeSubCommandStatusWrite(data)))
+
+def DecodeReadFromGetImageVerifyStatusSubCommand(data):
+    return VerifyImageStatus(data[0], data[1], data[2])
+
+def RenderReadFromGetImageVerifyStatusSubCommand(record):
+    return ["Read from Get Image Verify Status Sub-Command",
+            FormatLine("Programmable Mode Status: ", GetProgrammableModeStatusString(record.status)),
+            FormatLine("Number of Bytes: ", record.numberOfBytes),
+            FormatLine("Image Number: ", record.imageNumber)]
 
 def PrintReadFromGetImageVerifyStatusSubCommand(data):
-    print("Read from Get Image Verify Status Sub-Command")
-    print("Programmable Mode Status: ", GetProgrammableModeStatusString(data[0]))
-    print("Number of Bytes: ", data[1])
-    print("Image Number: ", data[2])
+    PrintLines(RenderReadFromGetImageVerifyStatusSubCommand(DecodeReadFromGetImageVerifyStatusSubCommand(data)))
+
+# Sub-command registries used to dispatch Program Mode Data Transfer writes and reads in a single lookup
+PROGRAMMING_SUB_COMMAND_WRITE_DECODERS = {
+    PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY : Decoder(DecodeSubCommandStatusWrite, RenderWriteToNVGeometrySubCommand),
+    PROGRAMMING_SUB_COMMAND_ERASE : Decoder(DecodeWriteToEraseSubCommand, RenderWriteToEraseSubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS : Decoder(DecodeSubCommandStatusWrite, RenderWriteToGetEraseStatusSubCommand),
+    PROGRAMMING_SUB_COMMAND_PROGRAM : Decoder(DecodeWriteToProgramSubCommand, RenderWriteToProgramSubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS : Decoder(DecodeSubCommandStatusWrite, RenderWriteToGetProgramStatusSubCommand),
+    PROGRAMMING_SUB_COMMAND_VERIFY : Decoder(DecodeWriteToVerifySubCommand, RenderWriteToVerifySubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS : Decoder(DecodeSubCommandStatusWrite, RenderWriteToGetVerifyStatusSubCommand),
+    PROGRAMMING_SUB_COMMAND_VERIFY_IMAGE : Decoder(DecodeWriteToVerifyImageSubCommand, RenderWriteToVerifyImageSubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS : Decoder(DecodeSubCommandStatusWrite, RenderWriteToGetVerifyImageStatusSubCommand),
+}
 
+PROGRAMMING_SUB_COMMAND_READ_DECODERS = {
+    PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY : Decoder(DecodeReadFromNVGeometrySubCommand, RenderReadFromNVGeometrySubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS : Decoder(DecodeReadFromGetEraseStatusSubCommand, RenderReadFromGetEraseStatusSubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS : Decoder(DecodeReadFromGetProgramStatusSubCommand, RenderReadFromGetProgramStatusSubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS : Decoder(DecodeReadFromGetVerifyStatusSubCommand, RenderReadFromGetVerifyStatusSubCommand),
+    PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS : Decoder(DecodeReadFromGetImageVerifyStatusSubCommand, RenderReadFromGetImageVerifyStatusSubCommand),
+}
 
 def PrintProgrammingModeSubCommandWrite(data):
-    subCommand = data[0]
-    if PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY == subCommand:
-        PrintWriteToNVGeometrySubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_ERASE == subCommand:
-        PrintWriteToEraseSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS == subCommand:
-        PrintWriteToGetEraseStatusSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_PROGRAM == subCommand:
-        PrintWriteToProgramSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS == subCommand:
-        PrintWriteToGetProgramStatusSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_VERIFY == subCommand:
-        PrintWriteToVerifySubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS == subCommand:
-        PrintWriteToGetVerifyStatusSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_VERIFY_IMAGE == subCommand:
-        PrintWriteToVerifyImageSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS == subCommand:
-        PrintWriteToGetVerifyImageStatusSubCommand(data)
+    decoder = PROGRAMMING_SUB_COMMAND_WRITE_DECODERS.get(data[0])
+    if decoder is not None:
+        PrintLines(decoder.render(decoder.decode(data)))
 
 def PrintProgrammingModeSubCommandRead(subCommand, data):
-    
-    if PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY == subCommand:
-        PrintReadFromNVGeometrySubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS == subCommand:
-        PrintReadFromGetEraseStatusSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS == subCommand:
-        PrintReadFromGetProgramStatusSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS == subCommand:
-        PrintReadFromGetVerifyStatusSubCommand(data)
-    elif PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS == subCommand:
-        PrintReadFromGetImageVerifyStatusSubCommand(data)
\ No newline at end of file
+    decoder = PROGRAMMING_SUB_COMMAND_READ_DECODERS.get(subCommand)
+    if decoder is not None:
+        PrintLines(decoder.render(decoder.decode(data)))
@@ -0,0 +1,110 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Streaming bus utilization metrics per UBM opcode and for the UBM FRU, in constant memory.
+from array import array
+from collections import namedtuple
+from lib_ubm_render import FormatLine
+
+# Keys 0-255 are the UBM controller opcodes, the FRU gets its own key
+METRICS_FRU_KEY = 256
+METRICS_KEYS = 257
+
+# Inter-arrival histogram: bucket 0 is below 1 us, bucket n covers [2^(n-1), 2^n) us, the last bucket is open ended
+HISTOGRAM_BUCKETS = 28
+HISTOGRAM_BUCKET_LABELS = tuple(["<1us"] + ["<{0}us".format(1 << bucket) for bucket in range(1, HISTOGRAM_BUCKETS - 1)] +
+                                [">={0}us".format(1 << (HISTOGRAM_BUCKETS - 2))])
+
+OpcodeMetrics = namedtuple("OpcodeMetrics", ["key", "transactions", "bytes", "busTime", "transactionsPerSecond", "busShare",
+                                             "histogram"])
+
+def GetHistogramBucket(seconds):
+    microseconds = int(seconds * 1000000.0)
+    if microseconds <= 0:
+        return 0
+    return min(microseconds.bit_length(), HISTOGRAM_BUCKETS - 1)
+
+class BusMetrics:
+    '''
+    Transactions, bytes, bus time and an inter-arrival time histogram per key, in fixed-size arrays.
+
+    Times are kept as float seconds relative to the first transaction, so GraphTime values are only ever subtracted.
+    '''
+    __slots__ = ('origin', 'lastEnd', 'transactions', 'bytes', 'busTime', 'lastStart', 'histograms')
+
+    def __init__(self):
+        self.origin = None
+        self.lastEnd = 0.0
+        self.transactions = array('Q', bytes(8 * METRICS_KEYS))
+        self.bytes = array('Q', bytes(8 * METRICS_KEYS))
+        self.busTime = array('d', bytes(8 * METRICS_KEYS))
+        self.lastStart = array('d', [-1.0]) * METRICS_KEYS
+        self.histograms = array('Q', bytes(8 * METRICS_KEYS * HISTOGRAM_BUCKETS))
+
+    def Add(self, key, startTime, endTime, byteCount):
+        if self.origin is None:
+            self.origin = startTime
+        start = float(startTime - self.origin)
+        end = float(endTime - self.origin)
+
+        lastStart = self.lastStart[key]
+        if lastStart >= 0.0:
+            self.histograms[key * HISTOGRAM_BUCKETS + GetHistogramBucket(start - lastStart)] += 1
+        self.lastStart[key] = start
+        self.transactions[key] += 1
+        self.bytes[key] += byteCount
+        self.busTime[key] += end - start
+        if end > self.lastEnd:
+            self.lastEnd = end
+
+    def GetCaptureTime(self):
+        '''
+        Seconds from the start of the first transaction to the end of the last one.
+        '''
+        return self.lastEnd
+
+    def GetMetrics(self, key):
+        captureTime = self.GetCaptureTime()
+        histogram = tuple(self.histograms[key * HISTOGRAM_BUCKETS:(key + 1) * HISTOGRAM_BUCKETS])
+        return OpcodeMetrics(key, self.transactions[key], self.bytes[key], self.busTime[key],
+                             self.transactions[key] / captureTime if captureTime else 0.0,
+                             self.busTime[key] / captureTime if captureTime else 0.0,
+                             histogram)
+
+    def GetActiveMetrics(self):
+        return [self.GetMetrics(key) for key in range(METRICS_KEYS) if self.transactions[key]]
+
+    def GetBusShare(self):
+        captureTime = self.GetCaptureTime()
+        return sum(self.busTime) / captureTime if captureTime else 0.0
+
+def GetMetricsKeyString(key, getCommandString):
+    if METRICS_FRU_KEY == key:
+        return "UBM FRU"
+    return "{0} ({1})".format(getCommandString(key), hex(key))
+
+def RenderHistogram(histogram):
+    return ", ".join(["{0}: {1}".format(HISTOGRAM_BUCKET_LABELS[bucket], count) for bucket, count in enumerate(histogram) if count])
+
+def RenderBusMetrics(metrics, getCommandString):
+    lines = ["Bus Utilization",
+             FormatLine("Capture Time:", "{0:.6f} s".format(metrics.GetCaptureTime())),
+             FormatLine("Bus Busy:", "{0:.2f} %".format(metrics.GetBusShare() * 100.0))]
+    for opcodeMetrics in metrics.GetActiveMetrics():
+        lines.append("{0}: {1} Transactions, {2:.1f} /sec, {3} Bytes, {4:.2f} % Bus Time".format(
+            GetMetricsKeyString(opcodeMetrics.key, getCommandString), opcodeMetrics.transactions,
+            opcodeMetrics.transactionsPerSecond, opcodeMetrics.bytes, opcodeMetrics.busShare * 100.0))
+        if any(opcodeMetrics.histogram):
+            lines.append(FormatLine("  Inter-arrival:", RenderHistogram(opcodeMetrics.histogram)))
+    return lines
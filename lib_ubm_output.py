@@ -0,0 +1,154 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import queue
+import sys
+import threading
+import time
+
+VERBOSITY_OFF = 0
+VERBOSITY_SUMMARY = 1
+VERBOSITY_FULL = 2
+
+VERBOSITY_CHOICES = {
+    "Full": VERBOSITY_FULL,
+    "Summary": VERBOSITY_SUMMARY,
+    "Off": VERBOSITY_OFF,
+}
+
+DROPPED_LINES_NOTICE = "{0} lines dropped: the terminal could not keep up"
+
+def GetVerbosity(choice):
+    return VERBOSITY_CHOICES.get(choice, VERBOSITY_FULL)
+
+class BufferedTerminalSink:
+    '''
+    Collects terminal lines into batches and writes them from a background thread.
+
+    Batches are handed to the writer thread through a bounded queue. When the queue is full the
+    batch is dropped and counted in droppedLines instead of blocking the decoder, unless the sink
+    was created with dropWhenFull = False (used for offline decoding, where every line is wanted).
+    Lines still pending when the decoder goes idle are written by the writer thread after flushInterval.
+    Dropped lines are reported with a notice line when the decoder goes idle and when the sink is closed.
+    '''
+    def __init__(self, stream = None, batchLines = 256, maxQueuedBatches = 64, flushInterval = 0.1, dropWhenFull = True):
+        self.stream = stream if stream is not None else sys.stdout
+        self.batchLines = batchLines
+        self.flushInterval = flushInterval
+        self.dropWhenFull = dropWhenFull
+        self.pending = []
+        self.lock = threading.Lock()
+        self.lastFlush = time.monotonic()
+        self.droppedLines = 0
+        self.reportedDroppedLines = 0
+        self.writtenLines = 0
+        self.closedByWriter = False
+        self.queue = queue.Queue(maxsize = maxQueuedBatches)
+        self.thread = threading.Thread(target = self.WriterThread, name = "UBM terminal sink", daemon = True)
+        self.thread.start()
+
+    def Write(self, lines):
+        with self.lock:
+            self.pending.extend(lines)
+            if (len(self.pending) >= self.batchLines) or ((time.monotonic() - self.lastFlush) >= self.flushInterval):
+                self.FlushPending()
+
+    def Flush(self):
+        with self.lock:
+            self.FlushPending()
+
+    def FlushPending(self):
+        '''
+        Queue the pending lines, with the lock held. Batches are only queued with the lock held.
+        '''
+        self.lastFlush = time.monotonic()
+        if not self.pending:
+            return
+        batch = self.pending
+        self.pending = []
+        if not self.dropWhenFull:
+            self.queue.put(batch)
+            return
+        try:
+            self.queue.put_nowait(batch)
+        except queue.Full:
+            self.droppedLines += len(batch)
+
+    def TakeIdlePending(self):
+        '''
+        Return the pending lines if nothing is queued ahead of them, so the writer keeps the line order.
+        The lock is only tried: a decoder holding it is not idle, and may be waiting in FlushPending for the writer
+        to make room in the queue.
+        '''
+        if not self.lock.acquire(blocking = False):
+            return None
+        try:
+            if not self.queue.empty():
+                return None
+            self.AddDroppedNotice()
+            if not self.pending:
+                return None
+            batch = self.pending
+            self.pending = []
+            self.lastFlush = time.monotonic()
+            return batch
+        finally:
+            self.lock.release()
+
+    def AddDroppedNotice(self):
+        '''
+        Put a notice of the lines dropped since the last one in front of the pending lines, with the lock held.
+        '''
+        dropped = self.droppedLines - self.reportedDroppedLines
+        if dropped:
+            self.reportedDroppedLines = self.droppedLines
+            self.pending.insert(0, DROPPED_LINES_NOTICE.format(dropped))
+
+    def Close(self):
+        '''
+        Flush pending lines and wait for the writer thread to write everything queued.
+        '''
+        if not self.thread.is_alive():
+            return
+        if threading.current_thread() is self.thread:
+            # Garbage collection ran the close of a dropped analyzer on the writer thread, which cannot wait for
+            # itself (and may hold the lock): it stops on its own once everything is written
+            self.closedByWriter = True
+            return
+        with self.lock:
+            self.AddDroppedNotice()
+            batch = self.pending
+            self.pending = []
+        # The last batch waits for room in the queue instead of being dropped
+        if batch:
+            self.queue.put(batch)
+        self.queue.put(None)
+        self.thread.join()
+
+    def WriterThread(self):
+        while 1:
+            try:
+                batch = self.queue.get(timeout = self.flushInterval)
+            except queue.Empty:
+                batch = self.TakeIdlePending()
+                if batch is None:
+                    if self.closedByWriter:
+                        return
+                    continue
+            if batch is None:
+                return
+            batch.append("")
+            self.stream.write("\n".join(batch))
+            self.stream.flush()
+            self.writtenLines += len(batch) - 1
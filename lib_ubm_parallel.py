@@ -0,0 +1,197 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Parallel decoding of one large capture, with output identical to a serial replay.
+#
+# 1. Split: the capture is cut into chunks at I2C stop conditions. Worker processes run the I2C state machine over
+#    their chunk and write the transactions to a temporary file.
+# 2. Context: the parent walks the transactions with Hla.AdvanceContext, which only maintains the cross-transaction
+#    context (access counts, lastCommand/lastSubCommand, DFC index, Read Checksum Creation, DFC slot mapping and
+#    discovered controllers), and takes a DecodeContext at every chunk boundary. A chunk that starts while a
+#    controller is in programming mode is merged with the previous one, so firmware update sessions are never split.
+# 3. Decode: worker processes decode the merged chunks from their starting context. Terminal output goes to one
+#    file per unit, which the parent writes out in capture order.
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import lib_ubm_replay as replay
+from lib_ubm_fwsession import IsImageMatch
+from lib_ubm_output import BufferedTerminalSink
+
+# Chunks per worker, so a worker that finishes early picks up more work
+CHUNKS_PER_JOB = 4
+MIN_CHUNK_BYTES = 1 << 20
+
+# Transaction file record: start time, end time, address, read flag, data length, transaction length (including the
+# bytes the command filter skipped) and write phase length, followed by the data bytes
+TRANSACTION_RECORD = struct.Struct("<ddBBIII")
+
+ChunkResult = namedtuple("ChunkResult", ["path", "frames", "transactions"])
+UnitResult = namedtuple("UnitResult", ["outputPath", "frames", "checksumsChecked", "checksumErrors", "cacheHits",
+                                       "cacheMisses", "cacheEvictions", "imageMatches"])
+ParallelStats = namedtuple("ParallelStats", ["replay", "chunks", "units", "checksumsChecked", "checksumErrors",
+                                             "cacheHits", "cacheMisses", "cacheEvictions", "imageMatches"])
+
+def GetChunkOffsets(layout, chunkCount):
+    dataBytes = layout.size - layout.dataStart
+    return [layout.dataStart + (dataBytes * chunk) // chunkCount for chunk in range(chunkCount)] + [layout.size]
+
+def ExtractTransactions(capturePath, chunk, chunkCount, settings, directory):
+    '''
+    Run the I2C state machine over one chunk of the capture and write its transactions to a file. Runs in a worker process.
+    With auto discovery the controllers are not known yet, so every address is kept and filtered in the later passes.
+    The command filter needs the command context, so it is applied when the transactions are decoded.
+    '''
+    layout = replay.GetCaptureLayout(capturePath)
+    offsets = GetChunkOffsets(layout, chunkCount)
+    start = replay.FindStopBoundary(capturePath, layout, offsets[chunk])
+    end = replay.FindStopBoundary(capturePath, layout, offsets[chunk + 1]) if chunk + 1 < chunkCount else layout.size
+
+    analyzer = replay.CreateAnalyzer(**dict(settings, verbosity = "Off", transactionStore = "Off", commandFilter = ""))
+    if analyzer.autoDiscover:
+        analyzer.addressFilter = bytearray([1]) * len(analyzer.addressFilter)
+    stateMachine = analyzer.I2CFrameStateMachine
+    frames = 0
+    transactions = 0
+    path = os.path.join(directory, "chunk{0:06d}.bin".format(chunk))
+    with open(path, "wb") as transactionFile:
+        for frame in replay.ReadCaptureRange(capturePath, layout, start, end):
+            frames += 1
+            i2c_frame = stateMachine(frame)
+            if i2c_frame is None:
+                continue
+            transactionFile.write(TRANSACTION_RECORD.pack(i2c_frame.start_time, i2c_frame.end_time, i2c_frame.address,
+                                                          i2c_frame.read, len(i2c_frame.data), i2c_frame.length,
+                                                          i2c_frame.writeLength))
+            transactionFile.write(i2c_frame.data)
+            transactions += 1
+    return ChunkResult(path, frames, transactions)
+
+def ReadTransactions(path):
+    '''
+    Yield the transactions of a file written by ExtractTransactions as SaleaeFrames.
+    '''
+    from HighLevelAnalyzer import SaleaeFrame
+
+    if not os.path.getsize(path):
+        return
+    with open(path, "rb") as transactionFile:
+        with mmap.mmap(transactionFile.fileno(), 0, access = mmap.ACCESS_READ) as view:
+            offset = 0
+            size = len(view)
+            while offset < size:
+                startTime, endTime, address, isRead, dataLength, length, writeLength = TRANSACTION_RECORD.unpack_from(view, offset)
+                offset += TRANSACTION_RECORD.size
+                yield SaleaeFrame(start_time = startTime, end_time = endTime, data = bytearray(view[offset:offset + dataLength]),
+                                  read = bool(isRead), address = address, writeLength = writeLength,
+                                  length = length)
+                offset += dataLength
+
+def GetChunkContexts(chunkPaths, settings):
+    '''
+    Walk the transactions with Hla.AdvanceContext and return the DecodeContext at the start of every chunk.
+    '''
+    analyzer = replay.CreateAnalyzer(**dict(settings, verbosity = "Off", transactionStore = "Off"))
+    contexts = []
+    for path in chunkPaths:
+        contexts.append(analyzer.GetContext())
+        for i2c_frame in ReadTransactions(path):
+            if analyzer.addressFilter[i2c_frame.address]:
+                analyzer.AdvanceContext(i2c_frame)
+    return contexts
+
+def GroupChunks(chunkPaths, contexts):
+    '''
+    Group the chunks into decode units that start outside of programming mode.
+    Returns a list of (chunk paths, starting DecodeContext).
+    '''
+    units = []
+    for path, context in zip(chunkPaths, contexts):
+        if units and any(controller.programmingMode for controller in context.controllers.values()):
+            units[-1][0].append(path)
+        else:
+            units.append(([path], context))
+    return units
+
+def DecodeUnit(chunkPaths, context, settings, outputPath):
+    '''
+    Decode the transactions of consecutive chunks from their starting context. Runs in a worker process.
+    '''
+    analyzer = replay.CreateAnalyzer(**dict(settings, transactionStore = "Off"))
+    analyzer.SetContext(context)
+    frames = 0
+    with open(outputPath, "w") as outputFile:
+        if analyzer.output is not None:
+            analyzer.SetOutputSink(BufferedTerminalSink(outputFile, dropWhenFull = False))
+        decodeTransaction = analyzer.DecodeTransaction
+        addressFilter = analyzer.addressFilter
+        for path in chunkPaths:
+            for i2c_frame in ReadTransactions(path):
+                if not addressFilter[i2c_frame.address]:
+                    continue
+                out = decodeTransaction(i2c_frame)
+                if out is None:
+                    continue
+                frames += len(out) if isinstance(out, list) else 1
+        analyzer.CloseOutput()
+
+    cacheStats = analyzer.GetDecodeCacheStats()
+    imageMatches = tuple((session.startTime, IsImageMatch(session.comparison)) for session in analyzer.GetFirmwareUpdateSessions()
+                         if session.comparison is not None)
+    return UnitResult(outputPath, frames, analyzer.checksumsChecked, analyzer.GetChecksumErrors(), cacheStats.hits,
+                      cacheStats.misses, cacheStats.evictions, imageMatches)
+
+def GetChunkCount(path, jobs):
+    size = os.path.getsize(path)
+    return max(1, min(jobs * CHUNKS_PER_JOB, size // MIN_CHUNK_BYTES))
+
+def RunParallelReplay(path, settings, jobs = None, output = None, chunkCount = None):
+    '''
+    Decode one capture in a process pool (one worker per core by default), write the terminal output to output
+    (sys.stdout by default) in capture order and return a ParallelStats.
+    Changes only emission, the NumPy export and the bus metrics need the whole capture in one analyzer and are not supported.
+    '''
+    output = output if output is not None else sys.stdout
+    jobs = jobs or os.cpu_count() or 1
+    chunkCount = chunkCount or GetChunkCount(path, jobs)
+    stats = replay.ReplayStats()
+    startTime = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix = "ubm_parallel_") as directory, ProcessPoolExecutor(max_workers = jobs) as executor:
+        chunks = list(executor.map(ExtractTransactions, [path] * chunkCount, range(chunkCount), [chunkCount] * chunkCount,
+                                   [settings] * chunkCount, [directory] * chunkCount))
+        chunkPaths = [chunk.path for chunk in chunks]
+        units = GroupChunks(chunkPaths, GetChunkContexts(chunkPaths, settings))
+        outputPaths = [os.path.join(directory, "output{0:06d}.txt".format(unit)) for unit in range(len(units))]
+        results = list(executor.map(DecodeUnit, [unit[0] for unit in units], [unit[1] for unit in units],
+                                    [settings] * len(units), outputPaths))
+        for result in results:
+            with open(result.outputPath) as outputFile:
+                shutil.copyfileobj(outputFile, output)
+        output.flush()
+
+    stats.frames = sum([chunk.frames for chunk in chunks])
+    stats.transactions = sum([result.frames for result in results])
+    stats.seconds = time.perf_counter() - startTime
+    return ParallelStats(stats, chunkCount, len(units),
+                         sum([result.checksumsChecked for result in results]), sum([result.checksumErrors for result in results]),
+                         sum([result.cacheHits for result in results]), sum([result.cacheMisses for result in results]),
+                         sum([result.cacheEvictions for result in results]),
+                         tuple(imageMatch for result in results for imageMatch in result.imageMatches))
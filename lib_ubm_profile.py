@@ -0,0 +1,95 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Per-stage decode profiling: monotonic clock accumulators and call counts around the stages of Hla.decode.
+import time
+from collections import namedtuple
+
+StageTime = namedtuple("StageTime", ["name", "calls", "seconds", "share"])
+
+OTHER_STAGE = "Other"
+
+class StageProfiler:
+    '''
+    Accumulates the time spent in wrapped functions per stage name. The first stage is the total that the
+    other stages are part of. Stages may run inside each other (a decoder called from formatting): the time of
+    a nested stage is only counted in the nested stage, so the stages never count the same time twice.
+    '''
+    __slots__ = ('names', 'seconds', 'calls', 'nested')
+
+    def __init__(self):
+        self.names = []
+        self.seconds = []
+        self.calls = []
+        # Time spent in wrapped functions called by the function running now
+        self.nested = [0.0]
+
+    def GetStage(self, name):
+        if name in self.names:
+            return self.names.index(name)
+        self.names.append(name)
+        self.seconds.append(0.0)
+        self.calls.append(0)
+        return len(self.names) - 1
+
+    def Wrap(self, name, function):
+        '''
+        Return function wrapped in the accumulators of stage name. Functions wrapped with the same name share a stage.
+        '''
+        stage = self.GetStage(name)
+        seconds = self.seconds
+        calls = self.calls
+        nested = self.nested
+        clock = time.perf_counter
+
+        def Profiled(*args):
+            outer = nested[0]
+            nested[0] = 0.0
+            startTime = clock()
+            try:
+                return function(*args)
+            finally:
+                elapsed = clock() - startTime
+                seconds[stage] += elapsed - nested[0]
+                calls[stage] += 1
+                nested[0] = outer + elapsed
+        return Profiled
+
+    def Reset(self):
+        for stage in range(len(self.names)):
+            self.seconds[stage] = 0.0
+            self.calls[stage] = 0
+
+    def GetStageTimes(self):
+        '''
+        Return a StageTime per stage, the total first, followed by the time of the total not covered by any stage.
+        '''
+        if not self.names:
+            return []
+        # Every stage holds its own time only, the total stage the time not covered by any other stage
+        total = sum(self.seconds)
+        other = self.seconds[0]
+        stages = [StageTime(self.names[0], self.calls[0], total, 1.0 if total else 0.0)]
+        stages.extend(StageTime(name, self.calls[stage], self.seconds[stage], self.seconds[stage] / total if total else 0.0)
+                      for stage, name in enumerate(self.names[1:], 1))
+        stages.append(StageTime(OTHER_STAGE, self.calls[0], other, other / total if total else 0.0))
+        return stages
+
+def RenderProfile(stageTimes):
+    lines = ["{0:<26} {1:>10} {2:>11} {3:>9} {4:>7}".format("Stage", "Calls", "Total ms", "us/call", "Share")]
+    for stageTime in stageTimes:
+        lines.append("{0:<26} {1:>10} {2:>11.3f} {3:>9.2f} {4:>6.1f}%".format(
+            stageTime.name, stageTime.calls, stageTime.seconds * 1000.0,
+            stageTime.seconds * 1000000.0 / stageTime.calls if stageTime.calls else 0.0, stageTime.share * 100.0))
+    return lines
@@ -0,0 +1,153 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Declarative register layouts. A register is a list of byte layouts, each a list of bit fields (name, bit range,
+# render label and enum labels). Every byte layout is compiled at import time into 256-entry tables that map a byte
+# value to its field values and rendered lines, so decoding or rendering a register byte is one indexed load.
+# NumPy is optional: only the batch decode of many registers at once needs it.
+from collections import namedtuple
+from itertools import chain
+from operator import getitem
+from lib_ubm_render import FormatLine
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BYTE_VALUES = 256
+
+BitField = namedtuple("BitField", ["name", "lsb", "width", "label", "labels", "default"])
+
+def Field(name, lsb, width = 1, label = None, labels = None, default = None):
+    '''
+    Bit field of a register byte. label is printed in front of the value, labels maps a value to its text: a dict
+    (default for values it does not name) or a function such as hex. A field with labels and no label renders as
+    the text alone, a field with neither is not rendered.
+    '''
+    return BitField(name, lsb, width, label, labels, default)
+
+def ByteField(name, label = None, labels = None, default = None):
+    return Field(name, 0, 8, label, labels, default)
+
+def GetFieldText(field, value):
+    if field.labels is None:
+        return value
+    if callable(field.labels):
+        return field.labels(value)
+    return field.labels.get(value, field.default)
+
+def RenderField(field, value):
+    if field.label is not None:
+        return FormatLine(field.label, GetFieldText(field, value))
+    if field.labels is not None:
+        return GetFieldText(field, value)
+    return None
+
+def GetFieldNames(layout):
+    return [field.name for field in layout.fields]
+
+class ByteLayout:
+    '''
+    Compiled layout of one register byte: values[byte] is the tuple of field values and lines[byte] the rendered
+    lines of a byte value. The text of every field value is rendered once and shared between the byte values.
+    '''
+    __slots__ = ('fields', 'values', 'lines')
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        masks = [(1 << field.width) - 1 for field in self.fields]
+        fieldLines = [tuple(RenderField(field, value) for value in range(1 << field.width)) for field in self.fields]
+        self.values = tuple(tuple((byte >> field.lsb) & mask for field, mask in zip(self.fields, masks))
+                            for byte in range(BYTE_VALUES))
+        self.lines = tuple(tuple(line for line in map(getitem, fieldLines, values) if line is not None)
+                           for values in self.values)
+
+    def Encode(self, values):
+        '''
+        Return the byte value of decoded field values (reserved bits clear).
+        '''
+        byte = 0
+        for field, value in zip(self.fields, values):
+            byte |= value << field.lsb
+        return byte
+
+    def Render(self, values):
+        return self.lines[self.Encode(values)]
+
+    def RenderFields(self, record):
+        '''
+        Render the fields of this layout, looked up by name in a record that also has other fields.
+        '''
+        return self.Render([getattr(record, field.name) for field in self.fields])
+
+class Register:
+    '''
+    Compiled layout of consecutive register bytes. record is the namedtuple of all fields in byte and layout order
+    (created in module, so records pickle). Records of single byte registers are built for every byte value up front.
+    '''
+    __slots__ = ('layouts', 'record', 'values', 'offsets', 'records')
+
+    def __init__(self, name, module, layouts):
+        self.layouts = tuple(ByteLayout(fields) for fields in layouts)
+        self.record = namedtuple(name, [name for layout in self.layouts for name in GetFieldNames(layout)], module = module)
+        self.values = tuple(layout.values for layout in self.layouts)
+        self.offsets = [0]
+        for layout in self.layouts:
+            self.offsets.append(self.offsets[-1] + len(layout.fields))
+        self.records = None
+        if 1 == len(self.layouts):
+            self.records = tuple(self.record._make(values) for values in self.layouts[0].values)
+
+    def Decode(self, data):
+        '''
+        Decode the register from the first bytes of data. Raises IndexError if data is too short.
+        '''
+        if len(data) < len(self.layouts):
+            raise IndexError("{0} needs {1} bytes".format(self.record.__name__, len(self.layouts)))
+        return self.record._make(chain.from_iterable(map(getitem, self.values, data)))
+
+    def DecodeByte(self, byte):
+        return self.records[byte]
+
+    def DecodeColumns(self, data):
+        '''
+        Decode N registers at once from an N x (at least) register size array of bytes, e.g. the descriptor column
+        of exported transactions. Returns a record of uint8 arrays of length N, one per field, computed with
+        vectorized shifts and masks.
+        '''
+        if np is None:
+            raise ImportError("NumPy is required to decode registers in batches")
+        data = np.asarray(data, dtype = np.uint8)
+        if (2 != data.ndim) or (data.shape[1] < len(self.layouts)):
+            raise ValueError("{0} needs an N x {1} array of bytes".format(self.record.__name__, len(self.layouts)))
+        columns = []
+        for index, layout in enumerate(self.layouts):
+            byte = np.ascontiguousarray(data[:, index])
+            for field in layout.fields:
+                if 8 == field.width:
+                    columns.append(byte)
+                else:
+                    columns.append((byte >> field.lsb) & ((1 << field.width) - 1))
+        return self.record._make(columns)
+
+    def Render(self, record, start = 0, stop = None):
+        '''
+        Return the rendered lines of the register bytes start to stop of a record.
+        '''
+        lines = []
+        offsets = self.offsets
+        for index, layout in enumerate(self.layouts[start:stop], start):
+            lines.extend(layout.Render(record[offsets[index]:offsets[index + 1]]))
+        return lines
@@ -0,0 +1,62 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Shared helpers for the decode/render split used by the lib_ubm_* modules.
+# Decode* functions return namedtuple records of the parsed fields, Render* functions turn a record
+# into a list of text lines, and the Print* functions print the rendered lines.
+from collections import namedtuple
+
+# Pair of functions used by the command registries: decode(data) -> record, render(record) -> lines
+Decoder = namedtuple("Decoder", ["decode", "render"])
+
+FRAME_FIELD_TYPES = (int, str, bool, float, bytes)
+
+FieldChange = namedtuple("FieldChange", ["name", "previous", "current"])
+
+def FormatLine(*args):
+    '''
+    Join arguments the same way print() does.
+    '''
+    return " ".join([str(arg) for arg in args])
+
+def PrintLines(lines):
+    for line in lines:
+        print(line)
+
+def RecordFields(record):
+    '''
+    Return the scalar fields of a record as a dict suitable for AnalyzerFrame data.
+    Nested records and tuples are skipped.
+    '''
+    if record is None:
+        return {}
+    return {name: value for name, value in zip(record._fields, record) if isinstance(value, FRAME_FIELD_TYPES)}
+
+def DiffRecords(previous, current):
+    '''
+    Return the scalar fields that differ between two records of the same type as a list of FieldChange.
+    '''
+    if (previous is None) or (current is None):
+        return []
+    changes = []
+    for name, previousValue, currentValue in zip(current._fields, previous, current):
+        if (previousValue != currentValue) and isinstance(currentValue, FRAME_FIELD_TYPES):
+            changes.append(FieldChange(name, previousValue, currentValue))
+    return changes
+
+def RenderChanges(changes):
+    lines = ["Changed Fields:"]
+    for change in changes:
+        lines.append(FormatLine("  ", change.name + ":", change.previous, "->", change.current))
+    return lines
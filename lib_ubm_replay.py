@@ -0,0 +1,398 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Offline replay of exported I2C analyzer data through Hla.decode without the Logic 2 GUI.
+# Captures are streamed through generators, so memory use does not grow with the capture size.
+#
+# Usage: python lib_ubm_replay.py capture.csv --address 0x55
+#        python lib_ubm_replay.py capture.csv --convert capture.ubmf
+import argparse
+import csv
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+import lib_saleae_standin
+from lib_ubm_fwsession import IsImageMatch
+from lib_ubm_output import BufferedTerminalSink
+
+lib_saleae_standin.Install()
+
+FRAME_TYPE_START = 0
+FRAME_TYPE_ADDRESS = 1
+FRAME_TYPE_DATA = 2
+FRAME_TYPE_STOP = 3
+
+FRAME_TYPE_NAMES = ("start", "address", "data", "stop")
+FRAME_TYPE_CODES = {name: code for code, name in enumerate(FRAME_TYPE_NAMES)}
+
+FRAME_FLAG_ACK = (1<<0)
+FRAME_FLAG_READ = (1<<1)
+
+# Compact binary frame format: a magic/version header followed by fixed size records of
+# frame type, flags, address or data value, start time and end time (seconds).
+BINARY_MAGIC = b"UBMF\x01"
+BINARY_RECORD = struct.Struct("<BBBdd")
+BINARY_RECORDS_PER_READ = 4096
+
+BYTE_VALUES = [bytes([value]) for value in range(256)]
+
+class ReplayFrame:
+    '''
+    Frame with the same attributes as the frames the Saleae I2C analyzer passes to Hla.decode.
+    '''
+    __slots__ = ('type', 'start_time', 'end_time', 'data')
+
+    def __init__(self, type, start_time, end_time, data):
+        self.type = type
+        self.start_time = start_time
+        self.end_time = end_time
+        self.data = data
+
+def MakeFrame(frameType, startTime, endTime, value = 0, ack = True, read = False):
+    if FRAME_TYPE_ADDRESS == frameType:
+        data = {"address": BYTE_VALUES[value], "read": read, "ack": ack}
+    elif FRAME_TYPE_DATA == frameType:
+        data = {"data": BYTE_VALUES[value], "ack": ack}
+    else:
+        data = {}
+    return ReplayFrame(FRAME_TYPE_NAMES[frameType], startTime, endTime, data)
+
+def ParseCSVBool(text):
+    return text.strip().lower() in ("true", "1", "ack", "read")
+
+def ParseCSVInt(text):
+    text = text.strip()
+    if not text:
+        return 0
+    return int(text, 0)
+
+CSVColumns = namedtuple("CSVColumns", ["type", "start", "duration", "ack", "address", "read", "data"])
+
+def GetCSVColumns(headerRow):
+    header = [name.strip().strip('"').lower() for name in headerRow]
+    return CSVColumns(header.index("type"), header.index("start_time"), header.index("duration"),
+                      header.index("ack") if "ack" in header else None,
+                      header.index("address"), header.index("read"), header.index("data"))
+
+def ParseCSVRow(row, columns):
+    '''
+    Return the frame of an I2C analyzer CSV row, or None for empty rows and unknown frame types.
+    '''
+    if not row:
+        return None
+    frameType = FRAME_TYPE_CODES.get(row[columns.type].strip())
+    if frameType is None:
+        return None
+    startTime = float(row[columns.start])
+    endTime = startTime + float(row[columns.duration])
+    ack = ParseCSVBool(row[columns.ack]) if columns.ack is not None else True
+    if FRAME_TYPE_ADDRESS == frameType:
+        return MakeFrame(frameType, startTime, endTime, ParseCSVInt(row[columns.address]), ack, ParseCSVBool(row[columns.read]))
+    elif FRAME_TYPE_DATA == frameType:
+        return MakeFrame(frameType, startTime, endTime, ParseCSVInt(row[columns.data]), ack)
+    return MakeFrame(frameType, startTime, endTime)
+
+def ReadSaleaeCSV(path):
+    '''
+    Yield frames from a Logic 2 I2C analyzer CSV export.
+
+    Columns are located by header name (type, start_time, duration, ack, address, read, data), so
+    exports with extra or reordered columns are accepted.
+    '''
+    with open(path, newline = '') as csvFile:
+        reader = csv.reader(csvFile)
+        columns = GetCSVColumns(next(reader))
+        for row in reader:
+            frame = ParseCSVRow(row, columns)
+            if frame is not None:
+                yield frame
+
+def ReadBinaryFrames(path):
+    '''
+    Yield frames from a file written by WriteBinaryFrames.
+    '''
+    with open(path, "rb") as binaryFile:
+        if binaryFile.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError("{0} is not a UBM binary frame file".format(path))
+        while 1:
+            block = binaryFile.read(BINARY_RECORD.size * BINARY_RECORDS_PER_READ)
+            if not block:
+                return
+            usable = len(block) - (len(block) % BINARY_RECORD.size)
+            for frameType, flags, value, startTime, endTime in BINARY_RECORD.iter_unpack(block[:usable]):
+                yield MakeFrame(frameType, startTime, endTime, value, bool(flags & FRAME_FLAG_ACK), bool(flags & FRAME_FLAG_READ))
+
+def WriteBinaryFrames(frames, path):
+    '''
+    Write frames in the compact binary format. Returns the number of frames written.
+    '''
+    count = 0
+    with open(path, "wb") as binaryFile:
+        binaryFile.write(BINARY_MAGIC)
+        for frame in frames:
+            frameType = FRAME_TYPE_CODES[frame.type]
+            flags = 0
+            value = 0
+            if frame.data.get("ack", True):
+                flags |= FRAME_FLAG_ACK
+            if FRAME_TYPE_ADDRESS == frameType:
+                value = frame.data["address"][0]
+                if frame.data["read"]:
+                    flags |= FRAME_FLAG_READ
+            elif FRAME_TYPE_DATA == frameType:
+                value = frame.data["data"][0]
+            binaryFile.write(BINARY_RECORD.pack(frameType, flags, value, frame.start_time, frame.end_time))
+            count += 1
+    return count
+
+def FormatCSVBool(value):
+    return "true" if value else "false"
+
+def WriteSaleaeCSV(frames, path):
+    '''
+    Write frames as a Logic 2 I2C analyzer CSV export. Returns the number of frames written.
+    '''
+    count = 0
+    with open(path, "w", newline = '') as csvFile:
+        writer = csv.writer(csvFile)
+        writer.writerow(["name", "type", "start_time", "duration", "ack", "address", "read", "data"])
+        for frame in frames:
+            row = ["I2C", frame.type, repr(frame.start_time), repr(frame.end_time - frame.start_time), "", "", "", ""]
+            if "address" == frame.type:
+                row[4:7] = [FormatCSVBool(frame.data["ack"]), hex(frame.data["address"][0]), FormatCSVBool(frame.data["read"])]
+            elif "data" == frame.type:
+                row[4] = FormatCSVBool(frame.data["ack"])
+                row[7] = hex(frame.data["data"][0])
+            writer.writerow(row)
+            count += 1
+    return count
+
+def ReadCapture(path):
+    '''
+    Yield frames from a capture export, choosing the reader from the file contents.
+    '''
+    with open(path, "rb") as captureFile:
+        magic = captureFile.read(len(BINARY_MAGIC))
+    if magic == BINARY_MAGIC:
+        return ReadBinaryFrames(path)
+    return ReadSaleaeCSV(path)
+
+# Byte layout of a capture file, used to split it into chunks that are read independently
+CaptureLayout = namedtuple("CaptureLayout", ["binary", "dataStart", "size", "columns"])
+
+def GetCaptureLayout(path):
+    with open(path, "rb") as captureFile:
+        if captureFile.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            return CaptureLayout(True, len(BINARY_MAGIC), os.path.getsize(path), None)
+        captureFile.seek(0)
+        header = captureFile.readline()
+        columns = GetCSVColumns(next(csv.reader([header.decode()])))
+        return CaptureLayout(False, captureFile.tell(), os.path.getsize(path), columns)
+
+def FindStopBoundary(path, layout, offset):
+    '''
+    Return the file offset just after the first stop frame that starts at or after offset (for CSV exports:
+    in the first complete line after offset), or the file size if there is none. The I2C state machine is
+    idle after every stop condition, so a capture can be decoded in chunks that start at these offsets.
+    '''
+    if offset <= layout.dataStart:
+        return layout.dataStart
+    with open(path, "rb") as captureFile:
+        if layout.binary:
+            records = -(-(offset - layout.dataStart) // BINARY_RECORD.size)
+            captureFile.seek(layout.dataStart + records * BINARY_RECORD.size)
+            while 1:
+                record = captureFile.read(BINARY_RECORD.size)
+                if len(record) < BINARY_RECORD.size:
+                    return layout.size
+                if FRAME_TYPE_STOP == record[0]:
+                    return captureFile.tell()
+
+        captureFile.seek(offset)
+        captureFile.readline()
+        while 1:
+            line = captureFile.readline()
+            if not line:
+                return layout.size
+            row = next(csv.reader([line.decode()]))
+            if row and ("stop" == row[layout.columns.type].strip()):
+                return captureFile.tell()
+
+def ReadCSVLines(csvFile, end):
+    while csvFile.tell() < end:
+        line = csvFile.readline()
+        if not line:
+            return
+        yield line.decode()
+
+def ReadCaptureRange(path, layout, start, end):
+    '''
+    Yield the frames stored between the file offsets start and end (offsets returned by FindStopBoundary).
+    '''
+    with open(path, "rb") as captureFile:
+        captureFile.seek(start)
+        if not layout.binary:
+            for row in csv.reader(ReadCSVLines(captureFile, end)):
+                frame = ParseCSVRow(row, layout.columns)
+                if frame is not None:
+                    yield frame
+            return
+
+        remaining = end - start
+        while remaining > 0:
+            block = captureFile.read(min(BINARY_RECORD.size * BINARY_RECORDS_PER_READ, remaining))
+            if not block:
+                return
+            remaining -= len(block)
+            usable = len(block) - (len(block) % BINARY_RECORD.size)
+            for frameType, flags, value, startTime, endTime in BINARY_RECORD.iter_unpack(block[:usable]):
+                yield MakeFrame(frameType, startTime, endTime, value, bool(flags & FRAME_FLAG_ACK), bool(flags & FRAME_FLAG_READ))
+
+def CreateAnalyzer(**settings):
+    '''
+    Create a Hla the way Logic 2 does: settings are assigned to the instance before __init__ runs.
+    Settings that are not given use the stand-in default for that setting type.
+    '''
+    from HighLevelAnalyzer import Hla
+
+    analyzer = Hla.__new__(Hla)
+    for name, setting in vars(Hla).items():
+        if isinstance(setting, lib_saleae_standin.Setting):
+            setattr(analyzer, name, settings.get(name, lib_saleae_standin.GetSettingDefault(setting)))
+    analyzer.__init__()
+    return analyzer
+
+def Replay(frames, analyzer):
+    '''
+    Feed frames through analyzer.decode and yield every AnalyzerFrame it returns.
+    '''
+    decode = analyzer.decode
+    for frame in frames:
+        out = decode(frame)
+        if out is None:
+            continue
+        if isinstance(out, list):
+            yield from out
+        else:
+            yield out
+
+class ReplayStats:
+    __slots__ = ('frames', 'transactions', 'seconds')
+
+    def __init__(self):
+        self.frames = 0
+        self.transactions = 0
+        self.seconds = 0.0
+
+    def FramesPerSecond(self):
+        return self.frames / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return "{0} frames, {1} transactions in {2:.3f} s ({3:.0f} frames/sec)".format(
+            self.frames, self.transactions, self.seconds, self.FramesPerSecond())
+
+def CountFrames(frames, stats):
+    for frame in frames:
+        stats.frames += 1
+        yield frame
+
+def RunReplay(path, analyzer):
+    '''
+    Decode a whole capture file and return a ReplayStats.
+    '''
+    stats = ReplayStats()
+    startTime = time.perf_counter()
+    for _ in Replay(CountFrames(ReadCapture(path), stats), analyzer):
+        stats.transactions += 1
+    analyzer.CloseOutput()
+    stats.seconds = time.perf_counter() - startTime
+    return stats
+
+def PrintCacheStats(hits, misses, evictions):
+    print("Decode cache: {0} hits, {1} misses, {2} evictions".format(hits, misses, evictions), file = sys.stderr)
+
+IMAGE_MATCH_STRING_DICT = {True: "Image Match", False: "Image Mismatch", None: "Reference Image Unavailable"}
+
+def PrintImageMatch(startTime, imageMatch):
+    print("Firmware update at {0}: {1}".format(startTime, IMAGE_MATCH_STRING_DICT[imageMatch]), file = sys.stderr)
+
+def RunParallel(args):
+    import lib_ubm_parallel
+
+    if args.export or args.metrics or args.profile or ("Changes only" == args.emission):
+        print("--export, --metrics, --profile and --changes-only need a serial replay (--jobs 1)", file = sys.stderr)
+        return 2
+    settings = {"ubmAddress": args.address, "verbosity": args.verbosity, "referenceImage": args.reference_image,
+                "commandFilter": args.filter}
+    stats = lib_ubm_parallel.RunParallelReplay(args.capture, settings, args.jobs or None)
+    print("{0} ({1} chunks in {2} units)".format(stats.replay, stats.chunks, stats.units), file = sys.stderr)
+    PrintCacheStats(stats.cacheHits, stats.cacheMisses, stats.cacheEvictions)
+    print("Checksum errors: {0} of {1} checked".format(stats.checksumErrors, stats.checksumsChecked), file = sys.stderr)
+    for startTime, imageMatch in stats.imageMatches:
+        PrintImageMatch(startTime, imageMatch)
+    return 0
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Decode an exported I2C capture with the UBM High Level Analyzer.")
+    parser.add_argument("capture", help = "Saleae I2C CSV export or UBM binary frame file")
+    parser.add_argument("--address", default = "0x55", help = "7-bit UBM Controller Addresses in hex format: 0x55, 0x55,0x56, 0x50-0x56 and/or auto")
+    parser.add_argument("--verbosity", choices = ("Full", "Summary", "Off"), default = "Full", help = "terminal output level")
+    parser.add_argument("--quiet", action = "store_const", dest = "verbosity", const = "Off", help = "same as --verbosity Off")
+    parser.add_argument("--changes-only", action = "store_const", dest = "emission", const = "Changes only", default = "All transactions",
+                        help = "only emit reads whose decoded content changed since the previous read of the same register")
+    parser.add_argument("--export", metavar = "NPY", help = "also export the decoded transactions to a NumPy .npy file")
+    parser.add_argument("--reference-image", default = "", help = "firmware image to compare firmware update sessions against")
+    parser.add_argument("--filter", default = "", help = "decode only these commands: opcodes in hex, dfc, firmware, sub:0x03, addr:0x55")
+    parser.add_argument("--metrics", action = "store_true", help = "print bus utilization metrics per command to stderr")
+    parser.add_argument("--convert", metavar = "OUTPUT", help = "write the capture in the binary frame format instead of decoding it")
+    parser.add_argument("--profile", action = "store_true", help = "print the time spent per decode stage to stderr")
+    parser.add_argument("--jobs", type = int, default = 1,
+                        help = "decode the capture in chunks in this many worker processes (0: one per core)")
+    args = parser.parse_args(argv)
+
+    if args.convert:
+        count = WriteBinaryFrames(ReadCapture(args.capture), args.convert)
+        print("Wrote {0} frames to {1}".format(count, args.convert), file = sys.stderr)
+        return 0
+
+    if 1 != args.jobs:
+        return RunParallel(args)
+
+    analyzer = CreateAnalyzer(ubmAddress = args.address, verbosity = args.verbosity, emission = args.emission,
+                              referenceImage = args.reference_image, profiling = "On" if args.profile else "Off",
+                              commandFilter = args.filter)
+    if "Off" != args.verbosity:
+        # Offline decoding wants every line, so the sink blocks instead of dropping when it falls behind
+        analyzer.SetOutputSink(BufferedTerminalSink(sys.stdout, dropWhenFull = False))
+    if args.export:
+        analyzer.SetExportFile(args.export)
+    stats = RunReplay(args.capture, analyzer)
+    print(stats, file = sys.stderr)
+    cacheStats = analyzer.GetDecodeCacheStats()
+    PrintCacheStats(cacheStats.hits, cacheStats.misses, cacheStats.evictions)
+    print("Checksum errors: {0} of {1} checked".format(analyzer.GetChecksumErrors(), analyzer.checksumsChecked), file = sys.stderr)
+    if args.metrics:
+        print("\n".join(analyzer.RenderBusMetrics()), file = sys.stderr)
+    if args.profile:
+        print("\n".join(analyzer.RenderProfile()), file = sys.stderr)
+    for session in analyzer.GetFirmwareUpdateSessions():
+        if session.comparison is not None:
+            PrintImageMatch(session.startTime, IsImageMatch(session.comparison))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
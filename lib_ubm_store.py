@@ -0,0 +1,157 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+# Stored in the signed columns when a transaction has no sub-command, DFC index or status
+NO_VALUE = -1
+
+STATUS_BUSY = 6
+
+# startTime and endTime are seconds relative to the store origin
+Transaction = namedtuple("Transaction", ["row", "startTime", "endTime", "address", "opcode", "subCommand", "dfcIndex",
+                                         "isRead", "status", "accessCount", "length"])
+
+INDEXED_COLUMNS = ("address", "opcode", "subCommand", "dfcIndex", "status")
+
+class TransactionStore:
+    '''
+    Append-only store of decoded transactions, kept as array-backed columns.
+
+    Transactions must be appended in start time order, which keeps the start and end time columns sorted
+    for bisect range queries. Each indexed column has a secondary index mapping a value to the sorted
+    array of rows holding it.
+
+    Times are kept as float seconds relative to the start of the first transaction (origin), so GraphTime values
+    are only ever subtracted. Query bounds are GraphTime values as well.
+    '''
+    __slots__ = ('origin', 'startTimes', 'endTimes', 'addresses', 'opcodes', 'subCommands', 'dfcIndexes', 'reads', 'statuses',
+                 'accessCounts', 'lengths', 'indexes')
+
+    def __init__(self):
+        self.origin = None
+        self.startTimes = array('d')
+        self.endTimes = array('d')
+        self.addresses = array('B')
+        self.opcodes = array('B')
+        self.subCommands = array('h')
+        self.dfcIndexes = array('h')
+        self.reads = array('B')
+        self.statuses = array('h')
+        self.accessCounts = array('L')
+        self.lengths = array('H')
+        self.indexes = {name: {} for name in INDEXED_COLUMNS}
+
+    def __len__(self):
+        return len(self.startTimes)
+
+    def Append(self, startTime, endTime, address, opcode, subCommand, dfcIndex, isRead, status, accessCount, length):
+        if self.origin is None:
+            self.origin = startTime
+        endTime = float(endTime - self.origin)
+        startTime = float(startTime - self.origin)
+        if self.startTimes and (startTime < self.startTimes[-1]):
+            raise ValueError("Transactions must be appended in start time order")
+        row = len(self.startTimes)
+        self.startTimes.append(startTime)
+        self.endTimes.append(endTime)
+        self.addresses.append(address)
+        self.opcodes.append(opcode)
+        self.subCommands.append(subCommand)
+        self.dfcIndexes.append(dfcIndex)
+        self.reads.append(isRead)
+        self.statuses.append(status)
+        self.accessCounts.append(accessCount)
+        self.lengths.append(min(length, 0xFFFF))
+
+        for name, value in (("address", address), ("opcode", opcode), ("subCommand", subCommand),
+                            ("dfcIndex", dfcIndex), ("status", status)):
+            if NO_VALUE == value:
+                continue
+            rows = self.indexes[name].get(value)
+            if rows is None:
+                rows = self.indexes[name][value] = array('L')
+            rows.append(row)
+        return row
+
+    def GetRowRange(self, startTime = None, endTime = None):
+        '''
+        Rows [first, last) of the transactions starting within [startTime, endTime].
+        '''
+        if self.origin is None:
+            return 0, 0
+        first = 0 if startTime is None else bisect_left(self.startTimes, float(startTime - self.origin))
+        last = len(self.startTimes) if endTime is None else bisect_right(self.startTimes, float(endTime - self.origin))
+        return first, last
+
+    def Query(self, startTime = None, endTime = None, isRead = None, **criteria):
+        '''
+        Return the rows of the transactions starting within [startTime, endTime] that match every criteria,
+        e.g. Query(t0, t1, opcode = 0x40, dfcIndex = 5, isRead = False).
+        Criteria are the indexed columns: address, opcode, subCommand, dfcIndex and status.
+        '''
+        for name in criteria:
+            if name not in self.indexes:
+                raise KeyError("{0} is not an indexed column".format(name))
+        first, last = self.GetRowRange(startTime, endTime)
+        if first >= last:
+            return []
+
+        # Walk the smallest index within the time range and check the other criteria against their columns
+        candidates = None
+        for name, value in criteria.items():
+            rows = self.indexes[name].get(value)
+            if rows is None:
+                return []
+            rows = rows[bisect_left(rows, first):bisect_left(rows, last)]
+            if (candidates is None) or (len(rows) < len(candidates)):
+                candidates = rows
+        if candidates is None:
+            candidates = range(first, last)
+
+        checks = [(self.GetColumn(name), value) for name, value in criteria.items()]
+        if isRead is not None:
+            checks.append((self.reads, int(isRead)))
+        return [row for row in candidates if all(column[row] == value for column, value in checks)]
+
+    def GetColumn(self, name):
+        return {
+            "address": self.addresses,
+            "opcode": self.opcodes,
+            "subCommand": self.subCommands,
+            "dfcIndex": self.dfcIndexes,
+            "status": self.statuses,
+        }[name]
+
+    def GetOrigin(self):
+        '''
+        Start time of the first transaction, the time the stored times are relative to.
+        '''
+        return self.origin
+
+    def GetTransaction(self, row):
+        return Transaction(row, self.startTimes[row], self.endTimes[row], self.addresses[row], self.opcodes[row],
+                           self.subCommands[row], self.dfcIndexes[row], bool(self.reads[row]), self.statuses[row],
+                           self.accessCounts[row], self.lengths[row])
+
+    def GetTransactions(self, rows):
+        return [self.GetTransaction(row) for row in rows]
+
+    def GetBusyStatuses(self, startTime = None, endTime = None):
+        '''
+        Rows of the Busy status reads (Last Command Status or programming mode status).
+        '''
+        return self.Query(startTime, endTime, status = STATUS_BUSY)
@@ -0,0 +1,403 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Synthetic UBM traffic: Saleae I2C analyzer frame streams for every UBM controller command, UBM FRU reads and complete
+# firmware update sessions, with a configurable traffic mix and error injection. Streams are seeded, so the same
+# settings always produce the same frames.
+#
+# Usage: python lib_ubm_synth.py traffic.ubmf --transactions 100000
+#        python lib_ubm_synth.py traffic.csv --mix dfc_poll=10,operational_state=1 --checksum-errors 0.01
+import argparse
+import random
+import sys
+from collections import namedtuple
+
+import lib_ubm_replay as replay
+import lib_ubm_commands as ubm
+import lib_ubm_fwupdate as fwupdate
+from lib_ubm_fwsession import PROGRAMMING_STATUS_SUCCESS, PROGRAMMING_STATUS_BUSY
+from HighLevelAnalyzer import FRU_ADDRESS
+
+# I2C timing: every address or data byte takes 9 clocks (8 bits and ACK)
+DEFAULT_BUS_HZ = 100000
+CLOCKS_PER_BYTE = 9
+CONDITION_TIME = 5e-6
+DEFAULT_TRANSACTION_GAP = 100e-6
+
+# Firmware image geometry of the generated firmware update sessions
+DEFAULT_SECTORS = 2
+DEFAULT_INDEXES_PER_SECTOR = 4
+DEFAULT_TRANSFER_SIZE = 16
+
+PROGRAMMING_STATUS_FAILURES = (2, 3, 4, 5)
+ENTER_UNLOCK_SEQUENCE = [0x55, 0xAA, 0x55, 0xAA, 1]
+EXIT_LOCK_SEQUENCE = [0xAA, 0x55, 0xAA, 0]
+
+# Probabilities per transaction: corrupted response checksum, NACKed address, transaction cut short by a stop
+# condition, and failing programming mode status
+ErrorRates = namedtuple("ErrorRates", ["checksum", "nack", "truncate", "status"])
+NO_ERRORS = ErrorRates(0.0, 0.0, 0.0, 0.0)
+
+def Checksum(data):
+    return ubm.CalulateReadChecksum(data)
+
+def FRUChecksum(data):
+    return 0xFF & -sum(data)
+
+def BuildFRUImage(ubmAddresses, dfcCount):
+    '''
+    UBM FRU image with an IPMI common header, a UBM Overview record and a Port Route Info record that spreads
+    dfcCount DFCs over the UBM controllers.
+    '''
+    commonHeader = [1, 0, 0, 0, 0, 1, 0]
+    commonHeader.append(FRUChecksum(commonHeader))
+
+    overview = [0x11, 0x45, 0x0A, 0x01, 0x03, dfcCount, dfcCount, dfcCount, 25, 0x80]
+    portRoute = []
+    for dfcIndex in range(dfcCount):
+        ubmAddress = ubmAddresses[dfcIndex % len(ubmAddresses)]
+        portRoute += [ubmAddress << 1, dfcIndex // len(ubmAddresses), 0x32, 0x02, 0x6F, 0x01, dfcIndex]
+
+    image = list(commonHeader)
+    for recordType, body, eol in ((0xA0, overview, 0), (0xA1, portRoute, 0x80)):
+        header = [recordType, 0x02 | eol, len(body), FRUChecksum(body)]
+        header.append(FRUChecksum(header))
+        image += header + body
+    return image
+
+class TrafficGenerator:
+    '''
+    Builds the frames of UBM transactions on a simulated bus clock. Every traffic type method returns a list of
+    transactions, each a list of frames from the start to the stop condition.
+    '''
+    def __init__(self, ubmAddresses = (0x55,), seed = 0, busHz = DEFAULT_BUS_HZ, transactionGap = DEFAULT_TRANSACTION_GAP,
+                 errors = NO_ERRORS, dfcCount = 8, sectors = DEFAULT_SECTORS, indexesPerSector = DEFAULT_INDEXES_PER_SECTOR,
+                 transferSize = DEFAULT_TRANSFER_SIZE):
+        self.ubmAddresses = list(ubmAddresses)
+        self.random = random.Random(seed)
+        self.byteTime = CLOCKS_PER_BYTE / busHz
+        self.transactionGap = transactionGap
+        self.errors = errors
+        self.dfcCount = dfcCount
+        self.sectors = sectors
+        self.indexesPerSector = indexesPerSector
+        self.transferSize = transferSize
+        self.image = bytes(self.random.randrange(256) for _ in range(sectors * indexesPerSector * transferSize))
+        self.changeCount = 0
+        self.time = 0.0
+
+    def Frame(self, frameType, duration, value = 0, ack = True, read = False):
+        frame = replay.MakeFrame(frameType, self.time, self.time + duration, value, ack, read)
+        self.time += duration
+        return frame
+
+    def Chance(self, rate):
+        return rate and (self.random.random() < rate)
+
+    def Transfer(self, address, write = None, read = None):
+        '''
+        Frames of one transaction: an optional write, then (after a repeated start) an optional read.
+        '''
+        segments = []
+        if write is not None:
+            segments.append((False, write))
+        if read is not None:
+            segments.append((True, read))
+        # An empty last segment (e.g. a quick write) has nothing to truncate
+        if segments and segments[-1][1] and self.Chance(self.errors.truncate):
+            isRead, data = segments[-1]
+            segments[-1] = (isRead, data[:self.random.randrange(len(data))])
+
+        frames = []
+        for isRead, data in segments:
+            frames.append(self.Frame(replay.FRAME_TYPE_START, CONDITION_TIME))
+            if self.Chance(self.errors.nack):
+                frames.append(self.Frame(replay.FRAME_TYPE_ADDRESS, self.byteTime, address, False, isRead))
+                break
+            frames.append(self.Frame(replay.FRAME_TYPE_ADDRESS, self.byteTime, address, True, isRead))
+            for value in data:
+                frames.append(self.Frame(replay.FRAME_TYPE_DATA, self.byteTime, value))
+        frames.append(self.Frame(replay.FRAME_TYPE_STOP, CONDITION_TIME))
+        self.time += self.transactionGap
+        return frames
+
+    def Response(self, payload):
+        response = [len(payload)] + payload
+        checksum = Checksum(response)
+        if self.Chance(self.errors.checksum):
+            checksum ^= self.random.randrange(1, 256)
+        return response + [checksum]
+
+    def GetAddress(self):
+        return self.random.choice(self.ubmAddresses)
+
+    def Read(self, cmd, payload, address = None):
+        return [self.Transfer(address if address is not None else self.GetAddress(), [cmd], self.Response(payload))]
+
+    def Write(self, cmd, data, address = None):
+        write = [cmd] + data
+        return [self.Transfer(address if address is not None else self.GetAddress(), write + [Checksum(write)])]
+
+    def Byte(self):
+        return self.random.randrange(256)
+
+    def OperationalState(self):
+        return self.Read(ubm.GET_OPERATION_STATE, [self.random.choice((ubm.OPERATIONAL_STATE_READY,) * 8 + (ubm.OPERATIONAL_STATE_BUSY,))])
+
+    def LastCommandStatus(self):
+        return self.Read(ubm.GET_LAST_COMMAND_STATUS, [self.random.choice(list(ubm.LAST_COMMAND_STATUS_STRING_DICT))])
+
+    def SiliconIdentity(self):
+        return self.Read(ubm.GET_SILICON_IDENTITY, [0x11, 0x55, 0x10, 0, 0x01, 0x02, 0x03, 0x04, 0, 0, 2, 1, self.Byte(), self.Byte()])
+
+    def UpdateCapabilities(self):
+        return self.Read(ubm.GET_UPDATE_CAPABILITIES, [self.random.randrange(4)])
+
+    def HFCInfo(self):
+        return self.Read(ubm.GET_HFC_INFO, [self.Byte()])
+
+    def BackplaneInfo(self):
+        return self.Read(ubm.GET_BACKPLANE_INFO, [self.Byte()])
+
+    def StartingSlot(self):
+        return self.Read(ubm.GET_STARTING_SLOT, [self.random.randrange(32)])
+
+    def Capabilities(self):
+        return self.Read(ubm.GET_CAPABILITIES, [self.Byte(), self.Byte() & 0x1F])
+
+    def Features(self):
+        # Read Checksum Creation (bit 0) stays enabled, so responses keep their checksum
+        return self.Read(ubm.GET_FEATURES, [self.Byte() | 1, self.Byte() & 1])
+
+    def FeaturesWrite(self):
+        return self.Write(ubm.GET_FEATURES, [self.Byte() | 1, self.Byte() & 1])
+
+    def ChangeCount(self):
+        return self.Read(ubm.GET_CHANGE_COUNT, [self.changeCount, self.random.choice((ubm.NO_CHANGE_SOURCE, ubm.DRIVE_TYPE_INSTALL_CHANGE_SOURCE,
+                                                                                    ubm.PCIE_RESET_CHANGE_SOURCE))])
+
+    def ChangeCountWrite(self):
+        self.changeCount = (self.changeCount + 1) & 0xFF
+        return self.Write(ubm.GET_CHANGE_COUNT, [self.changeCount, 0])
+
+    def DFCIndex(self):
+        return self.Read(ubm.GET_DFC_INDEX, [self.random.randrange(self.dfcCount)])
+
+    def DFCIndexWrite(self, address = None, dfcIndex = None):
+        return self.Write(ubm.GET_DFC_INDEX, [dfcIndex if dfcIndex is not None else self.random.randrange(self.dfcCount), 0], address)
+
+    def DFCDescriptorBytes(self):
+        driveType = self.random.choice((ubm.DRIVE_INSTALL_TYPE_NVME, ubm.DRIVE_INSTALL_TYPE_SAS_SATA, ubm.DRIVE_INSTALL_TYPE_BAY_EMPTY))
+        return [0x80 | driveType, 0x11, 0x80, 0x01, 0x10, self.random.randrange(3), 0, 0]
+
+    def DFCDescriptor(self, address = None):
+        return self.Read(ubm.GET_DFC_STATUS_CONTROL, self.DFCDescriptorBytes(), address)
+
+    def DFCDescriptorWrite(self):
+        return self.Write(ubm.GET_DFC_STATUS_CONTROL, self.DFCDescriptorBytes())
+
+    def DFCPoll(self):
+        '''
+        Select a DFC and read its descriptor, the way a host polls the drive slots.
+        '''
+        address = self.GetAddress()
+        return self.DFCIndexWrite(address) + self.DFCDescriptor(address)
+
+    def FRU(self):
+        return [self.Transfer(FRU_ADDRESS, [0, 0], BuildFRUImage(self.ubmAddresses, self.dfcCount))]
+
+    def ProgrammingStatus(self, payload):
+        '''
+        Status response of a programming mode sub-command (no opcode and length byte).
+        '''
+        if self.Chance(self.errors.status):
+            payload = [self.random.choice(PROGRAMMING_STATUS_FAILURES)] + payload[1:]
+        return payload + [Checksum(payload)]
+
+    def SubCommand(self, address, subCommand, data):
+        write = [ubm.PROGRAM_MODE_DATA_TRANSFER, subCommand] + data
+        return self.Transfer(address, write + [Checksum(write)])
+
+    def StatusRead(self, address, subCommand, payload, repeatedStart):
+        '''
+        Read of a sub-command response: a read on its own, or with repeatedStart the sub-command write followed by the
+        read after a repeated start.
+        '''
+        response = self.ProgrammingStatus(payload)
+        if repeatedStart:
+            write = [ubm.PROGRAM_MODE_DATA_TRANSFER, subCommand, 0]
+            return self.Transfer(address, write + [Checksum(write)], response)
+        return self.Transfer(address, None, response)
+
+    def StatusPolls(self, address, subCommand, payload, maxBusyPolls, repeatedStart = False):
+        transactions = []
+        if not repeatedStart:
+            transactions.append(self.SubCommand(address, subCommand, [0]))
+        for _ in range(self.random.randrange(maxBusyPolls + 1)):
+            transactions.append(self.StatusRead(address, subCommand, [PROGRAMMING_STATUS_BUSY] + payload, repeatedStart))
+        transactions.append(self.StatusRead(address, subCommand, [PROGRAMMING_STATUS_SUCCESS] + payload, repeatedStart))
+        return transactions
+
+    def FirmwareUpdate(self, address = None, maxBusyPolls = 3, repeatedStart = False):
+        '''
+        A complete firmware update session that writes self.image: NV geometry, then erase, program and verify of
+        every sector, verify image and exit. With repeatedStart every sub-command response is read in one transaction
+        with the sub-command write.
+        '''
+        address = address if address is not None else self.GetAddress()
+        transactions = [self.Transfer(address, [ubm.ENTER_PROGRAMMING_MODE] + ENTER_UNLOCK_SEQUENCE)]
+
+        geometry = [2 + 2 * self.sectors, self.sectors, min(self.indexesPerSector * self.transferSize, 0xFF)]
+        for sector in range(self.sectors):
+            geometry += [sector * self.indexesPerSector, (sector + 1) * self.indexesPerSector - 1]
+        if not repeatedStart:
+            transactions.append(self.SubCommand(address, fwupdate.PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY, [0]))
+        transactions.append(self.StatusRead(address, fwupdate.PROGRAMMING_SUB_COMMAND_GET_NVM_GEOMETRY,
+                                            [PROGRAMMING_STATUS_SUCCESS] + geometry, repeatedStart))
+
+        sequence = 0
+        for sector in range(self.sectors):
+            transactions.append(self.SubCommand(address, fwupdate.PROGRAMMING_SUB_COMMAND_ERASE, [3, sector, 0]))
+            transactions += self.StatusPolls(address, fwupdate.PROGRAMMING_SUB_COMMAND_GET_ERASE_STATUS, [3, sector, 0], maxBusyPolls, repeatedStart)
+            for index in range(sector * self.indexesPerSector, (sector + 1) * self.indexesPerSector):
+                offset = index * self.transferSize
+                payload = list(self.image[offset:offset + self.transferSize])
+                transactions.append(self.SubCommand(address, fwupdate.PROGRAMMING_SUB_COMMAND_PROGRAM,
+                                                    [3 + len(payload), sector, index, sequence & 0xFF] + payload))
+                transactions += self.StatusPolls(address, fwupdate.PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS, [1, sequence & 0xFF],
+                                                 maxBusyPolls, repeatedStart)
+                sequence += 1
+            transactions.append(self.SubCommand(address, fwupdate.PROGRAMMING_SUB_COMMAND_VERIFY, [2, sector, 0]))
+            transactions += self.StatusPolls(address, fwupdate.PROGRAMMING_SUB_COMMAND_GET_VERIFY_STATUS, [2, sector, 0], maxBusyPolls, repeatedStart)
+
+        transactions.append(self.SubCommand(address, fwupdate.PROGRAMMING_SUB_COMMAND_VERIFY_IMAGE, [1, 0]))
+        transactions += self.StatusPolls(address, fwupdate.PROGRAMMING_SUB_COMMAND_GET_VERIFY_IMAGE_STATUS, [1, 0], maxBusyPolls, repeatedStart)
+        transactions.append(self.Transfer(address, [ubm.EXIT_PROGRAMING_MODE] + EXIT_LOCK_SEQUENCE))
+        return transactions
+
+    def FirmwareUpdateRepeatedStart(self):
+        return self.FirmwareUpdate(repeatedStart = True)
+
+# Traffic types by name: the TrafficGenerator method that builds them
+TRAFFIC_TYPES = {
+    "operational_state": TrafficGenerator.OperationalState,
+    "last_command_status": TrafficGenerator.LastCommandStatus,
+    "silicon_identity": TrafficGenerator.SiliconIdentity,
+    "update_capabilities": TrafficGenerator.UpdateCapabilities,
+    "hfc_info": TrafficGenerator.HFCInfo,
+    "backplane_info": TrafficGenerator.BackplaneInfo,
+    "starting_slot": TrafficGenerator.StartingSlot,
+    "capabilities": TrafficGenerator.Capabilities,
+    "features": TrafficGenerator.Features,
+    "features_write": TrafficGenerator.FeaturesWrite,
+    "change_count": TrafficGenerator.ChangeCount,
+    "change_count_write": TrafficGenerator.ChangeCountWrite,
+    "dfc_index": TrafficGenerator.DFCIndex,
+    "dfc_index_write": TrafficGenerator.DFCIndexWrite,
+    "dfc_descriptor": TrafficGenerator.DFCDescriptor,
+    "dfc_descriptor_write": TrafficGenerator.DFCDescriptorWrite,
+    "dfc_poll": TrafficGenerator.DFCPoll,
+    "fru": TrafficGenerator.FRU,
+    "firmware_update": TrafficGenerator.FirmwareUpdate,
+    "firmware_update_repeated_start": TrafficGenerator.FirmwareUpdateRepeatedStart,
+}
+
+# Host polling loop: mostly DFC and state polling, occasional configuration and a rare firmware update
+DEFAULT_MIX = {
+    "dfc_poll": 40.0,
+    "operational_state": 20.0,
+    "change_count": 10.0,
+    "last_command_status": 5.0,
+    "dfc_descriptor_write": 5.0,
+    "dfc_index": 2.0,
+    "features": 2.0,
+    "change_count_write": 2.0,
+    "silicon_identity": 1.0,
+    "update_capabilities": 1.0,
+    "hfc_info": 1.0,
+    "backplane_info": 1.0,
+    "starting_slot": 1.0,
+    "capabilities": 1.0,
+    "fru": 0.1,
+    "firmware_update": 0.01,
+}
+
+def ParseMix(text):
+    '''
+    Parse a traffic mix "name=weight,name=weight" (a name without weight counts 1).
+    '''
+    mix = {}
+    for token in text.replace(" ", "").split(","):
+        if not token:
+            continue
+        name, _, weight = token.partition("=")
+        if name not in TRAFFIC_TYPES:
+            raise ValueError("Unknown traffic type {0} (known: {1})".format(name, ", ".join(TRAFFIC_TYPES)))
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+def GenerateTransactions(generator, count, mix = None, startWithFRU = True):
+    '''
+    Yield (traffic type, transaction frames) until count transactions were generated, picking traffic types by mix weight.
+    The stream starts with a UBM FRU read, as a host does, unless startWithFRU is False.
+    '''
+    mix = mix if mix is not None else DEFAULT_MIX
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    generated = 0
+    if startWithFRU:
+        for frames in generator.FRU():
+            yield "fru", frames
+            generated += 1
+    while generated < count:
+        name = generator.random.choices(names, weights)[0]
+        for frames in TRAFFIC_TYPES[name](generator):
+            yield name, frames
+            generated += 1
+
+def GenerateFrames(generator, count, mix = None, startWithFRU = True):
+    for _, frames in GenerateTransactions(generator, count, mix, startWithFRU):
+        yield from frames
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Generate synthetic UBM I2C traffic as a Saleae CSV export or UBM binary frame file.")
+    parser.add_argument("output", help = "output file, .csv for a Saleae I2C CSV export, otherwise the UBM binary frame format")
+    parser.add_argument("--transactions", type = int, default = 10000, help = "number of transactions (default: 10000)")
+    parser.add_argument("--address", default = "0x55", help = "UBM controller addresses in hex format: 0x55 or 0x50,0x51")
+    parser.add_argument("--mix", help = "traffic mix as type=weight,... (types: {0})".format(", ".join(TRAFFIC_TYPES)))
+    parser.add_argument("--seed", type = int, default = 0, help = "random seed (default: 0)")
+    parser.add_argument("--bus-hz", type = float, default = DEFAULT_BUS_HZ, help = "I2C clock (default: 100000)")
+    parser.add_argument("--checksum-errors", type = float, default = 0.0, help = "probability of a corrupted response checksum")
+    parser.add_argument("--nacks", type = float, default = 0.0, help = "probability of a NACKed address")
+    parser.add_argument("--truncations", type = float, default = 0.0, help = "probability of a transaction cut short")
+    parser.add_argument("--status-errors", type = float, default = 0.0, help = "probability of a failing programming mode status")
+    parser.add_argument("--reference-image", metavar = "IMAGE", help = "also write the firmware image programmed by firmware update sessions")
+    args = parser.parse_args(argv)
+
+    ubmAddresses = [int(token, 16) for token in args.address.replace(",", " ").split()]
+    errors = ErrorRates(args.checksum_errors, args.nacks, args.truncations, args.status_errors)
+    generator = TrafficGenerator(ubmAddresses, args.seed, args.bus_hz, errors = errors)
+    frames = GenerateFrames(generator, args.transactions, ParseMix(args.mix) if args.mix else None)
+    if args.output.lower().endswith(".csv"):
+        count = replay.WriteSaleaeCSV(frames, args.output)
+    else:
+        count = replay.WriteBinaryFrames(frames, args.output)
+    print("Wrote {0} frames ({1:.3f} s of bus time) to {2}".format(count, generator.time, args.output), file = sys.stderr)
+    if args.reference_image:
+        with open(args.reference_image, "wb") as imageFile:
+            imageFile.write(generator.image)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Batch decoding: captures decoded in worker processes give the same summaries as a serial run, merged into one report.
+import os
+
+import lib_ubm_batch as batch
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+
+SETTINGS = {"ubmAddress": "0x55,0x56", "referenceImage": ""}
+
+def WriteCaptures(directory):
+    '''
+    Two synthetic captures, a capture that cannot be read and a file that is not a capture.
+    '''
+    for seed in (1, 2):
+        generator = synth.TrafficGenerator((0x55, 0x56), seed = seed)
+        mix = dict(synth.DEFAULT_MIX, firmware_update = 1.0)
+        replay.WriteBinaryFrames(synth.GenerateFrames(generator, 500, mix), str(directory / "capture{0}.ubmf".format(seed)))
+    (directory / "broken.csv").write_text("not a capture\n")
+    (directory / "notes.txt").write_text("ignored\n")
+    return batch.FindCaptures(str(directory))
+
+def WithoutTime(summary):
+    return summary._replace(seconds = 0.0)
+
+def testFindCaptures(tmp_path):
+    paths = WriteCaptures(tmp_path)
+    assert ["broken.csv", "capture1.ubmf", "capture2.ubmf"] == [os.path.basename(path) for path in paths]
+
+def testParallelBatchMatchesSerial(tmp_path):
+    paths = WriteCaptures(tmp_path)
+    serial = batch.RunBatch(paths, SETTINGS, jobs = 1)
+    parallel = batch.RunBatch(paths, SETTINGS, jobs = 2)
+    assert [WithoutTime(summary) for summary in serial] == [WithoutTime(summary) for summary in parallel]
+
+def testMergedReport(tmp_path):
+    paths = WriteCaptures(tmp_path)
+    summaries = batch.RunBatch(paths, SETTINGS, jobs = 1)
+    broken, first, second = summaries
+    assert broken.error is not None
+    assert first.error is None
+    assert first.firmwareUpdates
+
+    report = batch.MergeSummaries(summaries)
+    assert 3 == report["files"]
+    assert [broken.path] == report["failedFiles"]
+    assert first.transactions + second.transactions == report["transactions"]
+    assert first.frames + second.frames == report["frames"]
+    assert len(first.firmwareUpdates) + len(second.firmwareUpdates) == report["firmwareUpdates"]
+    for ubmAddress in (0x55, 0x56):
+        merged = report["accessCounts"][ubmAddress][ubm.GET_OPERATION_STATE]
+        assert (first.accessCounts[ubmAddress][ubm.GET_OPERATION_STATE] +
+                second.accessCounts[ubmAddress][ubm.GET_OPERATION_STATE]) == merged
+    assert broken.path in report["anomalies"]
+    assert "UBM Batch Report" == batch.RenderReport(report, 1.0)[0]
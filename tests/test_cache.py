@@ -0,0 +1,58 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Decode cache: repeated payloads reuse one decoded record, the least recently used entry is evicted first.
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_cache import CachedDecode, DecodeCache, DecodeCacheStats
+
+def testHitsMissesAndEvictions():
+    cache = DecodeCache(maxEntries = 2)
+    for key in "ab":
+        assert cache.Lookup(key) is None
+        cache.Store(key, CachedDecode(None, key))
+    assert "a" == cache.Lookup("a").payload
+    # "b" is now the least recently used entry
+    cache.Store("c", CachedDecode(None, "c"))
+    assert cache.Lookup("b") is None
+    assert cache.Lookup("a") is not None
+    assert DecodeCacheStats(hits = 2, misses = 3, evictions = 1, entries = 2) == cache.GetStats()
+
+def testRecordIsDecodedOnce():
+    calls = []
+    def Decode(payload):
+        calls.append(payload)
+        return payload[0]
+    cached = CachedDecode(Decode, b"\x05")
+    assert 5 == cached.GetRecord()
+    assert 5 == cached.GetRecord()
+    assert [b"\x05"] == calls
+
+def testShortPayloadHasNoRecord():
+    cached = CachedDecode(lambda payload: payload[3], b"\x01")
+    assert cached.GetRecord() is None
+    assert [] == cached.GetLines(lambda record: ["never"])
+
+def testRepeatedPollsHitTheCache():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    generator = synth.TrafficGenerator()
+    transactions = []
+    for state in (ubm.OPERATIONAL_STATE_READY, ubm.OPERATIONAL_STATE_READY, ubm.OPERATIONAL_STATE_BUSY, ubm.OPERATIONAL_STATE_READY):
+        transactions += generator.Read(ubm.GET_OPERATION_STATE, [state])
+    out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+    assert 4 == len(out)
+    assert out[0].data["state"] == out[1].data["state"]
+    stats = analyzer.GetDecodeCacheStats()
+    assert (2, 2, 2) == (stats.hits, stats.misses, stats.entries)
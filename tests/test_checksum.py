@@ -0,0 +1,68 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Controller responses are only checksum-verified once Features or the UBM FRU UBM Overview shows Read Checksum
+# Creation enabled.
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from HighLevelAnalyzer import FRU_ADDRESS
+
+def Decode(analyzer, transactions):
+    return list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+
+def CreateAnalyzer():
+    return replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+
+def testUnknownSettingIsNotVerified():
+    analyzer = CreateAnalyzer()
+    (frame,) = Decode(analyzer, synth.TrafficGenerator().OperationalState())
+    assert "checksum_ok" not in frame.data
+    assert 0 == analyzer.checksumsChecked
+
+def testFeaturesEnableVerification():
+    analyzer = CreateAnalyzer()
+    generator = synth.TrafficGenerator()
+    out = Decode(analyzer, generator.Features() + generator.OperationalState())
+    # The Features read is decoded before it is known whether it carries a checksum
+    assert "checksum_ok" not in out[0].data
+    assert out[1].data["checksum_ok"] is True
+
+def testFeaturesDisableVerification():
+    analyzer = CreateAnalyzer()
+    generator = synth.TrafficGenerator()
+    # Features write with Read Checksum Creation off: later responses carry no checksum
+    out = Decode(analyzer, generator.Write(ubm.GET_FEATURES, [0x00, 0x00]) +
+                 [generator.Transfer(0x55, [ubm.GET_OPERATION_STATE], [1, 3, 0x00])])
+    assert "checksum_ok" not in out[-1].data
+    assert 0 == analyzer.checksumsChecked
+
+def testUBMOverviewEnablesVerification():
+    analyzer = CreateAnalyzer()
+    generator = synth.TrafficGenerator()
+    out = Decode(analyzer, generator.FRU() + generator.OperationalState())
+    assert out[-1].data["checksum_ok"] is True
+    assert 1 == analyzer.controllers[0x55].readChecksumCreation
+
+def testFeaturesOverrideUBMOverview():
+    analyzer = CreateAnalyzer()
+    generator = synth.TrafficGenerator()
+    Decode(analyzer, generator.Write(ubm.GET_FEATURES, [0x00, 0x00]) + generator.FRU())
+    assert 0 == analyzer.controllers[0x55].readChecksumCreation
+
+def testPartialFRUReadDoesNotApplyOverview():
+    analyzer = CreateAnalyzer()
+    image = synth.BuildFRUImage([0x55], 8)
+    Decode(analyzer, [synth.TrafficGenerator().Transfer(FRU_ADDRESS, [0, 8], image[8:])])
+    assert analyzer.controllers[0x55].readChecksumCreation is None
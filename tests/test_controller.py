@@ -0,0 +1,82 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# UBM controller address setting and per-controller decoding state.
+import pytest
+
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_controller import ParseControllerAddresses
+
+@pytest.mark.parametrize("text, expected", [
+    ("0x55", ([0x55], False)),
+    ("0x56, 0x55", ([0x55, 0x56], False)),
+    ("0x50-0x52 auto", ([0x50, 0x51, 0x52], True)),
+    ("0x58-0x7f", (list(range(0x58, 0x80)), False)),
+    ("", ([], True)),
+])
+def testParseControllerAddresses(text, expected):
+    assert expected == ParseControllerAddresses(text)
+
+@pytest.mark.parametrize("text, message", [
+    ("0x80", "0x80: 7-bit"),
+    ("0x55, 0xae", "0xae: 7-bit"),
+    ("0x7e-0x81", "0x80: 7-bit"),
+    ("0x57", "0x57: it is the UBM FRU address"),
+    ("0x50-0x57", "0x57: it is the UBM FRU address"),
+])
+def testRejectInvalidControllerAddresses(text, message):
+    with pytest.raises(ValueError, match = message):
+        ParseControllerAddresses(text)
+
+def Decode(analyzer, transactions):
+    return list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+
+def testControllerStateIsIsolated():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55, 0x56", verbosity = "Off")
+    generator = synth.TrafficGenerator((0x55, 0x56))
+    # Interleaved: each descriptor read is bound to the DFC index its own controller selected
+    out = Decode(analyzer, generator.DFCIndexWrite(0x55, 2) + generator.DFCIndexWrite(0x56, 5) + generator.Features() +
+                 generator.DFCDescriptor(0x55) + generator.DFCDescriptor(0x56) + generator.DFCDescriptor(0x56))
+    descriptors = [frame for frame in out if "Read DFC Descriptor" == frame.data["Operation"]]
+    assert [("0x55", 2, "0"), ("0x56", 5, "0"), ("0x56", 5, "1")] == [
+        (frame.data["address"], frame.data["dfcIndex"], frame.data["Operation Access Count: "]) for frame in descriptors]
+    assert analyzer.GetDFCState(2, 0x55).descriptor is not None
+    assert analyzer.GetDFCState(2, 0x56).descriptor is None
+    assert 1 == analyzer.GetAccessCounts(0x55).commands[ubm.GET_DFC_STATUS_CONTROL]
+    assert 2 == analyzer.GetAccessCounts(0x56).commands[ubm.GET_DFC_STATUS_CONTROL]
+    # Features was read from one controller only
+    readChecksumCreation = {address: analyzer.controllers[address].readChecksumCreation for address in (0x55, 0x56)}
+    assert 1 == list(readChecksumCreation.values()).count(1)
+    assert 1 == list(readChecksumCreation.values()).count(None)
+
+def testOtherAddressesAreIgnored():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    out = Decode(analyzer, synth.TrafficGenerator((0x60,)).OperationalState())
+    assert [] == out
+    assert analyzer.GetController(0x60) is None
+
+def testAutoDiscoveryFromPortRouteInfo():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "auto", verbosity = "Off")
+    generator = synth.TrafficGenerator((0x55, 0x56))
+    before = Decode(analyzer, generator.OperationalState())
+    assert [] == before
+    out = Decode(analyzer, generator.FRU() + generator.DFCIndexWrite(0x56, 3) + generator.DFCDescriptor(0x56))
+    assert [0x55, 0x56] == analyzer.ubmAddresses
+    # Port Route Info alternates the slots between the controllers: DFC index 3 is slot 6 of 0x55 and slot 7 of 0x56
+    assert (3, 7) == (out[-1].data["dfcIndex"], out[-1].data["slot"])
+    assert 3 == analyzer.GetSlotState(6, 0x55).dfcIndex
+    assert analyzer.GetSlotState(6, 0x56) is None
+    assert 1 == analyzer.controllers[0x56].readChecksumCreation
@@ -0,0 +1,49 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Access counters: the count of a transaction is the number of earlier accesses, snapshots do not follow later counts.
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_counters import AccessCounters, NonZeroCounts
+
+def testCountReturnsPreviousCount():
+    counters = AccessCounters()
+    assert [0, 1, 2] == [counters.CountCommand(0xFF) for _ in range(3)]
+    assert 0 == counters.CountSubCommand(0x03)
+    assert 0 == counters.CountDFCIndex(7)
+    assert [0, 1] == [counters.CountFRU() for _ in range(2)]
+    assert {0xFF: 3} == NonZeroCounts(counters.commands)
+
+def testSnapshotIsUnchangedByLaterCounts():
+    counters = AccessCounters()
+    counters.CountCommand(ubm.GET_OPERATION_STATE)
+    snapshot = counters.Snapshot()
+    counters.CountCommand(ubm.GET_OPERATION_STATE)
+    counters.CountFRU()
+    assert 1 == snapshot.commands[ubm.GET_OPERATION_STATE]
+    assert 0 == snapshot.fru
+    assert 2 == counters.Snapshot().commands[ubm.GET_OPERATION_STATE]
+
+def testAnalyzerAccessCounts():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    generator = synth.TrafficGenerator()
+    transactions = generator.FRU() + generator.OperationalState() + generator.OperationalState() + generator.DFCDescriptor()
+    out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+    assert ["0", "0", "1", "0"] == [frame.data["Operation Access Count: "] for frame in out]
+    snapshot = analyzer.GetAccessCounts()
+    assert 2 == snapshot.commands[ubm.GET_OPERATION_STATE]
+    assert 1 == snapshot.commands[ubm.GET_DFC_STATUS_CONTROL]
+    assert {0: 1} == NonZeroCounts(snapshot.dfcIndexes)
+    assert 1 == snapshot.fru
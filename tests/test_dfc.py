@@ -0,0 +1,52 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# DFC state: descriptor reads and writes are bound to the DFC index selected before them and mapped to slots by the
+# UBM FRU Port Route Info.
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+
+def Decode(analyzer, transactions):
+    return list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+
+def testDescriptorReadIsBoundToSelectedIndex():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    generator = synth.TrafficGenerator(dfcCount = 8)
+    out = Decode(analyzer, generator.FRU() + generator.DFCIndexWrite(0x55, 3) + generator.DFCDescriptor(0x55))
+    descriptorFrame = out[-1]
+    assert 3 == descriptorFrame.data["dfcIndex"]
+    assert 3 == descriptorFrame.data["slot"]
+    state = analyzer.GetDFCState(3)
+    assert state.descriptor is not None
+    assert descriptorFrame.end_time == state.readTime
+    assert state.written is None
+    assert 3 == analyzer.GetSlotState(3).dfcIndex
+    assert analyzer.GetDFCState(2).descriptor is None
+
+def testDescriptorWriteKeepsReadState():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    generator = synth.TrafficGenerator()
+    Decode(analyzer, generator.DFCIndexWrite(0x55, 5) + generator.DFCDescriptor(0x55) + generator.DFCDescriptorWrite())
+    state = analyzer.GetDFCState(5)
+    assert state.descriptor is not None
+    assert state.written is not None
+    assert state.writeTime > state.readTime
+
+def testSlotUnknownWithoutPortRouteInfo():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    generator = synth.TrafficGenerator()
+    out = Decode(analyzer, generator.DFCIndexWrite(0x55, 1) + generator.DFCDescriptor(0x55))
+    assert 1 == out[-1].data["dfcIndex"]
+    assert "slot" not in out[-1].data
+    assert analyzer.GetSlotState(1) is None
@@ -0,0 +1,58 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Change-only emission: a re-read whose decoded content did not change produces no frame, but is still counted.
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+
+def Decode(analyzer, transactions):
+    return list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+
+def CreateAnalyzer(emission = "Changes only"):
+    return replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off", emission = emission)
+
+def ReadStates(generator, states):
+    return [transaction for state in states for transaction in generator.Read(ubm.GET_OPERATION_STATE, [state], 0x55)]
+
+def testUnchangedReadsAreSuppressed():
+    states = (ubm.OPERATIONAL_STATE_READY, ubm.OPERATIONAL_STATE_READY, ubm.OPERATIONAL_STATE_BUSY, ubm.OPERATIONAL_STATE_BUSY)
+    out = Decode(CreateAnalyzer(), ReadStates(synth.TrafficGenerator(), states))
+    assert 2 == len(out)
+    assert "changed" not in out[0].data
+    assert "state" == out[1].data["changed"]
+    # The suppressed read was counted
+    assert "2" == out[1].data["Operation Access Count: "]
+
+def testAllTransactionsAreEmittedByDefault():
+    states = (ubm.OPERATIONAL_STATE_READY,) * 3
+    out = Decode(CreateAnalyzer("All transactions"), ReadStates(synth.TrafficGenerator(), states))
+    assert 3 == len(out)
+    assert all("changed" not in frame.data for frame in out)
+
+def testWritesAreAlwaysEmitted():
+    generator = synth.TrafficGenerator()
+    out = Decode(CreateAnalyzer(), generator.DFCIndexWrite(0x55, 1) + generator.DFCIndexWrite(0x55, 1))
+    assert 2 == len(out)
+
+def testDescriptorsAreComparedPerDFCIndex():
+    generator = synth.TrafficGenerator()
+    descriptor = generator.DFCDescriptorBytes()
+    transactions = []
+    for dfcIndex in (0, 1, 0, 1):
+        transactions += generator.DFCIndexWrite(0x55, dfcIndex) + generator.Read(ubm.GET_DFC_STATUS_CONTROL, descriptor, 0x55)
+    out = Decode(CreateAnalyzer(), transactions)
+    # Four index writes, and only the first descriptor read of each DFC index
+    assert 6 == len(out)
+    assert [0, 1] == [frame.data["dfcIndex"] for frame in out if "Read DFC Descriptor" == frame.data["Operation"]]
@@ -0,0 +1,69 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# NumPy export: the .npy file written in chunks reloads memory-mapped with every row and the metadata origin.
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_export import NumpyTransactionExporter, LoadExportMetadata, CHECKSUM_NONE, CHECKSUM_INVALID, CHECKSUM_OK
+from lib_ubm_store import NO_VALUE
+
+ORIGIN = 50.0
+
+def testRoundTrip(tmp_path):
+    path = str(tmp_path / "export.npy")
+    exporter = NumpyTransactionExporter(path, chunkRows = 2)
+    for row, checksumOk in enumerate((None, True, False, True, None)):
+        exporter.Append(ORIGIN + row, ORIGIN + row + 0.25, 0x55, ubm.GET_OPERATION_STATE, NO_VALUE, True, 4, row, checksumOk, NO_VALUE)
+    exporter.Close()
+
+    transactions = np.load(path, mmap_mode = 'r')
+    assert isinstance(transactions, np.memmap)
+    assert 5 == len(transactions)
+    assert [0.0, 1.0, 2.0, 3.0, 4.0] == transactions["startTime"].tolist()
+    assert [0.25, 1.25] == transactions["endTime"][:2].tolist()
+    assert [0, 1, 2, 3, 4] == transactions["accessCount"].tolist()
+    assert [CHECKSUM_NONE, CHECKSUM_OK, CHECKSUM_INVALID, CHECKSUM_OK, CHECKSUM_NONE] == transactions["checksum"].tolist()
+    assert (0 == transactions["descriptor"]).all()
+    metadata = LoadExportMetadata(path)
+    assert (str(ORIGIN), "s", 5) == (metadata["origin"], metadata["timeUnit"], metadata["rows"])
+
+def testEmptyExport(tmp_path):
+    path = str(tmp_path / "empty.npy")
+    NumpyTransactionExporter(path).Close()
+    assert 0 == len(np.load(path, mmap_mode = 'r'))
+    assert LoadExportMetadata(path)["origin"] is None
+
+def testAnalyzerExport(tmp_path):
+    path = str(tmp_path / "analyzer.npy")
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off", exportPath = path)
+    generator = synth.TrafficGenerator()
+    descriptor = generator.DFCDescriptorBytes()
+    transactions = (generator.Features() + generator.DFCIndexWrite(0x55, 4) +
+                    generator.Read(ubm.GET_DFC_STATUS_CONTROL, descriptor, 0x55))
+    out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+    analyzer.CloseOutput()
+
+    exported = np.load(path, mmap_mode = 'r')
+    assert [ubm.GET_FEATURES, ubm.GET_DFC_INDEX, ubm.GET_DFC_STATUS_CONTROL] == exported["opcode"].tolist()
+    assert [True, False, True] == exported["isRead"].tolist()
+    assert [NO_VALUE, NO_VALUE, 4] == exported["dfcIndex"].tolist()
+    assert [CHECKSUM_NONE, CHECKSUM_NONE, CHECKSUM_OK] == exported["checksum"].tolist()
+    assert descriptor == exported["descriptor"][2].tolist()
+    assert out[2].end_time - out[0].start_time == exported["endTime"][2]
+    assert str(out[0].start_time) == LoadExportMetadata(path)["origin"]
@@ -0,0 +1,116 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Command filter states of the I2C state machine: FIRST until the first data byte, then DATA for selected commands
+# (and the commands that update the command context) or SKIP, which only counts the remaining bytes.
+import lib_ubm_commands as ubm
+import lib_ubm_fwupdate as fwupdate
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from HighLevelAnalyzer import I2CState
+
+def CreateAnalyzer(commandFilter):
+    return replay.CreateAnalyzer(ubmAddress = "0x55,0x56", verbosity = "Off", commandFilter = commandFilter)
+
+def RunStateMachine(analyzer, transactions):
+    '''
+    Feed the frames of one transaction through the I2C state machine. Returns the transaction and the state after
+    every frame.
+    '''
+    (frames,) = transactions
+    transaction = None
+    states = []
+    for frame in frames:
+        out = analyzer.I2CFrameStateMachine(frame)
+        states.append(analyzer.state)
+        if out is not None:
+            transaction = out
+    return transaction, states
+
+def testNoFilterDecodesEverything():
+    analyzer = CreateAnalyzer("")
+    transaction, states = RunStateMachine(analyzer, synth.TrafficGenerator().OperationalState())
+    assert I2CState.FIRST not in states
+    assert I2CState.SKIP not in states
+    assert transaction.length == len(transaction.data)
+
+def testUnselectedCommandIsSkipped():
+    analyzer = CreateAnalyzer("dfc")
+    transaction, states = RunStateMachine(analyzer, synth.TrafficGenerator().OperationalState())
+    # Write phase: start, address, opcode
+    assert I2CState.FIRST == states[1]
+    assert I2CState.SKIP == states[2]
+    # The read phase after the repeated start stays skipped
+    assert I2CState.DATA not in states
+    assert bytes([ubm.GET_OPERATION_STATE]) == bytes(transaction.data)
+    assert 1 == transaction.writeLength
+    # Opcode, then length, operational state and checksum
+    assert 4 == transaction.length
+    assert not analyzer.IsCommandSelected(transaction.address, transaction.data, transaction.read, transaction.writeLength)
+
+def testSelectedCommandIsDecoded():
+    analyzer = CreateAnalyzer("dfc")
+    transaction, states = RunStateMachine(analyzer, synth.TrafficGenerator().DFCDescriptor())
+    assert I2CState.FIRST == states[1]
+    assert I2CState.DATA == states[2]
+    assert I2CState.SKIP not in states
+    assert ubm.GET_DFC_STATUS_CONTROL == transaction.data[0]
+    assert transaction.length == len(transaction.data)
+
+def testContextCommandIsAlwaysAccumulated():
+    analyzer = CreateAnalyzer("dfc")
+    transaction, states = RunStateMachine(analyzer, synth.TrafficGenerator().Features())
+    assert I2CState.DATA == states[2]
+    assert transaction.length == len(transaction.data)
+    # Accumulated for the context, but still not selected for decoding
+    assert not analyzer.IsCommandSelected(transaction.address, transaction.data, transaction.read, transaction.writeLength)
+
+def testAddressFilter():
+    analyzer = CreateAnalyzer("addr:0x56")
+    generator = synth.TrafficGenerator((0x55,))
+    _, states = RunStateMachine(analyzer, generator.OperationalState())
+    assert I2CState.SKIP == states[2]
+    generator.ubmAddresses = [0x56]
+    _, states = RunStateMachine(analyzer, generator.OperationalState())
+    assert I2CState.DATA == states[2]
+
+def testStatesAreResetBetweenTransactions():
+    analyzer = CreateAnalyzer("dfc")
+    generator = synth.TrafficGenerator()
+    RunStateMachine(analyzer, generator.OperationalState())
+    assert I2CState.IDLE == analyzer.state
+    assert analyzer.dataState is None
+    assert 0 == analyzer.skippedBytes
+    _, states = RunStateMachine(analyzer, generator.DFCDescriptor())
+    assert I2CState.FIRST == states[1]
+
+def testSkippedTransactionsAreCountedButNotEmitted():
+    analyzer = CreateAnalyzer("dfc")
+    generator = synth.TrafficGenerator()
+    frames = [frame for transactions in (generator.OperationalState(), generator.OperationalState(), generator.DFCPoll())
+              for transaction in transactions for frame in transaction]
+    out = list(replay.Replay(frames, analyzer))
+    assert ["Write DFC Index", "Read DFC Descriptor"] == [frame.data["Operation"] for frame in out]
+    assert 2 == analyzer.controllers[0x55].accessCounts.commands[ubm.GET_OPERATION_STATE]
+
+def testFilteredCommandResponseAfterSubCommand():
+    # Sub-command write, then the status read with a repeated start after an opcode byte that is not a programming
+    # mode command: the filter only knows it is a programming mode read once the read phase starts
+    for commandFilter in ("", "firmware"):
+        analyzer = CreateAnalyzer(commandFilter)
+        generator = synth.TrafficGenerator()
+        transactions = [generator.SubCommand(0x55, fwupdate.PROGRAMMING_SUB_COMMAND_GET_PROGRAM_STATUS, [1, 0]),
+                        generator.Transfer(0x55, [ubm.GET_OPERATION_STATE], [1, 6, 0xAB])]
+        out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+        assert ["Write to Get Program Status", "Read from Get Program Status"] == [frame.data["Operation"] for frame in out]
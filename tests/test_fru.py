@@ -0,0 +1,82 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# UBM FRU checksums are only checked for reads from offset 0 that cover the IPMI Common Header.
+import lib_ubm_fru as fru
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from HighLevelAnalyzer import FRU_ADDRESS
+
+IMAGE = bytes(synth.BuildFRUImage([0x55], 8))
+
+def DecodeFRUTransfer(write, read):
+    '''
+    Decode one UBM FRU transaction. Returns its UBM Transaction frame and the analyzer.
+    '''
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    frames = synth.TrafficGenerator().Transfer(FRU_ADDRESS, write, read)
+    (frame,) = replay.Replay(frames, analyzer)
+    return frame, analyzer
+
+def Corrupt(data, offset):
+    data = bytearray(data)
+    data[offset] ^= 0x01
+    return list(data)
+
+def testWholeImageRead():
+    frame, analyzer = DecodeFRUTransfer([0, 0], list(IMAGE))
+    assert frame.data["checksum_ok"] is True
+    assert (1, 0) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testCommonHeaderOnlyRead():
+    frame, analyzer = DecodeFRUTransfer([0, 0], list(IMAGE[:fru.IPMI_COMMON_HEADER_SIZE]))
+    assert frame.data["checksum_ok"] is True
+    assert (1, 0) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testCorruptedCommonHeader():
+    frame, analyzer = DecodeFRUTransfer([0, 0], Corrupt(IMAGE, 1))
+    assert frame.data["checksum_ok"] is False
+    assert (1, 1) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testCorruptedRecord():
+    frame, analyzer = DecodeFRUTransfer([0, 0], Corrupt(IMAGE, len(IMAGE) - 1))
+    assert frame.data["checksum_ok"] is False
+    assert (1, 1) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testShortReadHasNoChecksum():
+    frame, analyzer = DecodeFRUTransfer([0, 0], list(IMAGE[:fru.IPMI_COMMON_HEADER_SIZE - 1]))
+    assert "checksum_ok" not in frame.data
+    assert (0, 0) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testReadAtOffsetHasNoChecksum():
+    frame, analyzer = DecodeFRUTransfer([0, fru.IPMI_COMMON_HEADER_SIZE], list(IMAGE[fru.IPMI_COMMON_HEADER_SIZE:]))
+    assert "checksum_ok" not in frame.data
+    assert (0, 0) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testWriteHasNoChecksum():
+    frame, analyzer = DecodeFRUTransfer([0, 0] + list(IMAGE), None)
+    assert "checksum_ok" not in frame.data
+    assert (0, 0) == (analyzer.checksumsChecked, analyzer.GetChecksumErrors())
+
+def testDecodeShortUBMFru():
+    record = fru.DecodeUBMFru(IMAGE[:fru.IPMI_COMMON_HEADER_SIZE - 1])
+    assert record.commonHeader is None
+    assert record.commonHeaderChecksumOk is None
+    assert record.checksumOk is None
+    assert ["UBM FRU read is too short for the IPMI Common Header"] == fru.RenderUBMFru(record)
+
+def testRenderUBMType():
+    assert ["UBM Controller Type: UBM Controller is Vendor specific (1)"] == fru.RenderUBMType(1)
+    for typeBit in (0, 2, 0xFF):
+        assert ["UBM Controller Type: UBM Controller is defined by this specification (0)"] == fru.RenderUBMType(typeBit)
@@ -0,0 +1,101 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Firmware update sessions: the programmed image is reassembled from the Program writes and compared with a
+# reference image, and every erase, program and verify operation is timed.
+import pytest
+
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_fwsession import FirmwareUpdateSession, IsImageMatch, PHASES, PHASE_PROGRAM
+
+def DecodeUpdate(referenceImage = "", repeatedStart = False, maxBusyPolls = 3):
+    generator = synth.TrafficGenerator()
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off", referenceImage = referenceImage)
+    transactions = generator.FirmwareUpdate(0x55, maxBusyPolls, repeatedStart)
+    out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+    return generator, analyzer, out
+
+def WriteImage(tmp_path, image):
+    path = tmp_path / "reference.bin"
+    path.write_bytes(image)
+    return str(path)
+
+@pytest.mark.parametrize("repeatedStart", [False, True])
+def testSessionReassemblesTheImage(repeatedStart):
+    generator, analyzer, out = DecodeUpdate(repeatedStart = repeatedStart)
+    (session,) = analyzer.GetFirmwareUpdateSessions()
+    image, offsets = session.GetImage()
+    assert generator.image == bytes(image)
+    assert {0: 0, 1: len(image) // 2} == offsets
+    assert 16 == session.transferSize
+    assert 1 == [frame.type for frame in out].count("Firmware Update Summary")
+
+def testReferenceImageMatches(tmp_path):
+    generator = synth.TrafficGenerator()
+    _, analyzer, out = DecodeUpdate(WriteImage(tmp_path, generator.image))
+    comparison = analyzer.GetFirmwareUpdateSessions()[0].comparison
+    assert [0, 1] == comparison.matchingSectors
+    assert (len(generator.image), len(generator.image)) == (comparison.imageSize, comparison.comparedBytes)
+    assert IsImageMatch(comparison) is True
+    assert out[-1].data["image_match"] is True
+
+def testReferenceImageMismatch(tmp_path):
+    generator = synth.TrafficGenerator()
+    reference = bytearray(generator.image)
+    offset = len(reference) // 2 + 5
+    reference[offset] ^= 0xFF
+    _, analyzer, out = DecodeUpdate(WriteImage(tmp_path, bytes(reference)))
+    comparison = analyzer.GetFirmwareUpdateSessions()[0].comparison
+    assert [0] == comparison.matchingSectors
+    (mismatch,) = comparison.mismatchedSectors
+    assert (1, offset, reference[offset], generator.image[offset]) == tuple(mismatch)
+    assert out[-1].data["image_match"] is False
+
+def testReferenceImageUnavailable(tmp_path):
+    _, analyzer, out = DecodeUpdate(str(tmp_path / "missing.bin"))
+    comparison = analyzer.GetFirmwareUpdateSessions()[0].comparison
+    assert IsImageMatch(comparison) is None
+    assert out[-1].data["image_unavailable"]
+
+def testOperationLatencies():
+    _, analyzer, out = DecodeUpdate()
+    latencies = [frame for frame in out if "Firmware Update Latency" == frame.type]
+    phases = [frame.data["phase"] for frame in latencies]
+    assert (2, 8, 2, 1) == tuple(phases.count(phase) for phase in PHASES)
+    (session,) = analyzer.GetFirmwareUpdateSessions()
+    totals = {totals.phase: totals for totals in session.GetPhaseTotals()}
+    for phase in PHASES:
+        frames = [frame for frame in latencies if phase == frame.data["phase"]]
+        assert sum([frame.data["busy_polls"] for frame in frames]) == totals[phase].busyPolls
+        assert sum([frame.data["latency_ms"] for frame in frames]) == pytest.approx(totals[phase].totalTime * 1000.0)
+    # Each latency runs from the start of the command write to the end of its first non-Busy status read
+    assert all(frame.end_time > frame.start_time for frame in latencies)
+    assert 8 * 16 == totals[PHASE_PROGRAM].dataBytes
+
+def testProgramThroughput():
+    session = FirmwareUpdateSession(0.0)
+    for index, (start, end) in enumerate(((0.0, 0.002), (0.003, 0.004))):
+        session.StartOperation(PHASE_PROGRAM, None, start, 16)
+        if index:
+            session.pendingOperation.busyPolls = 2
+        latency = session.CompleteOperation(end, 1)
+    assert pytest.approx(0.001) == latency.latency
+    session.endTime = 0.008
+    programRate, effectiveRate = session.GetProgramThroughput()
+    assert pytest.approx(32 / 0.003) == programRate
+    assert pytest.approx(32 / 0.008) == effectiveRate
+    (totals,) = session.GetPhaseTotals()
+    assert (PHASE_PROGRAM, 2, 2, 32) == (totals.phase, totals.operations, totals.busyPolls, totals.dataBytes)
+    assert pytest.approx(0.002) == totals.maxLatency
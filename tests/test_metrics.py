@@ -0,0 +1,70 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Bus metrics: transactions, bytes, bus time and inter-arrival histogram per opcode and for the UBM FRU.
+import pytest
+
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_metrics import BusMetrics, GetHistogramBucket, METRICS_FRU_KEY, HISTOGRAM_BUCKETS
+
+ORIGIN = 20.0
+
+@pytest.mark.parametrize("seconds, bucket", [
+    (0.0, 0),
+    (0.5e-6, 0),
+    (1e-6, 1),
+    (3e-6, 2),
+    (1000e-6, 10),
+    (3600.0, HISTOGRAM_BUCKETS - 1),
+])
+def testHistogramBucket(seconds, bucket):
+    assert bucket == GetHistogramBucket(seconds)
+
+def testMetricsPerKey():
+    metrics = BusMetrics()
+    # A poll every 10 ms taking 1 ms, and one FRU read
+    for poll in range(4):
+        metrics.Add(ubm.GET_OPERATION_STATE, ORIGIN + poll * 0.01, ORIGIN + poll * 0.01 + 0.001, 4)
+    metrics.Add(METRICS_FRU_KEY, ORIGIN + 0.035, ORIGIN + 0.04, 64)
+    assert pytest.approx(0.04) == metrics.GetCaptureTime()
+
+    poll = metrics.GetMetrics(ubm.GET_OPERATION_STATE)
+    assert (4, 16) == (poll.transactions, poll.bytes)
+    assert pytest.approx(0.004) == poll.busTime
+    assert pytest.approx(100.0) == poll.transactionsPerSecond
+    assert pytest.approx(0.1) == poll.busShare
+    # 10 ms is in the [8192, 16384) us bucket
+    assert {14: 3} == {bucket: count for bucket, count in enumerate(poll.histogram) if count}
+
+    assert [ubm.GET_OPERATION_STATE, METRICS_FRU_KEY] == [opcodeMetrics.key for opcodeMetrics in metrics.GetActiveMetrics()]
+    assert pytest.approx(0.225) == metrics.GetBusShare()
+
+def testEmptyMetrics():
+    metrics = BusMetrics()
+    assert 0.0 == metrics.GetBusShare()
+    assert 0.0 == metrics.GetMetrics(ubm.GET_OPERATION_STATE).transactionsPerSecond
+    assert [] == metrics.GetActiveMetrics()
+
+def testAnalyzerMetrics():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    generator = synth.TrafficGenerator()
+    transactions = generator.FRU() + generator.OperationalState() + generator.OperationalState() + generator.DFCPoll()
+    out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+    metrics = analyzer.GetBusMetrics()
+    keys = {opcodeMetrics.key: opcodeMetrics.transactions for opcodeMetrics in metrics.GetActiveMetrics()}
+    assert {METRICS_FRU_KEY: 1, ubm.GET_OPERATION_STATE: 2, ubm.GET_DFC_INDEX: 1, ubm.GET_DFC_STATUS_CONTROL: 1} == keys
+    assert pytest.approx(out[-1].end_time - out[0].start_time) == metrics.GetCaptureTime()
+    assert "Bus Utilization" == analyzer.RenderBusMetrics()[0]
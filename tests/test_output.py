@@ -0,0 +1,155 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Terminal sink: lines below the batch size are written when the decoder goes idle and when the sink is closed.
+import io
+import threading
+import time
+
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_output import BufferedTerminalSink, DROPPED_LINES_NOTICE
+
+# Long enough that only an explicit flush or close writes the lines
+NEVER = 3600.0
+TIMEOUT = 5.0
+
+def WaitForOutput(output, expected):
+    deadline = time.monotonic() + TIMEOUT
+    while (output.getvalue() != expected) and (time.monotonic() < deadline):
+        time.sleep(0.01)
+    return output.getvalue()
+
+def testCloseWritesPendingLines():
+    output = io.StringIO()
+    sink = BufferedTerminalSink(output, flushInterval = NEVER)
+    sink.Write(["first", "second"])
+    sink.Write(["third"])
+    assert "" == output.getvalue()
+    sink.Close()
+    assert "first\nsecond\nthird\n" == output.getvalue()
+    assert 3 == sink.writtenLines
+    assert not sink.thread.is_alive()
+
+def testCloseTwice():
+    output = io.StringIO()
+    sink = BufferedTerminalSink(output, flushInterval = NEVER)
+    sink.Write(["line"])
+    sink.Close()
+    sink.Close()
+    assert "line\n" == output.getvalue()
+
+def testIdleLinesAreFlushed():
+    output = io.StringIO()
+    sink = BufferedTerminalSink(output, flushInterval = 0.05)
+    sink.Write(["idle"])
+    assert "idle\n" == WaitForOutput(output, "idle\n")
+    sink.Close()
+
+class ClosingStream(io.StringIO):
+    '''
+    Stream that closes its sink from the writer thread during the first write, the way garbage collection of an
+    analyzer can, after the test has written more lines.
+    '''
+    def __init__(self):
+        io.StringIO.__init__(self)
+        self.sink = None
+        self.linesWritten = threading.Event()
+
+    def write(self, text):
+        length = io.StringIO.write(self, text)
+        if self.sink is not None:
+            sink = self.sink
+            self.sink = None
+            assert self.linesWritten.wait(TIMEOUT)
+            sink.Close()
+        return length
+
+def testCloseFromWriterThread():
+    output = ClosingStream()
+    sink = BufferedTerminalSink(output, flushInterval = 0.05)
+    output.sink = sink
+    sink.Write(["first"])
+    sink.Flush()
+    sink.Write(["second"])
+    output.linesWritten.set()
+    sink.thread.join(TIMEOUT)
+    assert not sink.thread.is_alive()
+    assert "first\nsecond\n" == output.getvalue()
+    # Closing again from another thread does not wait for the stopped writer
+    sink.Close()
+
+def testLineOrderIsKept():
+    output = io.StringIO()
+    sink = BufferedTerminalSink(output, batchLines = 7, maxQueuedBatches = 2, flushInterval = 0.001, dropWhenFull = False)
+    lines = [str(line) for line in range(5000)]
+    for start in range(0, len(lines), 3):
+        sink.Write(lines[start:start + 3])
+    sink.Close()
+    assert lines == output.getvalue().splitlines()
+    assert 0 == sink.droppedLines
+
+class BlockedStream(io.StringIO):
+    '''
+    Stream whose writes wait until released, so the sink queue fills up behind it.
+    '''
+    def __init__(self):
+        io.StringIO.__init__(self)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.writing.set()
+        assert self.release.wait(TIMEOUT)
+        return io.StringIO.write(self, text)
+
+def FillBlockedSink(flushInterval):
+    '''
+    Write three lines through a sink with room for one queued batch while the writer is blocked: the last is dropped.
+    '''
+    output = BlockedStream()
+    sink = BufferedTerminalSink(output, batchLines = 1, maxQueuedBatches = 1, flushInterval = flushInterval)
+    sink.Write(["first"])
+    assert output.writing.wait(TIMEOUT)
+    sink.Write(["second"])
+    sink.Write(["third"])
+    assert 1 == sink.droppedLines
+    output.release.set()
+    return output, sink
+
+def testCloseReportsDroppedLines():
+    output, sink = FillBlockedSink(NEVER)
+    sink.Close()
+    assert ["first", "second", DROPPED_LINES_NOTICE.format(1)] == output.getvalue().splitlines()
+
+def testIdleFlushReportsDroppedLines():
+    output, sink = FillBlockedSink(0.05)
+    expected = "first\nsecond\n" + DROPPED_LINES_NOTICE.format(1) + "\n"
+    assert expected == WaitForOutput(output, expected)
+    # Reported once: closing adds no second notice
+    sink.Close()
+    assert expected == output.getvalue()
+
+def testCloseOutputFlushesAnalyzerLines():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Summary")
+    output = io.StringIO()
+    sink = BufferedTerminalSink(output, flushInterval = NEVER, dropWhenFull = False)
+    analyzer.SetOutputSink(sink)
+    generator = synth.TrafficGenerator()
+    frames = [frame for transaction in generator.OperationalState() + generator.ChangeCount() for frame in transaction]
+    assert 2 == len(list(replay.Replay(frames, analyzer)))
+    assert "" == output.getvalue()
+    analyzer.CloseOutput()
+    assert not sink.thread.is_alive()
+    assert ["Read Operational State", "Read Change Count"] == [line.split(" - ")[0] for line in output.getvalue().splitlines()]
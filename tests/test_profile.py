@@ -0,0 +1,73 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Stage profiling: every stage holds only its own time, the first stage is the total.
+import lib_ubm_profile
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from HighLevelAnalyzer import PROFILED_STAGES, DECODERS_STAGE
+from lib_ubm_profile import StageProfiler, StageTime, OTHER_STAGE
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def testNestedStagesAreNotCountedTwice(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(lib_ubm_profile.time, "perf_counter", clock)
+    profiler = StageProfiler()
+
+    def Outer():
+        clock.now += 1.0
+        inner()
+        clock.now += 1.0
+
+    def Inner():
+        clock.now += 2.0
+
+    # The first stage wrapped is the total
+    outer = profiler.Wrap("Total", Outer)
+    inner = profiler.Wrap("Inner", Inner)
+    outer()
+    outer()
+    assert [StageTime("Total", 2, 8.0, 1.0), StageTime("Inner", 2, 4.0, 0.5), StageTime(OTHER_STAGE, 2, 4.0, 0.5)] == profiler.GetStageTimes()
+
+    profiler.Reset()
+    assert [0.0, 0.0, 0.0] == [stageTime.seconds for stageTime in profiler.GetStageTimes()]
+
+def testEmptyProfiler():
+    assert [] == StageProfiler().GetStageTimes()
+
+def testAnalyzerProfile():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off", profiling = "On")
+    generator = synth.TrafficGenerator()
+    frames = [frame for transaction in generator.OperationalState() + generator.DFCPoll() for frame in transaction]
+    assert 3 == len(list(replay.Replay(frames, analyzer)))
+    profile = analyzer.GetProfile()
+    names = [stageTime.name for stageTime in profile]
+    # Formatting is shared by two methods
+    stageNames = list(dict.fromkeys([name for name, _ in PROFILED_STAGES]))
+    assert stageNames + [DECODERS_STAGE, OTHER_STAGE] == names
+    stages = {stageTime.name: stageTime for stageTime in profile}
+    assert len(frames) == stages["Decode"].calls
+    assert 3 == stages[DECODERS_STAGE].calls
+    assert abs(sum([stageTime.seconds for stageTime in profile[1:]]) - profile[0].seconds) < 1e-9
+
+def testProfilingIsOffByDefault():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    assert [] == analyzer.GetProfile()
+    assert "decode" not in vars(analyzer)
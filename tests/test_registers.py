@@ -0,0 +1,56 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# The vectorized batch decode of registers must give the same field values as the per-record decode.
+import pytest
+
+import lib_ubm_commands as ubm
+import lib_ubm_export as export
+from lib_ubm_registers import Register
+
+np = pytest.importorskip("numpy")
+
+ROWS = 512
+
+def GetRegisters():
+    return [(name, register) for name, register in vars(ubm).items() if isinstance(register, Register)]
+
+def GetRandomBytes(columns):
+    # Every byte value in every column, followed by random rows
+    allValues = np.repeat(np.arange(256, dtype = np.uint8)[:, None], columns, axis = 1)
+    randomValues = np.random.default_rng(0).integers(0, 256, size = (ROWS, columns), dtype = np.uint8)
+    return np.concatenate((allValues, randomValues))
+
+def CheckColumns(columns, records):
+    assert type(columns)._fields == type(records[0])._fields
+    for name, column in zip(columns._fields, columns):
+        assert len(records) == len(column)
+        assert [getattr(record, name) for record in records] == column.tolist(), name
+
+@pytest.mark.parametrize("name, register", GetRegisters())
+def testDecodeColumnsMatchesDecode(name, register):
+    data = GetRandomBytes(len(register.layouts))
+    CheckColumns(register.DecodeColumns(data), [register.Decode(bytes(row)) for row in data])
+
+def testDecodeColumnsIgnoresExtraColumns():
+    data = GetRandomBytes(export.DESCRIPTOR_BYTES)
+    CheckColumns(ubm.DecodeDFCDescriptorWrites(data), [ubm.DecodeDFCDescriptorWrite(bytes(row)) for row in data])
+
+def testDecodeColumnsRejectsShortRows():
+    with pytest.raises(ValueError):
+        ubm.DecodeDFCDescriptors(np.zeros((4, len(ubm.DFC_DESCRIPTOR.layouts) - 1), dtype = np.uint8))
+
+def testDecodeDFCDescriptorsMatchesDecode():
+    data = GetRandomBytes(len(ubm.DFC_DESCRIPTOR.layouts))
+    CheckColumns(ubm.DecodeDFCDescriptors(data), [ubm.DecodeDFCDescriptor(bytes(row)) for row in data])
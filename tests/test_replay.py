@@ -0,0 +1,69 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Serial and parallel replay of the same synthetic capture must produce the same terminal output and totals.
+import io
+
+import lib_ubm_parallel
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_output import BufferedTerminalSink
+
+UBM_ADDRESSES = (0x55, 0x56)
+TRANSACTIONS = 3000
+CHUNKS = 8
+
+def WriteCapture(directory):
+    '''
+    Write a capture with firmware updates (including repeated start responses) and every kind of error, and the
+    firmware image the updates program. Returns the capture and image paths.
+    '''
+    generator = synth.TrafficGenerator(UBM_ADDRESSES, seed = 1, errors = synth.ErrorRates(0.01, 0.01, 0.01, 0.01))
+    mix = dict(synth.DEFAULT_MIX, fru = 1.0, firmware_update = 0.5, firmware_update_repeated_start = 0.5)
+    capturePath = str(directory / "capture.ubmf")
+    imagePath = str(directory / "image.bin")
+    replay.WriteBinaryFrames(synth.GenerateFrames(generator, TRANSACTIONS, mix), capturePath)
+    with open(imagePath, "wb") as imageFile:
+        imageFile.write(generator.image)
+    return capturePath, imagePath
+
+def GetSettings(imagePath):
+    return {"ubmAddress": "0x55,0x56", "verbosity": "Full", "referenceImage": imagePath}
+
+def RunSerial(capturePath, settings):
+    analyzer = replay.CreateAnalyzer(**settings)
+    output = io.StringIO()
+    analyzer.SetOutputSink(BufferedTerminalSink(output, dropWhenFull = False))
+    for _ in replay.Replay(replay.ReadCapture(capturePath), analyzer):
+        pass
+    analyzer.CloseOutput()
+    imageMatches = tuple((session.startTime, replay.IsImageMatch(session.comparison))
+                         for session in analyzer.GetFirmwareUpdateSessions())
+    return output.getvalue(), analyzer, imageMatches
+
+def testParallelReplayMatchesSerial(tmp_path):
+    capturePath, imagePath = WriteCapture(tmp_path)
+    settings = GetSettings(imagePath)
+    serialOutput, analyzer, serialImageMatches = RunSerial(capturePath, settings)
+
+    output = io.StringIO()
+    stats = lib_ubm_parallel.RunParallelReplay(capturePath, settings, jobs = 2, output = output, chunkCount = CHUNKS)
+
+    assert CHUNKS == stats.chunks
+    assert serialOutput
+    assert serialOutput == output.getvalue()
+    assert analyzer.checksumsChecked == stats.checksumsChecked
+    assert analyzer.GetChecksumErrors() == stats.checksumErrors
+    assert serialImageMatches
+    assert sorted(serialImageMatches) == sorted(stats.imageMatches)
@@ -0,0 +1,90 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Transaction store: times relative to the first transaction, bisect range queries and secondary indexes.
+import pytest
+
+import lib_ubm_commands as ubm
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+from lib_ubm_store import TransactionStore, NO_VALUE, STATUS_BUSY
+
+ORIGIN = 100.0
+
+def BuildStore():
+    '''
+    Transaction n starts at ORIGIN + n and alternates between two addresses; every third one is a Busy status read.
+    '''
+    store = TransactionStore()
+    for row in range(10):
+        status = STATUS_BUSY if 0 == (row % 3) else NO_VALUE
+        store.Append(ORIGIN + row, ORIGIN + row + 0.5, 0x55 + (row & 1), ubm.GET_OPERATION_STATE if row < 5 else ubm.GET_FEATURES,
+                     NO_VALUE, NO_VALUE, 1, status, row // 2, 4)
+    return store
+
+def testEmptyStore():
+    store = TransactionStore()
+    assert (0, 0) == store.GetRowRange(ORIGIN, ORIGIN + 1)
+    assert [] == store.Query(address = 0x55)
+    assert store.GetOrigin() is None
+
+def testTimesAreRelativeToTheFirstTransaction():
+    store = BuildStore()
+    assert ORIGIN == store.GetOrigin()
+    transaction = store.GetTransaction(3)
+    assert (3.0, 3.5) == (transaction.startTime, transaction.endTime)
+    assert (0x56, 1, True) == (transaction.address, transaction.accessCount, transaction.isRead)
+
+@pytest.mark.parametrize("startTime, endTime, expected", [
+    (None, None, (0, 10)),
+    (ORIGIN + 2, ORIGIN + 4, (2, 5)),
+    (ORIGIN + 2.5, ORIGIN + 3.5, (3, 4)),
+    (ORIGIN - 5, ORIGIN - 1, (0, 0)),
+    (ORIGIN + 20, None, (10, 10)),
+])
+def testRowRange(startTime, endTime, expected):
+    assert expected == BuildStore().GetRowRange(startTime, endTime)
+
+def testQuery():
+    store = BuildStore()
+    assert [1, 3] == store.Query(ORIGIN, ORIGIN + 4, address = 0x56, opcode = ubm.GET_OPERATION_STATE)
+    assert [5, 7, 9] == store.Query(address = 0x56, opcode = ubm.GET_FEATURES)
+    assert [3, 6] == store.GetBusyStatuses(ORIGIN + 1, ORIGIN + 8)
+    assert [] == store.Query(opcode = ubm.GET_DFC_INDEX)
+    assert [] == store.Query(ORIGIN, ORIGIN + 9, isRead = False)
+
+def testQueryRejectsUnindexedColumns():
+    with pytest.raises(KeyError):
+        BuildStore().Query(length = 4)
+
+def testAppendOutOfOrder():
+    store = BuildStore()
+    with pytest.raises(ValueError):
+        store.Append(ORIGIN + 1, ORIGIN + 2, 0x55, ubm.GET_OPERATION_STATE, NO_VALUE, NO_VALUE, 1, NO_VALUE, 0, 4)
+
+def testAnalyzerStore():
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off", transactionStore = "On")
+    generator = synth.TrafficGenerator()
+    transactions = generator.OperationalState() + generator.DFCIndexWrite(0x55, 2) + generator.DFCDescriptor(0x55)
+    out = list(replay.Replay([frame for transaction in transactions for frame in transaction], analyzer))
+    store = analyzer.GetTransactionStore()
+    assert 3 == len(store)
+    assert out[0].start_time == store.GetOrigin()
+    # Only descriptor transactions have a DFC index
+    assert [2] == store.Query(dfcIndex = 2)
+    (row,) = store.Query(out[2].start_time, None, opcode = ubm.GET_DFC_STATUS_CONTROL, isRead = True)
+    assert out[2].end_time - out[0].start_time == store.GetTransaction(row).endTime
+
+def testAnalyzerStoreIsOffByDefault():
+    assert replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off").GetTransactionStore() is None
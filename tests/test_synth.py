@@ -0,0 +1,67 @@
+# Copyright 2024 Microchip Technology Incorporated
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Synthetic traffic generator and decode benchmarks.
+import pytest
+
+import lib_ubm_bench as bench
+import lib_ubm_replay as replay
+import lib_ubm_synth as synth
+
+ALWAYS_TRUNCATE = synth.ErrorRates(0.0, 0.0, 1.0, 0.0)
+
+def DataBytes(frames):
+    return [frame.data["data"][0] for frame in frames if replay.FRAME_TYPE_NAMES[replay.FRAME_TYPE_DATA] == frame.type]
+
+@pytest.mark.parametrize("write, read", [([], None), ([0x22], []), (None, [])])
+def testTruncateEmptySegment(write, read):
+    generator = synth.TrafficGenerator(errors = ALWAYS_TRUNCATE)
+    frames = generator.Transfer(0x55, write, read)
+    assert replay.FRAME_TYPE_NAMES[replay.FRAME_TYPE_STOP] == frames[-1].type
+    assert (write or []) == DataBytes(frames)
+
+def testTruncateShortensLastSegment():
+    generator = synth.TrafficGenerator(errors = ALWAYS_TRUNCATE)
+    for length in range(1, 8):
+        frames = generator.Transfer(0x55, [0x22], list(range(length)))
+        data = DataBytes(frames)
+        assert [0x22] == data[:1]
+        assert len(data) - 1 < length
+
+def testSameSeedSameTraffic():
+    first = synth.GenerateFrames(synth.TrafficGenerator(seed = 3), 200)
+    second = synth.GenerateFrames(synth.TrafficGenerator(seed = 3), 200)
+    other = synth.GenerateFrames(synth.TrafficGenerator(seed = 4), 200)
+    assert [(frame.type, frame.start_time, frame.data) for frame in first] == [(frame.type, frame.start_time, frame.data) for frame in second]
+    assert [frame.data for frame in first] != [frame.data for frame in other]
+
+@pytest.mark.parametrize("name", sorted(synth.TRAFFIC_TYPES))
+def testEveryTrafficTypeDecodes(name):
+    analyzer = replay.CreateAnalyzer(ubmAddress = "0x55", verbosity = "Off")
+    frames = [frame for transaction in bench.BuildTransactions(name, 1, 0) for frame in transaction]
+    out = [frame for frame in replay.Replay(frames, analyzer) if "UBM Transaction" == frame.type]
+    assert out
+    assert all("Unknown operation" != frame.data["Operation"] for frame in out)
+    assert 0 == analyzer.GetChecksumErrors()
+
+def testBenchmarkRun():
+    result = bench.RunBenchmark("operational_state", 20, {"ubmAddress": "0x55", "verbosity": "Summary"}, repeat = 1)
+    # Start, address, opcode, repeated start, address, three response bytes and stop
+    assert (20, 20 * 9) == (result.transactions, result.frames)
+    assert result.latencyMedian <= result.latencyP95 <= result.latencyP99 <= result.latencyMax
+    assert result.peakMemory > 0
+    assert 2 == len(bench.RenderResults([result]))
+    baseline = {"operational_state": {"framesPerSecond": result.framesPerSecond * 10.0, "peakMemory": result.peakMemory}}
+    (regression,) = bench.CompareWithBaseline([result], baseline, 0.1)
+    assert regression.startswith("operational_state: ")